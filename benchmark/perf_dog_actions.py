@@ -0,0 +1,86 @@
+"""Time of get_list_action of Dog for hands with JOKERs
+
+Plays random games and, every few turns, lists the actions of the active player with 0 to 3 JOKERs
+added to the hand. Dog decides once per rank whether a JOKER can stand in for it, from the moves of all
+distinct steps, and removes duplicate actions by hashing; for comparison, NaiveJokerDog tries every
+card a JOKER can stand in for and removes duplicates by comparing the actions:
+
+    python benchmark/perf_dog_actions.py
+"""
+
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path += '../'
+
+from server.py.dog import (Dog, Action, Card, GameState, GamePhase,  # pylint: disable=wrong-import-position
+                           RandomPlayer)
+
+CNT_GAMES = 10
+CNT_JOKER_MAX = 3
+JOKER = Card(suit='', rank='JKR')
+
+
+class NaiveJokerDog(Dog):
+    """ Dog listing the actions of a JOKER card by card and without hashing """
+
+    def _get_list_action_joker(self, card: Card, idx_player: int) -> List[Action]:
+        list_action = self._get_list_action_start(card, idx_player)
+        for suit in GameState.LIST_SUIT:
+            for rank in GameState.LIST_RANK[:-1]:
+                card_swap = Card(suit=suit, rank=rank)
+                if self._get_list_action_card(card_swap, idx_player):
+                    list_action.append(Action(card=card, pos_from=None, pos_to=None, card_swap=card_swap))
+        return list_action
+
+    def get_list_action(self) -> List[Action]:
+        state = self.state
+        if state.phase != GamePhase.RUNNING or not state.bool_card_exchanged or state.card_active is not None:
+            return super().get_list_action()
+        idx_player = self._get_idx_player_moving()
+        list_action: List[Action] = []
+        for card in state.list_player[state.idx_player_active].list_card:
+            for action in self._get_list_action_card(card, idx_player):
+                if action not in list_action:
+                    list_action.append(action)
+        return list_action
+
+
+def measure(seed: int) -> Dict[str, List[float]]:
+    """ Play the games and return the seconds per get_list_action of both games by the number of JOKERs """
+    random.seed(seed)
+    player = RandomPlayer()
+    dict_time: Dict[str, List[float]] = {'naive': [0.0] * (CNT_JOKER_MAX + 1), 'hashed': [0.0] * (CNT_JOKER_MAX + 1)}
+    list_cnt = [0] * (CNT_JOKER_MAX + 1)
+    for _ in range(CNT_GAMES):
+        game = Dog()
+        state = game.get_state()
+        for idx_turn in range(10000):
+            if state.phase != GamePhase.RUNNING:
+                break
+            if idx_turn % 4 == 0 and state.bool_card_exchanged and state.card_active is None:
+                cnt_joker = random.randint(0, CNT_JOKER_MAX)
+                state_joker = state.model_copy(deep=True)
+                state_joker.list_player[state.idx_player_active].list_card += [JOKER] * cnt_joker
+                for name, game_class in (('naive', NaiveJokerDog), ('hashed', Dog)):
+                    game_joker = game_class()
+                    game_joker.set_state(state_joker)
+                    time_0 = time.perf_counter()
+                    game_joker.get_list_action()
+                    dict_time[name][cnt_joker] += time.perf_counter() - time_0
+                list_cnt[cnt_joker] += 1
+            game.apply_action(player.select_action(state, game.get_list_action()))
+    return {name: [seconds / max(cnt, 1) for seconds, cnt in zip(list_time, list_cnt)]
+            for name, list_time in dict_time.items()}
+
+
+def main() -> None:
+    print(f'{"[us/call]":<12}' + ''.join(f'{f"{cnt} JKR":>10}' for cnt in range(CNT_JOKER_MAX + 1)))
+    for name, list_seconds in measure(seed=1).items():
+        print(f'{name:<12}' + ''.join(f'{1e6 * seconds:>10.1f}' for seconds in list_seconds))
+
+
+if __name__ == "__main__":
+    main()
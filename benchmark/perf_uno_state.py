@@ -0,0 +1,70 @@
+"""Memory and copy time of UNO game states
+
+Compares the current GameState, which keeps the deck definition (LIST_CARD, LIST_COLOR, LIST_SYMBOL)
+as class constants, with the former layout where every state carried its own copy of the deck:
+
+    python benchmark/perf_uno_state.py
+"""
+
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, List, Optional
+
+from pydantic import BaseModel
+
+sys.path += '../'
+
+from server.py.uno import Uno, Card, PlayerState, GamePhase, GameState  # pylint: disable=wrong-import-position
+
+CNT_STATES = 1000
+CNT_COPIES = 200
+
+
+class LegacyGameState(BaseModel):
+    """ GameState with the deck definition as regular fields """
+    CNT_HAND_CARDS: int = 7
+    LIST_COLOR: List[str] = list(GameState.LIST_COLOR)
+    LIST_SYMBOL: List[str] = list(GameState.LIST_SYMBOL)
+    LIST_CARD: List[Card] = [card.model_copy() for card in GameState.LIST_CARD]
+
+    list_card_draw: List[Card] = []
+    list_card_discard: List[Card] = []
+    list_player: List[PlayerState] = []
+    phase: GamePhase = GamePhase.SETUP
+    cnt_player: int = 2
+    idx_player_active: Optional[int] = None
+    direction: int = 1
+    color: Optional[str] = None
+    cnt_to_draw: int = 0
+    has_drawn: bool = False
+
+
+def measure_memory(create: Callable[[], BaseModel]) -> float:
+    """ Average number of bytes allocated per state """
+    tracemalloc.start()
+    list_state = [create() for _ in range(CNT_STATES)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del list_state
+    return size / CNT_STATES
+
+
+def measure_copy(state: BaseModel) -> float:
+    """ Average time of a deep copy in microseconds """
+    return 1e6 * timeit.timeit(lambda: state.model_copy(deep=True), number=CNT_COPIES) / CNT_COPIES
+
+
+def main() -> None:
+    game = Uno()
+    game.set_state(GameState(cnt_player=4))
+    state = game.get_state()
+    legacy = LegacyGameState(**state.model_dump())
+
+    print(f'{"":<16}{"bytes/state":>14}{"deep copy [us]":>16}')
+    for name, create, running in (('legacy', LegacyGameState, legacy), ('class constant', GameState, state)):
+        print(f'{name:<16}{measure_memory(create):>14.0f}{measure_copy(running):>16.1f}')
+
+
+if __name__ == "__main__":
+    main()
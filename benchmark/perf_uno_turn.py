@@ -0,0 +1,86 @@
+"""Time per UNO turn with trusted and validated construction
+
+A turn is get_player_view, get_list_action and apply_action of a random action. The game builds its
+actions and player views without validation from values it created itself; for comparison,
+ValidatingUno builds every action with Action(...) and validates every view as external input:
+
+    python benchmark/perf_uno_turn.py
+"""
+
+import contextlib
+import io
+import random
+import sys
+import time
+from typing import List, Optional, Tuple
+
+sys.path += '../'
+
+from server.py.uno import (Uno, Action, GameState, GamePhase, RandomPlayer,  # pylint: disable=wrong-import-position
+                           get_card)
+
+CNT_GAMES = 300
+CNT_PLAYER = 4
+
+
+class ValidatingUno(Uno):
+    """ Uno building actions and player views with pydantic validation """
+
+    @staticmethod
+    def _add_play(actions: List[Action], kind: int, color: Optional[str], draw: Optional[int], cnt: int,
+                  with_uno: bool) -> None:
+        card = get_card(kind)
+        if with_uno:
+            actions += [Action(card=card, color=color, draw=draw, uno=True),
+                        Action(card=card, color=color, draw=draw, uno=False)] * cnt
+        else:
+            actions += [Action(card=card, color=color, draw=draw)] * cnt
+
+    def get_list_action(self) -> List[Action]:
+        actions = super().get_list_action()
+        if actions and actions[-1].card is None:
+            actions[-1] = Action(draw=actions[-1].draw)
+        return actions
+
+    def get_player_view(self, idx_player: Optional[int]) -> GameState:
+        return GameState.model_validate(super().get_player_view(idx_player).model_dump())
+
+
+def measure(game_class: type, seed: int) -> Tuple[List[float], int]:
+    """ Play the games and return the seconds spent in get_player_view, get_list_action and apply_action
+    and the number of turns """
+    random.seed(seed)
+    player = RandomPlayer()
+    list_time, cnt_turn = [0.0, 0.0, 0.0], 0
+    for _ in range(CNT_GAMES):
+        game = game_class()
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.set_state(GameState(cnt_player=CNT_PLAYER))
+        state = game.get_state()
+        while state.phase == GamePhase.RUNNING and cnt_turn < 1000 * CNT_GAMES:
+            time_0 = time.perf_counter()
+            view = game.get_player_view(state.idx_player_active)
+            time_1 = time.perf_counter()
+            actions = game.get_list_action()
+            time_2 = time.perf_counter()
+            action = player.select_action(view, actions)
+            time_3 = time.perf_counter()
+            game.apply_action(action)
+            time_4 = time.perf_counter()
+            list_time[0] += time_1 - time_0
+            list_time[1] += time_2 - time_1
+            list_time[2] += time_4 - time_3
+            cnt_turn += 1
+    return list_time, cnt_turn
+
+
+def main() -> None:
+    print(f'{"[us/turn]":<12}{"view":>10}{"actions":>10}{"apply":>10}{"turn":>10}')
+    for name, game_class in (('validated', ValidatingUno), ('trusted', Uno)):
+        list_time, cnt_turn = measure(game_class, seed=1)
+        list_us = [1e6 * seconds / cnt_turn for seconds in list_time]
+        print(f'{name:<12}' + ''.join(f'{us:>10.1f}' for us in list_us) + f'{sum(list_us):>10.1f}')
+
+
+if __name__ == "__main__":
+    main()
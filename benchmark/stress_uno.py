@@ -0,0 +1,150 @@
+"""Per-turn latency of UNO on large tables with growing hands
+
+Plays games with 8 to 10 players to completion (or MAX_TURNS turns). The players draw a card instead
+of playing with some probability and forget to call UNO now and then, so hands grow to dozens of
+cards and the small draw pile is reshuffled often. The time of get_player_view, get_list_action and
+apply_action is bucketed by the hand size of the active player; a median growing faster than the hand
+size from the smallest to the largest bucket shows super-linear behavior:
+
+    python benchmark/stress_uno.py --games 50 --players 10 --p-draw 0.7
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path += '../'
+
+from server.py.uno import Uno, Action, GameState, GamePhase, Player  # pylint: disable=wrong-import-position
+
+LIST_BUCKET = [1, 4, 8, 16, 32, 64]
+LIST_OPERATION = ['view', 'actions', 'apply']
+LIST_PERCENTILE = [50, 90, 99]
+MAX_TURNS = 20000
+
+
+class CountingUno(Uno):
+    """ Uno counting the reshuffles of the discard pile """
+
+    cnt_reshuffle = 0
+
+    def _reshuffle(self) -> None:
+        CountingUno.cnt_reshuffle += 1
+        super()._reshuffle()
+
+
+class HoardingPlayer(Player):
+    """ Draws instead of playing with probability p_draw and skips the UNO call with probability p_forget,
+    otherwise plays a random action """
+
+    def __init__(self, p_draw: float, p_forget: float) -> None:
+        self.p_draw = p_draw
+        self.p_forget = p_forget
+
+    def select_action(self, state: GameState, actions: Sequence[Action]) -> Optional[Action]:
+        if not actions:
+            return None
+        list_draw = [action for action in actions if action.card is None]
+        if list_draw and (len(list_draw) == len(actions) or random.random() < self.p_draw):
+            return list_draw[0]
+        list_play = [action for action in actions if action.card is not None]
+        if random.random() < self.p_forget:
+            list_play = [action for action in list_play if not action.uno] or list_play
+        return random.choice(list_play)
+
+
+def get_bucket(cnt_card: int) -> int:
+    """ Index of the largest bucket not above the hand size """
+    return max(idx for idx, size in enumerate(LIST_BUCKET) if size <= max(cnt_card, 1))
+
+
+def get_label(idx_bucket: int) -> str:
+    """ Range of hand sizes of the bucket """
+    size = LIST_BUCKET[idx_bucket]
+    return f'{size}+' if idx_bucket == len(LIST_BUCKET) - 1 else f'{size}-{LIST_BUCKET[idx_bucket + 1] - 1}'
+
+
+def play_turn(game: Uno, player: Player) -> Tuple[int, float, float, float]:
+    """ Play one turn, return the hand size of the active player and the seconds spent in
+    get_player_view, get_list_action and apply_action """
+    idx_player = game.state.idx_player_active
+    assert idx_player is not None
+    cnt_card = len(game.state.list_player[idx_player].list_card)
+    time_view = time.perf_counter()
+    view = game.get_player_view(idx_player)
+    time_actions = time.perf_counter()
+    actions = game.get_list_action()
+    time_select = time.perf_counter()
+    action = player.select_action(view, actions)
+    time_apply = time.perf_counter()
+    game.apply_action(action)
+    return cnt_card, time_actions - time_view, time_select - time_actions, time.perf_counter() - time_apply
+
+
+def play_game(cnt_player: int, player: Player, dict_time: Dict[int, List[List[float]]]) -> int:
+    """ Play one game and append the times of each turn to the bucket of the active hand size,
+    return the number of turns """
+    game = CountingUno()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.set_state(GameState(cnt_player=cnt_player))
+    cnt_turn = 0
+    while game.state.phase == GamePhase.RUNNING and cnt_turn < MAX_TURNS:
+        cnt_card, *list_seconds = play_turn(game, player)
+        for list_time, seconds in zip(dict_time.setdefault(get_bucket(cnt_card), [[], [], []]), list_seconds):
+            list_time.append(seconds)
+        cnt_turn += 1
+    return cnt_turn
+
+
+def print_percentiles(dict_time: Dict[int, List[List[float]]]) -> Dict[int, List[float]]:
+    """ Print the percentiles of each bucket and operation, return the medians """
+    header = ''.join(f'{f"{operation} p{percentile}":>14}'
+                     for operation in LIST_OPERATION for percentile in LIST_PERCENTILE)
+    print(f'{"hand [us]":<10}{"turns":>8}{header}')
+    dict_median: Dict[int, List[float]] = {}
+    for idx_bucket in sorted(dict_time):
+        list_time = dict_time[idx_bucket]
+        list_us = [1e6 * np.percentile(list_time[idx], LIST_PERCENTILE) for idx in range(len(LIST_OPERATION))]
+        dict_median[idx_bucket] = [float(us[0]) for us in list_us]
+        print(f'{get_label(idx_bucket):<10}{len(list_time[0]):>8}'
+              + ''.join(f'{value:>14.1f}' for us in list_us for value in us))
+    return dict_median
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=50)
+    parser.add_argument('--players', type=int, default=10)
+    parser.add_argument('--p-draw', type=float, default=0.7)
+    parser.add_argument('--p-forget', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    player = HoardingPlayer(args.p_draw, args.p_forget)
+    dict_time: Dict[int, List[List[float]]] = {}
+    list_turns = [play_game(args.players, player, dict_time) for _ in range(args.games)]
+    print(f'{args.games} games with {args.players} players, {np.mean(list_turns):.0f} turns per game '
+          f'({list_turns.count(MAX_TURNS)} stopped at {MAX_TURNS}), '
+          f'{CountingUno.cnt_reshuffle / args.games:.1f} reshuffles per game')
+
+    dict_median = print_percentiles(dict_time)
+    idx_small, idx_large = min(dict_median), max(dict_median)
+    if idx_small == idx_large:
+        return
+    ratio_size = LIST_BUCKET[idx_large] / LIST_BUCKET[idx_small]
+    print(f'median growth from hands of {get_label(idx_small)} to {get_label(idx_large)} cards '
+          f'(x{ratio_size:.0f} cards, above that is super-linear):')
+    for operation, median_small, median_large in zip(LIST_OPERATION, dict_median[idx_small],
+                                                     dict_median[idx_large]):
+        print(f'  {operation:<8} x{median_large / median_small:.1f}')
+
+if __name__ == "__main__":
+    main()
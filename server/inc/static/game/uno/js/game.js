@@ -146,6 +146,42 @@ Game.prototype.set_state = function(state) {
 	this.render();
 }
 
+// apply a 'delta' message of the server (see uno.get_view_delta) to the last state
+function apply_state_delta(state, delta) {
+	function get_masked_cards(cnt) {
+		var list_card = [];
+		for(var i=0; i<cnt; i++) {
+			list_card.push({'color': null, 'number': null, 'symbol': null});
+		}
+		return list_card;
+	}
+	var list_field = ['phase', 'idx_player_active', 'direction', 'color', 'cnt_to_draw', 'has_drawn'];
+	for(var i=0; i<list_field.length; i++) {
+		if(list_field[i] in delta) {
+			state[list_field[i]] = delta[list_field[i]];
+		}
+	}
+	if('cnt_card_draw' in delta) {
+		state.list_card_draw = get_masked_cards(delta.cnt_card_draw);
+	}
+	if('list_card_discard' in delta) {
+		state.list_card_discard = delta.list_card_discard;
+	}
+	if('list_card_discard_add' in delta) {
+		state.list_card_discard = state.list_card_discard.concat(delta.list_card_discard_add);
+	}
+	if('list_hand' in delta) {
+		for(var p=0; p<delta.list_hand.length; p++) {
+			var hand = delta.list_hand[p];
+			if(hand===null) continue;
+			state.list_player[p].list_card = typeof hand === 'number' ? get_masked_cards(hand) : hand;
+		}
+	}
+	state.list_action = delta.list_action;
+	state.selected_action = delta.selected_action;
+	return state;
+}
+
 Game.prototype.get_id_from_card = function(card) {
 	var id = card.color + '_' + card.number;
 	if(card.color=='any') {
@@ -2,6 +2,7 @@ function Simulation(config) {
     this.config = config
     this.game = new Game(config.game_config);
     this.ws = null;
+    this.state = null;
     this.main();
 };
 Simulation.prototype.main = function(){
@@ -25,8 +26,15 @@ Simulation.prototype.ws_onmessage = function(event) {
     switch(data['type']) {
         case 'update':
     		this.add_log(data['state']);
-    		this.game.set_state(data['state']);
-    		this.apply_action(data['state']['selected_action']);
+    		this.state = data['state'];
+    		this.game.set_state(this.state);
+    		this.apply_action(this.state['selected_action']);
+            break;
+        case 'delta':
+    		this.add_log(data['delta']);
+    		this.state = apply_state_delta(this.state, data['delta']);
+    		this.game.set_state(this.state);
+    		this.apply_action(this.state['selected_action']);
             break;
     }
 };
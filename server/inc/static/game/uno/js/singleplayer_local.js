@@ -3,6 +3,7 @@ function Singleplayer(config) {
     this.game = new Game(config.game_config);
     this.game.send_action_callback = this.send_action.bind(this);
     this.ws = null;
+    this.state = null;
     this.main();
 };
 Singleplayer.prototype.main = function(){
@@ -25,13 +26,18 @@ Singleplayer.prototype.ws_onmessage = function(event) {
     this.add_log('> '+data.type);
     switch(data['type']) {
         case 'update':
-    		this.game.set_state(data['state']);
+    		this.state = data['state'];
+    		this.game.set_state(this.state);
     		//console.log(data['state']);
     		/*if(data['state']['idx_player_active']==data['state']['idx_player_you'] && data['state']['list_action'].length==0) {
     			this.send_action(null);
     		}*/
     		//this.apply_action(data['state']['selected_action']);
             break;
+        case 'delta':
+    		this.state = apply_state_delta(this.state, data['delta']);
+    		this.game.set_state(this.state);
+            break;
     }
 };
 Singleplayer.prototype.add_log = function(msg) {
@@ -1,18 +1,45 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, overload
 from enum import Enum
+from functools import lru_cache
+from itertools import accumulate
 import random
 from server.py.game import Game, Player
 
+DEFAULT_FLEET: List[Tuple[str, int]] = [
+    ("carrier", 5),
+    ("battleship", 4),
+    ("cruiser", 3),
+    ("submarine", 3),
+    ("destroyer", 2)
+]
+
 class ActionType(str, Enum):
     SET_SHIP = 'set_ship'
     SHOOT = 'shoot'
 
 class BattleshipAction:
+    __slots__ = ('action_type', 'ship_name', 'location')
+
     def __init__(self, action_type: ActionType, ship_name: Optional[str], location: List[str]) -> None:
         self.action_type: ActionType = action_type
         self.ship_name: Optional[str] = ship_name  # only for set_ship actions
         self.location: List[str] = location
 
+    def to_dict(self) -> Dict[str, Any]:
+        """ JSON ready dict of the action, e.g. to send it to the client """
+        return {'action_type': self.action_type.value, 'ship_name': self.ship_name, 'location': list(self.location)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BattleshipAction':
+        """ Action from a dict as created by to_dict, e.g. received from the client """
+        try:
+            action_type = ActionType(data['action_type'])
+            location = [str(cell) for cell in data['location']]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid battleship action: {data!r}") from e
+        ship_name = data.get('ship_name')
+        return cls(action_type, None if ship_name is None else str(ship_name), location)
+
 class Ship:
     def __init__(self, name: str, length: int, location: Optional[List[str]] = None) -> None:
         self.name: str = name
@@ -31,31 +58,407 @@ class GamePhase(str, Enum):
     RUNNING = 'running'        # while the game is running (shooting)
     FINISHED = 'finished'      # when the game is finished
 
+class PlacementStrategy(str, Enum):
+    UNIFORM = 'uniform'              # uniform over all non-overlapping fleets
+    EDGE_AVOIDING = 'edge_avoiding'  # prefer placements away from the border
+    ANTI_DENSITY = 'anti_density'    # prefer cells that few placements cover (where hunters look last)
+
 class BattleshipGameState:
-    def __init__(self, idx_player_active: int, phase: GamePhase, winner: Optional[int], players: List[PlayerState]) -> None:
+    def __init__(self, idx_player_active: int, phase: GamePhase, winner: Optional[int], players: List[PlayerState],
+                 cnt_cols: int = 10, cnt_rows: int = 10) -> None:
         self.idx_player_active: int = idx_player_active
         self.phase: GamePhase = phase
         self.winner: Optional[int] = winner
         self.players: List[PlayerState] = players
+        self.cnt_cols: int = cnt_cols  # board width, columns are named A..Z, AA..AZ, ...
+        self.cnt_rows: int = cnt_rows  # board height, rows are numbered from 1
+
+def get_column_name(idx_col: int) -> str:
+    """ Column name in spreadsheet style (0 -> 'A', 25 -> 'Z', 26 -> 'AA', ...) """
+    name = ''
+    idx_col += 1
+    while idx_col > 0:
+        idx_col, rest = divmod(idx_col - 1, 26)
+        name = chr(65 + rest) + name
+    return name
+
+class BoardGeometry:
+    """ Coordinate and ship placement tables for one board size, shared by all games of that size
+
+    Cells are indexed column by column (idx_cell = x * cnt_rows + y), so iterating over the
+    indices yields A1, A2, ..., B1, ... in the same order as the original nested loops.
+    """
+
+    def __init__(self, cnt_cols: int, cnt_rows: int) -> None:
+        self.cnt_cols: int = cnt_cols
+        self.cnt_rows: int = cnt_rows
+        self.cnt_cells: int = cnt_cols * cnt_rows
+        self.list_cell: List[str] = [f"{get_column_name(x)}{y+1}" for x in range(cnt_cols) for y in range(cnt_rows)]
+        self.dict_cell: Dict[str, int] = {cell: idx for idx, cell in enumerate(self.list_cell)}
+        self._dict_placement: Dict[int, List[Tuple[int, bool, List[str]]]] = {}
+        self._dict_cum_weight: Dict[Tuple[PlacementStrategy, int, Tuple[int, ...]], List[float]] = {}
+
+    def get_placements(self, length: int) -> List[Tuple[int, bool, List[str]]]:
+        """ All in-bounds placements (idx_cell_start, is_horizontal, location) of a ship length """
+        list_placement = self._dict_placement.get(length)
+        if list_placement is None:
+            list_placement = []
+            for x in range(self.cnt_cols):
+                for y in range(self.cnt_rows):
+                    idx_start = x * self.cnt_rows + y
+                    if x + length <= self.cnt_cols:
+                        location = [self.list_cell[idx_start + i * self.cnt_rows] for i in range(length)]
+                        list_placement.append((idx_start, True, location))
+                    if y + length <= self.cnt_rows:
+                        list_placement.append((idx_start, False, self.list_cell[idx_start:idx_start + length]))
+            self._dict_placement[length] = list_placement
+        return list_placement
+
+    def get_cells(self, idx_start: int, is_horizontal: bool, length: int) -> range:
+        """ Cell indices covered by a placement """
+        step = self.cnt_rows if is_horizontal else 1
+        return range(idx_start, idx_start + step * length, step)
+
+    def get_cum_weights(self, length: int, strategy: PlacementStrategy, fleet_lengths: Tuple[int, ...]) -> List[float]:
+        """ Cumulative sampling weights of the placements of a ship length (cached per strategy and fleet) """
+        key = (strategy, length, fleet_lengths if strategy == PlacementStrategy.ANTI_DENSITY else ())
+        list_cum_weight = self._dict_cum_weight.get(key)
+        if list_cum_weight is None:
+            list_placement = self.get_placements(length)
+            if strategy == PlacementStrategy.EDGE_AVOIDING:
+                list_weight = [0.25 ** sum(1 for idx in self.get_cells(idx_start, is_horizontal, length)
+                                           if self._is_edge(idx))
+                               for idx_start, is_horizontal, _ in list_placement]
+            elif strategy == PlacementStrategy.ANTI_DENSITY:
+                density = self._get_density(fleet_lengths)
+                list_weight = [(length / sum(density[idx] for idx in self.get_cells(idx_start, is_horizontal, length)))
+                               ** 2 for idx_start, is_horizontal, _ in list_placement]
+            else:
+                list_weight = [1.0] * len(list_placement)
+            list_cum_weight = list(accumulate(list_weight))
+            self._dict_cum_weight[key] = list_cum_weight
+        return list_cum_weight
+
+    def _is_edge(self, idx: int) -> bool:
+        x, y = divmod(idx, self.cnt_rows)
+        return x in (0, self.cnt_cols - 1) or y in (0, self.cnt_rows - 1)
+
+    def _get_density(self, fleet_lengths: Tuple[int, ...]) -> List[int]:
+        """ Number of placements of all ships of the fleet covering each cell """
+        density = [0] * self.cnt_cells
+        for length in set(fleet_lengths):
+            cnt_ships = fleet_lengths.count(length)
+            for idx_start, is_horizontal, _ in self.get_placements(length):
+                for idx in self.get_cells(idx_start, is_horizontal, length):
+                    density[idx] += cnt_ships
+        return density
+
+    def get_free_runs(self, occupied: bytearray) -> Tuple[List[int], List[int]]:
+        """ Number of free cells starting at each cell, going right and going down (one pass over the board) """
+        run_horizontal = [0] * self.cnt_cells
+        run_vertical = [0] * self.cnt_cells
+        for idx in range(self.cnt_cells - 1, -1, -1):
+            if occupied[idx]:
+                continue
+            idx_right = idx + self.cnt_rows
+            run_horizontal[idx] = 1 + (run_horizontal[idx_right] if idx_right < self.cnt_cells else 0)
+            run_vertical[idx] = 1 + (run_vertical[idx + 1] if (idx + 1) % self.cnt_rows else 0)
+        return run_horizontal, run_vertical
+
+@lru_cache(maxsize=16)
+def get_board_geometry(cnt_cols: int, cnt_rows: int) -> BoardGeometry:
+    """ Get the (cached) geometry tables for a board size """
+    if cnt_cols < 1 or cnt_rows < 1:
+        raise ValueError(f"Invalid board size {cnt_cols}x{cnt_rows}")
+    return BoardGeometry(cnt_cols, cnt_rows)
+
+class _PlayerBoard:
+    """ Occupancy index of one player, updated incrementally by the game instead of scanning the lists """
+
+    def __init__(self, geometry: BoardGeometry, player: PlayerState) -> None:
+        self.player: PlayerState = player
+        self.ship_cells: bytearray = bytearray(geometry.cnt_cells)  # cells covered by own ships
+        self.shot_cells: bytearray = bytearray(geometry.cnt_cells)  # cells already shot at the opponent
+        self.cnt_ship_cells: int = 0
+        self.cnt_ships_placed: int = 0
+        self.cnt_shots: int = len(player.shots)
+        self.cnt_hits: int = 0  # distinct opponent ship cells hit
+        for ship in player.ships:
+            if ship.location is not None:
+                self.add_ship(geometry, ship.location)
+        for cell in player.shots:
+            idx = geometry.dict_cell.get(cell)
+            if idx is not None:
+                self.shot_cells[idx] = 1
+        # cells not shot yet, densely packed for O(1) sampling, and the position of each cell in that list
+        self.list_unshot: List[int] = [idx for idx, shot in enumerate(self.shot_cells) if not shot]
+        self.pos_unshot: List[int] = [-1] * geometry.cnt_cells
+        for pos, idx in enumerate(self.list_unshot):
+            self.pos_unshot[idx] = pos
+
+    def add_ship(self, geometry: BoardGeometry, location: List[str]) -> None:
+        self.cnt_ships_placed += 1
+        for cell in location:
+            idx = geometry.dict_cell.get(cell)
+            if idx is not None and not self.ship_cells[idx]:
+                self.ship_cells[idx] = 1
+                self.cnt_ship_cells += 1
+
+    def add_shot(self, idx: int) -> None:
+        """ Mark a cell as shot, moving the last unshot cell into its slot """
+        self.shot_cells[idx] = 1
+        pos = self.pos_unshot[idx]
+        idx_last = self.list_unshot.pop()
+        if idx_last != idx:
+            self.list_unshot[pos] = idx_last
+            self.pos_unshot[idx_last] = pos
+        self.pos_unshot[idx] = -1
+
+    def is_stale(self, player: PlayerState) -> bool:
+        """ True if the player state was changed without going through the game """
+        return (self.player is not player or self.cnt_shots != len(player.shots)
+                or self.cnt_ships_placed != sum(1 for ship in player.ships if ship.location is not None))
+
+class ShotActionList(Sequence[BattleshipAction]):
+    """ Lazy list of the shoot actions of one player, backed by the unshot cells of the board
+
+    Length, indexing and random sampling (random.choice, random.sample) cost O(1) per action,
+    actions are only created when they are accessed. Like iterating over a dict while changing
+    it, using the list after the next shot of the player raises a RuntimeError.
+    """
+
+    def __init__(self, geometry: BoardGeometry, board: _PlayerBoard) -> None:
+        self._list_cell = geometry.list_cell
+        self._board = board
+        self._cnt_shots = board.cnt_shots
+
+    def _get_list_unshot(self) -> List[int]:
+        if self._board.cnt_shots != self._cnt_shots:
+            raise RuntimeError("List of actions is outdated, call 'get_list_action' again")
+        return self._board.list_unshot
+
+    def __len__(self) -> int:
+        return len(self._get_list_unshot())
+
+    @overload
+    def __getitem__(self, index: int) -> BattleshipAction: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[BattleshipAction]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BattleshipAction, List[BattleshipAction]]:
+        list_unshot = self._get_list_unshot()
+        if isinstance(index, slice):
+            return [BattleshipAction(ActionType.SHOOT, None, [self._list_cell[idx]]) for idx in list_unshot[index]]
+        return BattleshipAction(ActionType.SHOOT, None, [self._list_cell[list_unshot[index]]])
+
+class PlacementActionList(Sequence[BattleshipAction]):
+    """ Lazy list of the set ship actions of one player, computed on first access
+
+    Players that plan their fleet themselves (see PlacementPlayer) never touch the list, so the
+    setup phase does not pay for generating every possible placement. Using the list after the
+    player placed another ship raises a RuntimeError.
+    """
+
+    def __init__(self, geometry: BoardGeometry, board: _PlayerBoard, ships: List[Ship]) -> None:
+        self._geometry = geometry
+        self._board = board
+        self._ships = ships
+        self._cnt_ships_placed = board.cnt_ships_placed
+        self._actions: Optional[List[BattleshipAction]] = None
+
+    def _get_actions(self) -> List[BattleshipAction]:
+        if self._board.cnt_ships_placed != self._cnt_ships_placed:
+            raise RuntimeError("List of actions is outdated, call 'get_list_action' again")
+        if self._actions is None:
+            self._actions = []
+            run_horizontal, run_vertical = self._geometry.get_free_runs(self._board.ship_cells)
+            dict_location: Dict[int, List[List[str]]] = {}  # free placements per ship length
+            for ship in self._ships:
+                if ship.location is None:
+                    list_location = dict_location.get(ship.length)
+                    if list_location is None:
+                        list_location = [
+                            location
+                            for idx_start, is_horizontal, location in self._geometry.get_placements(ship.length)
+                            if (run_horizontal if is_horizontal else run_vertical)[idx_start] >= ship.length
+                        ]
+                        dict_location[ship.length] = list_location
+                    for location in list_location:
+                        self._actions.append(BattleshipAction(ActionType.SET_SHIP, ship.name, location))
+        return self._actions
+
+    def __len__(self) -> int:
+        return len(self._get_actions())
+
+    @overload
+    def __getitem__(self, index: int) -> BattleshipAction: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[BattleshipAction]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BattleshipAction, List[BattleshipAction]]:
+        return self._get_actions()[index]
+
+class ReadOnlyShip:
+    """ Read-only view of a ship, the location is returned as a tuple """
+    __slots__ = ('_ship',)
+
+    def __init__(self, ship: Ship) -> None:
+        self._ship = ship
+
+    @property
+    def name(self) -> str:
+        return self._ship.name
+
+    @property
+    def length(self) -> int:
+        return self._ship.length
+
+    @property
+    def location(self) -> Optional[Tuple[str, ...]]:
+        location = self._ship.location
+        return None if location is None else tuple(location)
+
+class MaskedShip(ReadOnlyShip):
+    """ Read-only view of an opponent ship, the location is hidden """
+    __slots__ = ()
+
+    @property
+    def location(self) -> Optional[Tuple[str, ...]]:
+        return None
+
+class ReadOnlyPlayerState:
+    """ Read-only view of a player, shots are returned as tuples and ships as ReadOnlyShip """
+    __slots__ = ('_player', '_ships_source', '_ships')
+
+    def __init__(self, player: PlayerState) -> None:
+        self._player = player
+        self._ships_source: Optional[List[Ship]] = None
+        self._ships: Tuple[ReadOnlyShip, ...] = ()
+
+    def _get_ship(self, ship: Ship) -> ReadOnlyShip:
+        return ReadOnlyShip(ship)
+
+    @property
+    def name(self) -> str:
+        return self._player.name
+
+    @property
+    def ships(self) -> Tuple[ReadOnlyShip, ...]:
+        ships = self._player.ships
+        if ships is not self._ships_source or len(ships) != len(self._ships):
+            self._ships_source = ships
+            self._ships = tuple(self._get_ship(ship) for ship in ships)
+        return self._ships
+
+    @property
+    def shots(self) -> Tuple[str, ...]:
+        return tuple(self._player.shots)
+
+    @property
+    def successful_shots(self) -> Tuple[str, ...]:
+        return tuple(self._player.successful_shots)
+
+class MaskedPlayerState(ReadOnlyPlayerState):
+    """ Read-only view of an opponent, the ship locations are hidden """
+    __slots__ = ()
+
+    def _get_ship(self, ship: Ship) -> ReadOnlyShip:
+        return MaskedShip(ship)
+
+class BattleshipPlayerView:
+    """ Live, read-only view of the game state as seen by one player
+
+    Unlike a snapshot, the view follows the game: attributes are read from the current game
+    state on access, so a view kept across turns shows the latest state. The players are
+    wrapped in ReadOnlyPlayerState (the opponent's ship locations masked by MaskedPlayerState),
+    shots and locations are returned as tuples, so the view cannot change the game. The game
+    hands out one view object per player, so building a view costs O(1) regardless of the
+    board size; reading the shots copies them.
+    """
+    __slots__ = ('_game', '_idx_player', '_players_source', '_players')
+
+    def __init__(self, game: 'Battleship', idx_player: int) -> None:
+        self._game = game
+        self._idx_player = idx_player
+        self._players_source: Tuple[PlayerState, ...] = ()
+        self._players: Tuple[ReadOnlyPlayerState, ...] = ()
+
+    @property
+    def idx_player_active(self) -> int:
+        return self._game.state.idx_player_active
+
+    @property
+    def phase(self) -> GamePhase:
+        return self._game.state.phase
+
+    @property
+    def winner(self) -> Optional[int]:
+        return self._game.state.winner
+
+    @property
+    def cnt_cols(self) -> int:
+        return self._game.state.cnt_cols
+
+    @property
+    def cnt_rows(self) -> int:
+        return self._game.state.cnt_rows
+
+    @property
+    def players(self) -> Tuple[ReadOnlyPlayerState, ...]:
+        players = self._game.state.players
+        if (len(players) != len(self._players_source)
+                or any(source is not player for source, player in zip(self._players_source, players))):
+            self._players_source = tuple(players)
+            self._players = tuple(ReadOnlyPlayerState(player) if i == self._idx_player else MaskedPlayerState(player)
+                                  for i, player in enumerate(players))
+        return self._players
+
+    def model_dump(self) -> Dict[str, Any]:
+        """ Copy of the view as a JSON ready dict (like the pydantic states of the other games) """
+        return {
+            'idx_player_active': self.idx_player_active, 'phase': self.phase.value, 'winner': self.winner,
+            'cnt_cols': self.cnt_cols, 'cnt_rows': self.cnt_rows,
+            'players': [{'name': player.name,
+                         'ships': [{'name': ship.name, 'length': ship.length,
+                                    'location': None if ship.location is None else list(ship.location)}
+                                   for ship in player.ships],
+                         'shots': list(player.shots), 'successful_shots': list(player.successful_shots)}
+                        for player in self.players]}
 
 class Battleship(Game):
-    def __init__(self):
-        """ Game initialization (set_state call not necessary) """
+    def __init__(self, cnt_cols: int = 10, cnt_rows: int = 10, fleet: Optional[List[Tuple[str, int]]] = None) -> None:
+        """ Game initialization (set_state call not necessary)
+
+        The board size and the fleet (list of ship name and length) can be configured, e.g. for
+        stress tests on a 100x100 board. Ship names must be unique within the fleet.
+        """
+        fleet = DEFAULT_FLEET if fleet is None else fleet
+        geometry = get_board_geometry(cnt_cols, cnt_rows)
+        names = [name for name, _ in fleet]
+        if len(set(names)) != len(names):
+            raise ValueError("Ship names in the fleet must be unique")
+        for name, length in fleet:
+            if length < 1 or length > max(cnt_cols, cnt_rows):
+                raise ValueError(f"Ship '{name}' with length {length} does not fit on a {cnt_cols}x{cnt_rows} board")
+        if sum(length for _, length in fleet) > geometry.cnt_cells:
+            raise ValueError(f"Fleet does not fit on a {cnt_cols}x{cnt_rows} board")
+        self.fleet: List[Tuple[str, int]] = list(fleet)
+        self.cnt_cols: int = cnt_cols
+        self.cnt_rows: int = cnt_rows
+        self.state: BattleshipGameState
+        self._geometry: BoardGeometry = geometry
+        self._boards: List[_PlayerBoard] = []
+        self._views: Dict[int, BattleshipPlayerView] = {}
         self.reset()
 
     def reset(self) -> None:
-        ships = [
-            Ship("carrier", 5),
-            Ship("battleship", 4),
-            Ship("cruiser", 3),
-            Ship("submarine", 3),
-            Ship("destroyer", 2)
-        ]
         players = [
-            PlayerState("Player 1", [Ship(s.name, s.length) for s in ships], [], []),
-            PlayerState("Player 2", [Ship(s.name, s.length) for s in ships], [], [])
+            PlayerState("Player 1", [Ship(name, length) for name, length in self.fleet], [], []),
+            PlayerState("Player 2", [Ship(name, length) for name, length in self.fleet], [], [])
         ]
-        self.state = BattleshipGameState(0, GamePhase.SETUP, None, players)
+        self.set_state(BattleshipGameState(0, GamePhase.SETUP, None, players, self.cnt_cols, self.cnt_rows))
 
     def print_state(self) -> None:
         """ Print the current game state """
@@ -75,36 +478,32 @@ class Battleship(Game):
     def set_state(self, state: BattleshipGameState) -> None:
         """ Set the game to a given state """
         self.state = state
+        self._geometry = get_board_geometry(state.cnt_cols, state.cnt_rows)
+        self._rebuild_boards()
+
+    def _rebuild_boards(self) -> None:
+        """ Recreate the occupancy index of both players from the state """
+        self._boards = [_PlayerBoard(self._geometry, player) for player in self.state.players]
+        if len(self._boards) == 2:
+            for board, opponent in ((self._boards[0], self._boards[1]), (self._boards[1], self._boards[0])):
+                board.cnt_hits = sum(1 for idx, shot in enumerate(board.shot_cells)
+                                     if shot and opponent.ship_cells[idx])
 
-    def get_list_action(self) -> List[BattleshipAction]:
-        """ Get a list of possible actions for the active player """
-        actions = []
+    def _get_boards(self) -> List[_PlayerBoard]:
+        """ Occupancy index of both players, rebuilt if the state was modified from outside """
+        if (len(self._boards) != len(self.state.players)
+                or any(board.is_stale(player) for board, player in zip(self._boards, self.state.players))):
+            self._rebuild_boards()
+        return self._boards
+
+    def get_list_action(self) -> Sequence[BattleshipAction]:
+        """ Get a list of possible actions for the active player (lazy, see PlacementActionList/ShotActionList) """
         if self.state.phase == GamePhase.SETUP:
             player = self.state.players[self.state.idx_player_active]
-            occupied_cells = set(cell for ship in player.ships if ship.location for cell in ship.location)
-            for ship in player.ships:
-                if ship.location is None:
-                    for x in range(10):
-                        for y in range(10):
-                            # Horizontal placement
-                            if x + ship.length <= 10:
-                                location = [f"{chr(65+x+i)}{y+1}" for i in range(ship.length)]
-                                if not set(location) & occupied_cells:
-                                    actions.append(BattleshipAction(ActionType.SET_SHIP, ship.name, location))
-                            # Vertical placement
-                            if y + ship.length <= 10:
-                                location = [f"{chr(65+x)}{y+1+i}" for i in range(ship.length)]
-                                if not set(location) & occupied_cells:
-                                    actions.append(BattleshipAction(ActionType.SET_SHIP, ship.name, location))
-        elif self.state.phase == GamePhase.RUNNING:
-            player = self.state.players[self.state.idx_player_active]
-            occupied_locations = set(player.shots)
-            for x in range(10):
-                for y in range(10):
-                    location = f"{chr(65+x)}{y+1}"
-                    if location not in occupied_locations:
-                        actions.append(BattleshipAction(ActionType.SHOOT, None, [location]))
-        return actions
+            return PlacementActionList(self._geometry, self._get_boards()[self.state.idx_player_active], player.ships)
+        if self.state.phase == GamePhase.RUNNING:
+            return ShotActionList(self._geometry, self._get_boards()[self.state.idx_player_active])
+        return []
 
     def apply_action(self, action: BattleshipAction) -> None:
         """ Apply the given action to the game """
@@ -114,11 +513,14 @@ class Battleship(Game):
         if self.state.phase != GamePhase.SETUP and action.action_type == ActionType.SET_SHIP:
             self.state.phase = GamePhase.SETUP
 
+        boards = self._get_boards()
         player = self.state.players[self.state.idx_player_active]
+        board = boards[self.state.idx_player_active]
         if action.action_type == ActionType.SET_SHIP:
             for ship in player.ships:
                 if ship.name == action.ship_name and ship.location is None:
-                    ship.location = action.location
+                    ship.location = list(action.location)
+                    board.add_ship(self._geometry, ship.location)
                     break
             # Check if the current player has placed all ships
             if all(ship.location is not None for ship in player.ships):
@@ -135,43 +537,41 @@ class Battleship(Game):
         elif action.action_type == ActionType.SHOOT:
             if self.state.phase != GamePhase.RUNNING:
                 return  # Cannot shoot before game has started
-            opponent = self.state.players[1 - self.state.idx_player_active]
-            if action.location[0] in player.shots:
+            opponent = boards[1 - self.state.idx_player_active]
+            cell = action.location[0]
+            idx = self._geometry.dict_cell.get(cell)
+            if idx is None:
+                if cell in player.shots:
+                    return  # Already shot at this location
+            elif board.shot_cells[idx]:
                 return  # Already shot at this location
-            player.shots.append(action.location[0])
-            if any(action.location[0] in ship.location for ship in opponent.ships if ship.location):
-                player.successful_shots.append(action.location[0])
-                if all(all(loc in player.successful_shots for loc in ship.location) for ship in opponent.ships if ship.location):
+            else:
+                board.add_shot(idx)
+            player.shots.append(cell)
+            board.cnt_shots += 1
+            if idx is not None and opponent.ship_cells[idx]:
+                player.successful_shots.append(cell)
+                board.cnt_hits += 1
+                if board.cnt_hits == opponent.cnt_ship_cells:
                     self.state.winner = self.state.idx_player_active
                     self.state.phase = GamePhase.FINISHED
             # Switch to the next player
             self.state.idx_player_active = 1 - self.state.idx_player_active
 
-    def get_player_view(self, idx_player: int) -> BattleshipGameState:
+    def get_player_view(self, idx_player: int) -> BattleshipPlayerView:
         """ Get the masked state for the active player (e.g. the oppontent's cards are face down)"""
-        masked_players = []
-        for i, player in enumerate(self.state.players):
-            if i == idx_player:
-                masked_players.append(player)
-            else:
-                masked_ships = [Ship(ship.name, ship.length) for ship in player.ships]
-                masked_player = PlayerState(
-                    name=player.name,
-                    ships=masked_ships,
-                    shots=player.shots,
-                    successful_shots=player.successful_shots
-                )
-                masked_players.append(masked_player)
-        return BattleshipGameState(
-            idx_player_active=self.state.idx_player_active,
-            phase=self.state.phase,
-            winner=self.state.winner,
-            players=masked_players
-        )
+        view = self._views.get(idx_player)
+        if view is None:
+            view = BattleshipPlayerView(self, idx_player)
+            self._views[idx_player] = view
+        return view
 
 class RandomPlayer(Player):
-    def select_action(self, state: BattleshipGameState, actions: List[BattleshipAction]) -> Optional[BattleshipAction]:
+    def select_action(self, state: Union[BattleshipGameState, BattleshipPlayerView],
+                      actions: Sequence[BattleshipAction]) -> Optional[BattleshipAction]:
         """ Given masked game state and possible actions, select the next action """
+        if state.phase == GamePhase.RUNNING:
+            return random.choice(actions) if actions else None  # only shots, no need to look for SET_SHIP
         if actions:
             # Prioritize SET_SHIP actions
             set_ship_actions = [action for action in actions if action.action_type == ActionType.SET_SHIP]
@@ -180,6 +580,85 @@ class RandomPlayer(Player):
             return random.choice(actions)
         return None
 
+class PlacementPlayer(Player):
+    """ Player that places its whole fleet at once following a placement strategy, then shoots randomly
+
+    The fleet is sampled from the precomputed placement tables of the board on the first set ship
+    turn and the planned ships are returned one by one, so the list of possible actions is never
+    generated during the setup phase.
+    """
+
+    MAX_ATTEMPTS = 1000
+
+    def __init__(self, strategy: PlacementStrategy = PlacementStrategy.UNIFORM) -> None:
+        self.strategy: PlacementStrategy = strategy
+        self._plan: Dict[str, List[str]] = {}
+        self._plan_owner: Optional[Union[PlayerState, ReadOnlyPlayerState]] = None
+
+    def select_action(self, state: Union[BattleshipGameState, BattleshipPlayerView],
+                      actions: Sequence[BattleshipAction]) -> Optional[BattleshipAction]:
+        """ Given masked game state and possible actions, select the next action """
+        if state.phase == GamePhase.SETUP:
+            player = state.players[state.idx_player_active]
+            list_ship = [ship for ship in player.ships if ship.location is None]
+            if not list_ship:
+                return None
+            if self._plan_owner is not player or any(ship.name not in self._plan for ship in list_ship):
+                geometry = get_board_geometry(state.cnt_cols, state.cnt_rows)
+                self._plan = self.plan_fleet(geometry, player.ships) or {}
+                self._plan_owner = player
+            location = self._plan.pop(list_ship[0].name, None)
+            if location is None:
+                return None  # the remaining ships do not fit on the board
+            return BattleshipAction(ActionType.SET_SHIP, list_ship[0].name, location)
+        if state.phase == GamePhase.RUNNING and actions:
+            return random.choice(actions)
+        return None
+
+    def plan_fleet(self, geometry: BoardGeometry,
+                   ships: Sequence[Union[Ship, ReadOnlyShip]]) -> Optional[Dict[str, List[str]]]:
+        """ Sample locations for all ships not placed yet, None if no valid fleet was found """
+        occupied = bytearray(geometry.cnt_cells)
+        for ship in ships:
+            for cell in ship.location or []:
+                idx = geometry.dict_cell.get(cell)
+                if idx is not None:
+                    occupied[idx] = 1
+        list_ship = sorted((ship for ship in ships if ship.location is None), key=lambda ship: -ship.length)
+        fleet_lengths = tuple(sorted(ship.length for ship in ships))
+        # uniform: draw every ship once and reject the whole fleet on an overlap, which makes the
+        # accepted fleets uniformly distributed; otherwise (or if the board is too crowded for
+        # that) retry single ships before giving up on an attempt
+        if self.strategy == PlacementStrategy.UNIFORM:
+            for _ in range(self.MAX_ATTEMPTS):
+                plan = self._sample_fleet(geometry, list_ship, fleet_lengths, bytearray(occupied), 1)
+                if plan is not None:
+                    return plan
+        for _ in range(10):
+            plan = self._sample_fleet(geometry, list_ship, fleet_lengths, bytearray(occupied), 100)
+            if plan is not None:
+                return plan
+        return None
+
+    def _sample_fleet(self, geometry: BoardGeometry, list_ship: List[Union[Ship, ReadOnlyShip]],
+                      fleet_lengths: Tuple[int, ...], occupied: bytearray, cnt_tries: int) -> Optional[Dict[str, List[str]]]:
+        """ One sampling attempt, placing the ships in the given order with cnt_tries draws per ship """
+        plan: Dict[str, List[str]] = {}
+        for ship in list_ship:
+            list_placement = geometry.get_placements(ship.length)
+            list_cum_weight = geometry.get_cum_weights(ship.length, self.strategy, fleet_lengths)
+            for _ in range(cnt_tries):
+                idx_start, is_horizontal, location = random.choices(list_placement, cum_weights=list_cum_weight)[0]
+                cells = geometry.get_cells(idx_start, is_horizontal, ship.length)
+                if not any(occupied[idx] for idx in cells):
+                    for idx in cells:
+                        occupied[idx] = 1
+                    plan[ship.name] = location
+                    break
+            else:
+                return None
+        return plan
+
 if __name__ == "__main__":
     game = Battleship()
     player1 = RandomPlayer()
@@ -192,4 +671,4 @@ if __name__ == "__main__":
         if action:
             game.apply_action(action)
     print("Final game state:")
-    game.print_state()
\ No newline at end of file
+    game.print_state()
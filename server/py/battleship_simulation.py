@@ -0,0 +1,201 @@
+"""Headless batch simulation of Battleship games
+
+Plays many games between two players without the websocket server and reports the engine
+throughput together with the time spent in each part of a turn, e.g.:
+
+    python server/py/battleship_simulation.py --games 1000 --workers 4
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence, Tuple, TypeVar, Union, overload
+from server.py.game import Player
+from server.py.battleship import (Battleship, GamePhase, RandomPlayer, PlacementPlayer, PlacementStrategy,
+                                  DEFAULT_FLEET)
+
+T = TypeVar('T')
+
+
+class GameStats:
+    """ Turn count, winner and timings (in seconds) of one or more simulated games """
+
+    def __init__(self) -> None:
+        self.cnt_games: int = 0
+        self.cnt_finished: int = 0
+        self.cnt_turns: int = 0
+        self.list_win: List[int] = [0, 0]
+        self.time_setup: float = 0.0     # setting up the list of actions and placing the ships
+        self.time_shooting: float = 0.0  # setting up the list of actions and shooting
+        self.time_view: float = 0.0      # building the masked player views
+        self.time_actions: float = 0.0   # creating the actions of the lazy lists, when a player reads them
+        self.time_player: float = 0.0    # selecting an action, without time_actions
+
+    def add(self, other: 'GameStats') -> None:
+        self.cnt_games += other.cnt_games
+        self.cnt_finished += other.cnt_finished
+        self.cnt_turns += other.cnt_turns
+        self.list_win = [a + b for a, b in zip(self.list_win, other.list_win)]
+        self.time_setup += other.time_setup
+        self.time_shooting += other.time_shooting
+        self.time_view += other.time_view
+        self.time_actions += other.time_actions
+        self.time_player += other.time_player
+
+
+class _TimedSequence(Sequence[T]):
+    """ Sequence reading from another one and summing up the time spent in it (e.g. a lazy list of actions) """
+
+    def __init__(self, sequence: Sequence[T]) -> None:
+        self._sequence = sequence
+        self.time_spent: float = 0.0
+
+    def __len__(self) -> int:
+        t0 = time.perf_counter()
+        cnt = len(self._sequence)
+        self.time_spent += time.perf_counter() - t0
+        return cnt
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[T]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, Sequence[T]]:
+        t0 = time.perf_counter()
+        item = self._sequence[index]
+        self.time_spent += time.perf_counter() - t0
+        return item
+
+    def __iter__(self) -> Iterator[T]:
+        t0 = time.perf_counter()
+        list_item = list(self._sequence)  # iterating creates every item anyway
+        self.time_spent += time.perf_counter() - t0
+        return iter(list_item)
+
+
+class SimulationReport:
+    """ Aggregated result of a batch simulation """
+
+    def __init__(self, stats: GameStats, time_wall: float, cnt_workers: int) -> None:
+        self.stats: GameStats = stats
+        self.time_wall: float = time_wall
+        self.cnt_workers: int = cnt_workers
+
+    @property
+    def games_per_sec(self) -> float:
+        return self.stats.cnt_games / self.time_wall if self.time_wall > 0 else 0.0
+
+    @property
+    def avg_turns(self) -> float:
+        return self.stats.cnt_turns / self.stats.cnt_games if self.stats.cnt_games > 0 else 0.0
+
+    def __str__(self) -> str:
+        stats = self.stats
+        time_total = stats.time_setup + stats.time_shooting + stats.time_view + stats.time_actions + stats.time_player
+        s = f'Games:       {stats.cnt_games} ({stats.cnt_finished} finished) with {self.cnt_workers} worker(s)\n'
+        s += f'Wins:        {stats.list_win[0]} / {stats.list_win[1]}\n'
+        s += f'Wall time:   {self.time_wall:.2f}s\n'
+        s += f'Games/sec:   {self.games_per_sec:.1f}\n'
+        s += f'Avg turns:   {self.avg_turns:.1f}\n'
+        for name, value in (('Setup', stats.time_setup), ('Shooting', stats.time_shooting),
+                            ('View', stats.time_view), ('Actions', stats.time_actions),
+                            ('Player', stats.time_player)):
+            share = 100 * value / time_total if time_total > 0 else 0.0
+            s += f'{name + ":":<12} {value:.3f}s ({share:.1f}%)\n'
+        return s[:-1]
+
+
+def play_game(game: Battleship, players: Tuple[Player, Player], max_turns: Optional[int] = None) -> GameStats:
+    """ Play one game from the current state of the given game and measure where the time goes """
+    stats = GameStats()
+    stats.cnt_games = 1
+    state = game.get_state()
+    timer = time.perf_counter
+    while state.phase != GamePhase.FINISHED and (max_turns is None or stats.cnt_turns < max_turns):
+        is_setup = state.phase == GamePhase.SETUP
+        idx_player = state.idx_player_active
+        t0 = timer()
+        view = game.get_player_view(idx_player)
+        t1 = timer()
+        actions = _TimedSequence(game.get_list_action())  # created lazily while the player reads it
+        t2 = timer()
+        action = players[idx_player].select_action(view, actions)
+        t3 = timer()
+        if action is None:
+            break  # no way to continue (e.g. the fleet does not fit anymore)
+        game.apply_action(action)
+        t4 = timer()
+        stats.time_view += t1 - t0
+        stats.time_actions += actions.time_spent
+        stats.time_player += t3 - t2 - actions.time_spent
+        if is_setup:
+            stats.time_setup += (t2 - t1) + (t4 - t3)
+        else:
+            stats.time_shooting += (t2 - t1) + (t4 - t3)
+        stats.cnt_turns += 1
+        state = game.get_state()
+    if state.phase == GamePhase.FINISHED and state.winner is not None:
+        stats.cnt_finished = 1
+        stats.list_win[state.winner] += 1
+    return stats
+
+
+def _play_games(cnt_games: int, players: Tuple[Player, Player], cnt_cols: int, cnt_rows: int,
+                fleet: List[Tuple[str, int]], seed: Optional[int]) -> GameStats:
+    """ Play a chunk of games in one worker """
+    if seed is not None:
+        random.seed(seed)
+    stats = GameStats()
+    for _ in range(cnt_games):
+        game = Battleship(cnt_cols, cnt_rows, fleet)
+        stats.add(play_game(game, players))
+    return stats
+
+
+def simulate(cnt_games: int, players: Tuple[Player, Player], cnt_workers: int = 1, cnt_cols: int = 10,
+             cnt_rows: int = 10, fleet: Optional[List[Tuple[str, int]]] = None,
+             seed: Optional[int] = None) -> SimulationReport:
+    """ Play cnt_games games between two players, split across cnt_workers processes
+
+    The players are pickled into every worker process, so they must not hold unpicklable
+    resources. With a seed the result is reproducible for a fixed number of workers.
+    """
+    fleet = DEFAULT_FLEET if fleet is None else fleet
+    Battleship(cnt_cols, cnt_rows, fleet)  # validate the configuration before starting workers
+    cnt_workers = max(1, min(cnt_workers, cnt_games))
+    list_chunk = [cnt_games // cnt_workers + (1 if i < cnt_games % cnt_workers else 0) for i in range(cnt_workers)]
+    list_seed = [None if seed is None else seed + i for i in range(cnt_workers)]
+    stats = GameStats()
+    time_start = time.perf_counter()
+    if cnt_workers == 1:
+        stats.add(_play_games(cnt_games, players, cnt_cols, cnt_rows, fleet, seed))
+    else:
+        with ProcessPoolExecutor(max_workers=cnt_workers) as executor:
+            futures = [executor.submit(_play_games, cnt, players, cnt_cols, cnt_rows, fleet, chunk_seed)
+                       for cnt, chunk_seed in zip(list_chunk, list_seed)]
+            for future in futures:
+                stats.add(future.result())
+    return SimulationReport(stats, time.perf_counter() - time_start, cnt_workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Battleship batch simulation")
+    parser.add_argument('--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument('--cols', type=int, default=10, help="board width")
+    parser.add_argument('--rows', type=int, default=10, help="board height")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--placement', choices=['random'] + [strategy.value for strategy in PlacementStrategy],
+                        default='random', help="ship placement of both players")
+    args = parser.parse_args()
+
+    seats: Tuple[Player, Player] = (RandomPlayer(), RandomPlayer())
+    if args.placement != 'random':
+        strategy = PlacementStrategy(args.placement)
+        seats = (PlacementPlayer(strategy), PlacementPlayer(strategy))
+    report = simulate(args.games, seats, args.workers, args.cols, args.rows, seed=args.seed)
+    print(report)
@@ -1,8 +1,24 @@
-from server.py.game import Game, Player
-from typing import List, Optional, ClassVar
-from pydantic import BaseModel
-from enum import Enum
+"""Dog (Brändi Dog) board game for 4 players in 2 teams
+
+The board has 96 positions: the track with fields 0 to 63, where player i starts on field 16 * i,
+followed by 8 positions per player, the kennel (64 + 8 * i to 67 + 8 * i) and the finish
+(68 + 8 * i to 71 + 8 * i). All movement is looked up in tables built once at import: the paths a
+marble of a player can take from a position with a number of steps (along the track, backwards with
+a FOUR, or through the start into the finish) and the distance of each track field to the finish.
+
+Dog keeps the occupancy of the board next to the marbles of the state: the marble and its owner per
+position and bitboards (one bit per position) of the marbles of each player and of the save marbles.
+A path is blocked if its bitboard meets a save marble or a marble in a finish, a single bit test.
+The steps of a SEVEN are searched on these bitboards, memoized over the steps left and the occupancy, so
+that only the steps after which the whole SEVEN can still be played are listed.
+"""
+
 import random
+from enum import Enum
+from functools import lru_cache
+from typing import ClassVar, Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from server.py.game import Game, Player
 
 
 class Card(BaseModel):
@@ -22,10 +38,10 @@ class PlayerState(BaseModel):
 
 
 class Action(BaseModel):
-    card: Card                 # card to play
-    pos_from: Optional[int]    # position to move the marble from
-    pos_to: Optional[int]      # position to move the marble to
-    card_swap: Optional[Card]  # optional card to swap ()
+    card: Card                        # card to play
+    pos_from: Optional[int]           # position to move the marble from
+    pos_to: Optional[int]             # position to move the marble to
+    card_swap: Optional[Card] = None  # optional card to swap ()
 
 
 class GamePhase(str, Enum):
@@ -84,46 +100,508 @@ class GameState(BaseModel):
     card_active: Optional[Card]        # active card (for 7 and JKR with sequence of actions)
 
 
+CNT_PLAYER = 4
+CNT_MARBLE = 4
+CNT_TRACK = 64                                                       # fields of the track
+CNT_POS = CNT_TRACK + 2 * CNT_MARBLE * CNT_PLAYER                    # track, kennels and finishes
+CNT_SEVEN = 7                                                        # steps to split with a SEVEN
+LIST_POS_START = [CNT_TRACK // CNT_PLAYER * idx for idx in range(CNT_PLAYER)]
+LIST_POS_KENNEL = [CNT_TRACK + 2 * CNT_MARBLE * idx for idx in range(CNT_PLAYER)]
+LIST_POS_FINISH = [pos + CNT_MARBLE for pos in LIST_POS_KENNEL]
+LIST_CNT_CARD_ROUND = [6, 5, 4, 3, 2]                                # cards dealt in round 1, 2, ... (repeating)
+
+# Steps of the cards moving marbles, a SEVEN can be split into single steps
+DICT_RANK_STEPS: Dict[str, Tuple[int, ...]] = {
+    '2': (2,), '3': (3,), '4': (4, -4), '5': (5,), '6': (6,), '7': tuple(range(1, CNT_SEVEN + 1)),
+    '8': (8,), '9': (9,), '10': (10,), 'Q': (12,), 'K': (13,), 'A': (1, 11)}
+LIST_RANK_START = ['A', 'K', 'JKR']                                  # cards moving a marble out of the kennel
+LIST_STEPS = sorted({steps for list_steps in DICT_RANK_STEPS.values() for steps in list_steps})
+LIST_STEPS_JOKER = sorted({steps for rank, list_steps in DICT_RANK_STEPS.items() if rank != '7'
+                           for steps in list_steps})                 # steps a JOKER can stand in for (but a SEVEN)
+
+# Face down card shown instead of the cards hidden from a player
+MASKED_CARD = Card(suit='', rank='')
+
+Path = Tuple[int, ...]  # positions a marble passes, the last one is where it lands
+Move = Tuple[int, int]  # position a marble moves from and to
+
+
+def is_kennel(pos: int) -> bool:
+    """ True if the position is in the kennel of a player """
+    return pos >= CNT_TRACK and (pos - CNT_TRACK) % (2 * CNT_MARBLE) < CNT_MARBLE
+
+
+def _get_list_path(idx_player: int, pos: int, steps: int) -> List[Path]:
+    """ Paths of a marble of the player from the position, through the start into the finish if
+    the steps reach it (the caller forbids that for marbles still on their start) """
+    pos_finish = LIST_POS_FINISH[idx_player]
+    if pos >= CNT_TRACK:
+        if pos < pos_finish or steps < 0 or pos + steps >= pos_finish + CNT_MARBLE:
+            return []  # kennel, backwards or beyond the finish
+        return [tuple(range(pos + 1, pos + steps + 1))]
+    direction = 1 if steps > 0 else -1
+    path = tuple((pos + direction * step) % CNT_TRACK for step in range(1, abs(steps) + 1))
+    list_path = [path]
+    dist = TABLE_DIST_FINISH[idx_player][pos]
+    if dist <= steps < dist + CNT_MARBLE:
+        list_path.append(path[:dist - 1] + tuple(range(pos_finish, pos_finish + steps - dist + 1)))
+    return list_path
+
+
+# Steps from each track field of a player to the first field of the finish, passing the start
+TABLE_DIST_FINISH: List[List[int]] = [
+    [(LIST_POS_START[idx_player] - pos) % CNT_TRACK + 1 for pos in range(CNT_TRACK)]
+    for idx_player in range(CNT_PLAYER)]
+
+# Paths by player, position and steps
+TABLE_PATH: List[List[Dict[int, List[Path]]]] = [
+    [{steps: _get_list_path(idx_player, pos, steps) for steps in LIST_STEPS} for pos in range(CNT_POS)]
+    for idx_player in range(CNT_PLAYER)]
+
+# Bitboards of the paths in TABLE_PATH
+TABLE_PATH_BITS: List[List[Dict[int, List[int]]]] = [
+    [{steps: [sum(1 << pos for pos in path) for path in list_path] for steps, list_path in dict_path.items()}
+     for dict_path in list_dict_path]
+    for list_dict_path in TABLE_PATH]
+
+# Bitboards of the kennel and the finish of each player and of all finishes
+LIST_BITS_KENNEL = [((1 << CNT_MARBLE) - 1) << pos for pos in LIST_POS_KENNEL]
+LIST_BITS_FINISH = [((1 << CNT_MARBLE) - 1) << pos for pos in LIST_POS_FINISH]
+BITS_FINISH = sum(LIST_BITS_FINISH)
+
+# Path by player, position and target position
+TABLE_PATH_TO: List[List[Dict[int, Path]]] = [
+    [{path[-1]: path for list_path in dict_path.values() for path in list_path} for dict_path in list_dict_path]
+    for list_dict_path in TABLE_PATH]
+
+
+def _is_finished(bits_player: Sequence[int], idx_player: int) -> bool:
+    """ True if all marbles of the player are in the finish """
+    return bits_player[idx_player] & LIST_BITS_FINISH[idx_player] == LIST_BITS_FINISH[idx_player]
+
+
+def _get_bits_player_moved(bits_player: Tuple[int, ...], idx_player: int, bit_from: int, bits_path: int,
+                           pos_to: int) -> Tuple[int, ...]:
+    """ Bitboards of the players after a marble moved along a path, sending home all marbles on it """
+    list_bits = list(bits_player)
+    for idx, bits in enumerate(bits_player):
+        bits_home = bits & bits_path
+        while bits_home:  # marbles passed go to the free kennel fields in order
+            bits_home &= bits_home - 1
+            bits_free = LIST_BITS_KENNEL[idx] & ~list_bits[idx]
+            list_bits[idx] |= bits_free & -bits_free
+        list_bits[idx] &= ~bits_path
+    list_bits[idx_player] = list_bits[idx_player] & ~bit_from | 1 << pos_to
+    return tuple(list_bits)
+
+
+@lru_cache(maxsize=1 << 16)
+def _search_move_seven(idx_player_active: int, cnt_steps: int, bits_player: Tuple[int, ...],
+                       bits_save: int) -> Tuple[Move, ...]:
+    """ Moves of one part of a SEVEN from which the remaining steps can still be played (or which finish
+    the game), searched on the bitboards and memoized over the steps and the occupancy """
+    idx_player = idx_player_active
+    if _is_finished(bits_player, idx_player):
+        idx_player = (idx_player + 2) % CNT_PLAYER
+    bits_blocking = bits_save | (BITS_FINISH & (bits_player[0] | bits_player[1] | bits_player[2] | bits_player[3]))
+    list_move = []
+    bits_marble = bits_player[idx_player]
+    while bits_marble:
+        bit_from = bits_marble & -bits_marble
+        bits_marble ^= bit_from
+        pos_from = bit_from.bit_length() - 1
+        for steps in range(1, cnt_steps + 1):
+            for path, bits in zip(TABLE_PATH[idx_player][pos_from][steps],
+                                  TABLE_PATH_BITS[idx_player][pos_from][steps]):
+                if bits & bits_blocking or bits_save & bit_from and path[-1] >= CNT_TRACK:
+                    continue
+                bits_player_to = _get_bits_player_moved(bits_player, idx_player, bit_from, bits, path[-1])
+                if steps == cnt_steps or _is_finished(bits_player_to, idx_player_active) and _is_finished(
+                        bits_player_to, (idx_player_active + 2) % CNT_PLAYER) or _search_move_seven(
+                            idx_player_active, cnt_steps - steps, bits_player_to, bits_save & ~bit_from):
+                    list_move.append((pos_from, path[-1]))
+    return tuple(list_move)
+
+
 class Dog(Game):
 
     def __init__(self) -> None:
         """ Game initialization (set_state call not necessary, we expect 4 players) """
-        pass
+        self.list_card_exchange: List[Optional[Card]] = [None] * CNT_PLAYER  # cards given to the partner
+        self.cnt_seven = CNT_SEVEN                    # steps left of the SEVEN being played
+        self.state_seven: Optional[GameState] = None  # state before the first step of the SEVEN
+        self.list_board: List[Optional[Marble]] = [None] * CNT_POS  # marble on each position
+        self.list_owner: List[int] = [-1] * CNT_POS                  # player owning it, -1 if empty
+        self.list_bits_player: List[int] = [0] * CNT_PLAYER          # bitboard of the marbles of each player
+        self.bits_save = 0                                           # bitboard of the save marbles
+        self.state = self.reset()
+
+    def reset(self) -> GameState:
+        """ Start a new game with shuffled cards and all marbles in the kennels """
+        list_card_draw = list(GameState.LIST_CARD)
+        random.shuffle(list_card_draw)
+        cnt_card = LIST_CNT_CARD_ROUND[0]
+        list_player = []
+        for idx_player in range(CNT_PLAYER):
+            list_card, list_card_draw = list_card_draw[:cnt_card], list_card_draw[cnt_card:]
+            list_marble = [Marble(pos=LIST_POS_KENNEL[idx_player] + idx, is_save=False) for idx in range(CNT_MARBLE)]
+            list_player.append(PlayerState(name=f'Player {idx_player + 1}', list_card=list_card,
+                                           list_marble=list_marble))
+        self.state = GameState(phase=GamePhase.RUNNING, cnt_round=1, bool_card_exchanged=False,
+                               idx_player_started=0, idx_player_active=0, list_player=list_player,
+                               list_card_draw=list_card_draw, list_card_discard=[], card_active=None)
+        self.set_state(self.state)
+        return self.state
 
     def set_state(self, state: GameState) -> None:
         """ Set the game to a given state """
-        pass
+        self.state = state
+        self.list_card_exchange = [None] * CNT_PLAYER
+        self.cnt_seven = CNT_SEVEN
+        self.state_seven = None
+        self._set_board()
+
+    def _set_board(self) -> None:
+        """ Build the occupancy of the board from the marbles of the state """
+        self.list_board = [None] * CNT_POS
+        self.list_owner = [-1] * CNT_POS
+        self.list_bits_player = [0] * CNT_PLAYER
+        self.bits_save = 0
+        for idx_player, player in enumerate(self.state.list_player):
+            for marble in player.list_marble:
+                self.list_board[marble.pos] = marble
+                self.list_owner[marble.pos] = idx_player
+                self.list_bits_player[idx_player] |= 1 << marble.pos
+                if marble.is_save:
+                    self.bits_save |= 1 << marble.pos
+
+    def _is_board_stale(self) -> bool:
+        """ Check if the marbles of the state were changed without the game (e.g. through get_state) """
+        for idx_player, player in enumerate(self.state.list_player):
+            bits_player = 0
+            for marble in player.list_marble:
+                if self.list_board[marble.pos] is not marble or (self.bits_save >> marble.pos & 1) != marble.is_save:
+                    return True
+                bits_player |= 1 << marble.pos
+            if bits_player != self.list_bits_player[idx_player]:
+                return True
+        return False
+
+    def _lift_marble(self, pos: int) -> Tuple[Marble, int]:
+        """ Take the marble off a position of the board, return it with its owner """
+        marble, idx_player = self.list_board[pos], self.list_owner[pos]
+        if marble is None:
+            raise ValueError(f"No marble on position {pos}")
+        self.list_board[pos] = None
+        self.list_owner[pos] = -1
+        self.list_bits_player[idx_player] &= ~(1 << pos)
+        self.bits_save &= ~(1 << pos)
+        return marble, idx_player
+
+    def _put_marble(self, marble: Marble, idx_player: int, pos: int, is_save: bool) -> None:
+        """ Put a marble of the player on a free position of the board """
+        marble.pos, marble.is_save = pos, is_save
+        self.list_board[pos] = marble
+        self.list_owner[pos] = idx_player
+        self.list_bits_player[idx_player] |= 1 << pos
+        if is_save:
+            self.bits_save |= 1 << pos
 
     def get_state(self) -> GameState:
         """ Get the complete, unmasked game state """
-        pass
+        return self.state
 
     def print_state(self) -> None:
         """ Print the current game state """
-        pass
+        state = self.state
+        print('----------------')
+        print(f"Phase: {state.phase}, Round: {state.cnt_round}, Active Player: {state.idx_player_active}")
+        if state.card_active is not None:
+            print(f"Active Card: {state.card_active.suit}{state.card_active.rank}")
+        for idx_player, player in enumerate(state.list_player):
+            list_card = ' '.join(f'{card.suit}{card.rank}' for card in player.list_card)
+            list_pos = ' '.join(f'{marble.pos}{"*" if marble.is_save else ""}' for marble in player.list_marble)
+            print(f"Player {idx_player}: {player.name}, Cards: {list_card}, Marbles: {list_pos}")
+
+    def _is_finished(self, idx_player: int) -> bool:
+        """ True if all marbles of the player are in the finish """
+        return _is_finished(self.list_bits_player, idx_player)
+
+    def _get_idx_player_moving(self) -> int:
+        """ Player whose marbles the active player moves, the partner once all own marbles are finished """
+        idx_player = self.state.idx_player_active
+        if self._is_finished(idx_player):
+            return (idx_player + 2) % CNT_PLAYER
+        return idx_player
+
+    def _get_bits_blocking(self) -> int:
+        """ Bitboard of the marbles which can not be overtaken, the save ones and those in a finish """
+        return self.bits_save | (BITS_FINISH & (self.list_bits_player[0] | self.list_bits_player[1]
+                                                | self.list_bits_player[2] | self.list_bits_player[3]))
+
+    def _get_list_action_start(self, card: Card, idx_player: int) -> List[Action]:
+        """ Action moving a marble of the player out of the kennel """
+        bits_kennel = self.list_bits_player[idx_player] & LIST_BITS_KENNEL[idx_player]
+        if not bits_kennel or self.bits_save >> LIST_POS_START[idx_player] & 1:
+            return []
+        pos_from = (bits_kennel & -bits_kennel).bit_length() - 1
+        return [Action(card=card, pos_from=pos_from, pos_to=LIST_POS_START[idx_player])]
+
+    def _get_dict_move(self, idx_player: int, list_steps: List[int]) -> Dict[int, List[Move]]:
+        """ Moves of the marbles of the player by each of the steps """
+        dict_move: Dict[int, List[Move]] = {steps: [] for steps in list_steps}
+        bits_blocking = self._get_bits_blocking()
+        for marble in self.state.list_player[idx_player].list_marble:
+            dict_path, dict_bits = TABLE_PATH[idx_player][marble.pos], TABLE_PATH_BITS[idx_player][marble.pos]
+            for steps in list_steps:
+                for path, bits in zip(dict_path[steps], dict_bits[steps]):
+                    if marble.is_save and path[-1] >= CNT_TRACK:
+                        continue  # a marble on its start can not go into the finish directly
+                    if not bits & bits_blocking:
+                        dict_move[steps].append((marble.pos, path[-1]))
+        return dict_move
+
+    def _get_list_move_jake(self, idx_player: int) -> List[Move]:
+        """ Swaps of a marble of the player with a marble of another player which is not save,
+        or with another own marble if there is none """
+        list_player = self.state.list_player
+        list_pos_own = [marble.pos for marble in list_player[idx_player].list_marble if marble.pos < CNT_TRACK]
+        list_pos_other = [marble.pos for idx, player in enumerate(list_player) if idx != idx_player
+                          for marble in player.list_marble if marble.pos < CNT_TRACK and not marble.is_save]
+        if not list_pos_other:
+            list_pos_other = list_pos_own
+        list_move = []
+        for pos_own in list_pos_own:
+            for pos_other in list_pos_other:
+                if pos_own != pos_other:
+                    list_move += [(pos_own, pos_other), (pos_other, pos_own)]
+        return list_move
+
+    def _get_list_move_seven(self) -> Tuple[Move, ...]:
+        """ Moves of a part of the steps left of a SEVEN, only those after which all steps can be played """
+        return _search_move_seven(self.state.idx_player_active, self.cnt_seven, tuple(self.list_bits_player),
+                                  self.bits_save)
+
+    def _get_list_action_joker(self, card: Card, idx_player: int) -> List[Action]:
+        """ Actions of a JOKER: moving out of the kennel or standing in for any card with an action, decided
+        once per rank from the moves of all distinct steps """
+        list_action = self._get_list_action_start(card, idx_player)
+        dict_move = self._get_dict_move(idx_player, LIST_STEPS_JOKER)
+        dict_has_action = {'J': bool(self._get_list_move_jake(idx_player)), '7': bool(self._get_list_move_seven())}
+        for rank in GameState.LIST_RANK[:-1]:
+            if rank not in dict_has_action:
+                dict_has_action[rank] = bool(list_action) and rank in LIST_RANK_START or any(
+                    dict_move[steps] for steps in DICT_RANK_STEPS[rank])
+        list_rank = [rank for rank in GameState.LIST_RANK[:-1] if dict_has_action[rank]]
+        for suit in GameState.LIST_SUIT:
+            for rank in list_rank:
+                list_action.append(Action(card=card, pos_from=None, pos_to=None, card_swap=Card(suit=suit, rank=rank)))
+        return list_action
+
+    def _get_list_action_card(self, card: Card, idx_player: int) -> List[Action]:
+        """ Actions of a card moving the marbles of the player """
+        if card.rank == 'JKR':
+            return self._get_list_action_joker(card, idx_player)
+        if card.rank == 'J':
+            list_move = self._get_list_move_jake(idx_player)
+        elif card.rank == '7':
+            list_move = list(self._get_list_move_seven())
+        else:
+            dict_move = self._get_dict_move(idx_player, list(DICT_RANK_STEPS[card.rank]))
+            list_move = [move for list_move_steps in dict_move.values() for move in list_move_steps]
+        list_action = self._get_list_action_start(card, idx_player) if card.rank in LIST_RANK_START else []
+        return list_action + [Action(card=card, pos_from=pos_from, pos_to=pos_to) for pos_from, pos_to in list_move]
 
     def get_list_action(self) -> List[Action]:
-        """ Get a list of possible actions for the active player """
-        pass
+        """ Get a list of possible actions for the active player, each card of the hand only once (there are
+        two of each card and three JOKERs) and without duplicates """
+        state = self.state
+        if state.phase != GamePhase.RUNNING:
+            return []
+        if self._is_board_stale():
+            self._set_board()
+        player = state.list_player[state.idx_player_active]
+        dict_card = {(card.suit, card.rank): card for card in player.list_card}
+        if not state.bool_card_exchanged:
+            return [Action(card=card, pos_from=None, pos_to=None) for card in dict_card.values()]
+        idx_player = self._get_idx_player_moving()
+        if state.card_active is not None:
+            list_action_card = self._get_list_action_card(state.card_active, idx_player)
+        else:
+            list_action_card = [action for card in dict_card.values()
+                                for action in self._get_list_action_card(card, idx_player)]
+        dict_action = {(action.card.suit, action.card.rank, action.pos_from, action.pos_to,
+                        None if action.card_swap is None else action.card_swap.rank,
+                        None if action.card_swap is None else action.card_swap.suit): action
+                       for action in list_action_card}
+        return list(dict_action.values())
+
+    def _send_home(self, pos: int) -> None:
+        """ Move the marble on a position back to a free field of its owner's kennel """
+        marble, idx_player = self._lift_marble(pos)
+        bits_free = LIST_BITS_KENNEL[idx_player] & ~self.list_bits_player[idx_player]
+        self._put_marble(marble, idx_player, (bits_free & -bits_free).bit_length() - 1, False)
+
+    def _move_marble(self, pos_from: int, pos_to: int, path: Path, is_save: bool = False) -> None:
+        """ Move the marble and send home the marble it lands on (and, in the path, all marbles passed) """
+        marble, idx_player = self._lift_marble(pos_from)
+        for pos in path:
+            if self.list_board[pos] is not None:
+                self._send_home(pos)
+        self._put_marble(marble, idx_player, pos_to, is_save)
+
+    def _apply_move(self, action: Action) -> int:
+        """ Apply an action moving or swapping marbles, return the steps moved """
+        assert action.pos_from is not None and action.pos_to is not None
+        if action.card.rank == 'J':
+            marble_from, idx_player_from = self._lift_marble(action.pos_from)
+            marble_to, idx_player_to = self._lift_marble(action.pos_to)
+            self._put_marble(marble_from, idx_player_from, action.pos_to, False)
+            self._put_marble(marble_to, idx_player_to, action.pos_from, False)
+            return 0
+        if is_kennel(action.pos_from):
+            self._move_marble(action.pos_from, action.pos_to, (action.pos_to,), is_save=True)
+            return 0
+        idx_player = self.list_owner[action.pos_from]
+        if idx_player < 0:
+            raise ValueError(f"No marble on position {action.pos_from}")
+        path = TABLE_PATH_TO[idx_player][action.pos_from].get(action.pos_to)
+        if path is None:
+            raise ValueError(f"Marble can not move from {action.pos_from} to {action.pos_to}")
+        self._move_marble(action.pos_from, action.pos_to, path if action.card.rank == '7' else path[-1:])
+        return len(path)
+
+    def _check_finished(self) -> None:
+        """ End the game once both players of a team have all marbles in the finish """
+        for idx_player in range(CNT_PLAYER // 2):
+            if self._is_finished(idx_player) and self._is_finished(idx_player + 2):
+                self.state.phase = GamePhase.FINISHED
+
+    def _start_round(self) -> None:
+        """ Deal the cards of the next round, with a new deck if the stock is out of cards """
+        state = self.state
+        state.cnt_round += 1
+        state.idx_player_started = (state.idx_player_started + 1) % CNT_PLAYER
+        state.bool_card_exchanged = False
+        cnt_card = LIST_CNT_CARD_ROUND[(state.cnt_round - 1) % len(LIST_CNT_CARD_ROUND)]
+        if len(state.list_card_draw) < cnt_card * CNT_PLAYER:
+            list_card_draw = list(GameState.LIST_CARD)
+            for player in state.list_player:
+                for card in player.list_card:
+                    list_card_draw.remove(card)
+            random.shuffle(list_card_draw)
+            state.list_card_draw = list_card_draw
+            state.list_card_discard = []
+        for player in state.list_player:
+            player.list_card.extend(state.list_card_draw[:cnt_card])
+            state.list_card_draw = state.list_card_draw[cnt_card:]
+
+    def _next_player(self) -> None:
+        """ Pass the turn on, the round ends when it is back at the starting player and all cards are played """
+        state = self.state
+        state.card_active = None
+        state.idx_player_active = (state.idx_player_active + 1) % CNT_PLAYER
+        if state.idx_player_active == state.idx_player_started and not any(
+                player.list_card for player in state.list_player):
+            self._start_round()
 
-    def apply_action(self, action: Action) -> None:
+    def _apply_exchange(self, card: Card) -> None:
+        """ Give a card to the partner, the cards change hands once all players have chosen one """
+        state = self.state
+        state.list_player[state.idx_player_active].list_card.remove(card)
+        self.list_card_exchange[state.idx_player_active] = card
+        state.idx_player_active = (state.idx_player_active + 1) % CNT_PLAYER
+        if all(card is not None for card in self.list_card_exchange):
+            for idx_player, card_exchange in enumerate(self.list_card_exchange):
+                assert card_exchange is not None
+                state.list_player[(idx_player + 2) % CNT_PLAYER].list_card.append(card_exchange)
+            self.list_card_exchange = [None] * CNT_PLAYER
+            state.bool_card_exchanged = True
+
+    def _apply_none(self) -> None:
+        """ Undo the steps of a SEVEN which can not be completed and lose the card, otherwise fold all cards """
+        state = self.state
+        player = state.list_player[state.idx_player_active]
+        if self.state_seven is not None:
+            card = state.card_active
+            for name, value in self.state_seven:
+                setattr(state, name, value)
+            self._set_board()
+            self.state_seven = None
+            self.cnt_seven = CNT_SEVEN
+            player = state.list_player[state.idx_player_active]
+            assert card is not None
+            player.list_card.remove(card)
+            state.list_card_discard.append(card)
+        else:
+            state.list_card_discard.extend(player.list_card)
+            player.list_card = []
+        self._next_player()
+
+    def apply_action(self, action: Optional[Action]) -> None:
         """ Apply the given action to the game """
-        pass
+        state = self.state
+        if self._is_board_stale():
+            self._set_board()
+        if action is None:
+            self._apply_none()
+            return
+        if not state.bool_card_exchanged:
+            self._apply_exchange(action.card)
+            return
+        player = state.list_player[state.idx_player_active]
+        if action.card_swap is not None:
+            player.list_card[player.list_card.index(action.card)] = action.card_swap
+            state.list_card_discard.append(action.card)
+            state.card_active = action.card_swap
+            return
+        if action.card.rank == '7' and self.cnt_seven == CNT_SEVEN:
+            self.state_seven = state.model_copy(deep=True)
+        steps = self._apply_move(action)
+        self._check_finished()
+        if action.card.rank == '7':
+            self.cnt_seven -= steps
+            if self.cnt_seven > 0:
+                state.card_active = action.card
+                return
+            self.cnt_seven = CNT_SEVEN
+            self.state_seven = None
+        player.list_card.remove(action.card)
+        state.list_card_discard.append(action.card)
+        self._next_player()
 
     def get_player_view(self, idx_player: int) -> GameState:
         """ Get the masked state for the active player (e.g. the oppontent's cards are face down)"""
-        pass
+        state = self.state.model_copy(deep=True)
+        for idx, player in enumerate(state.list_player):
+            if idx != idx_player:
+                player.list_card = [MASKED_CARD] * len(player.list_card)
+        state.list_card_draw = [MASKED_CARD] * len(state.list_card_draw)
+        return state
 
 
 class RandomPlayer(Player):
 
-    def select_action(self, state: GameState, actions: List[Action]) -> Optional[Action]:
+    def select_action(self, state: GameState, actions: Sequence[Action]) -> Optional[Action]:
         """ Given masked game state and possible actions, select the next action """
         if len(actions) > 0:
             return random.choice(actions)
         return None
 
 
-if __name__ == '__main__':
-
+def main() -> None:
+    """ Play a game of random players and print the final state """
     game = Dog()
+    players = [RandomPlayer() for _ in range(CNT_PLAYER)]
+    cnt_turn = 0
+    while game.get_state().phase == GamePhase.RUNNING and cnt_turn < 10000:
+        idx_player_active = game.get_state().idx_player_active
+        game.apply_action(players[idx_player_active].select_action(
+            game.get_player_view(idx_player_active), game.get_list_action()))
+        cnt_turn += 1
+    game.print_state()
+    print(f"\nGame over after {cnt_turn} actions in round {game.get_state().cnt_round}")
+
+
+if __name__ == '__main__':
+    main()
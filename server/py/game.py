@@ -1,4 +1,4 @@
-from typing import List, Any
+from typing import Sequence, Any
 from abc import ABCMeta, abstractmethod
 
 GameState = Any
@@ -23,7 +23,7 @@ class Game(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_list_action(self) -> List[GameAction]:
+    def get_list_action(self) -> Sequence[GameAction]:
         """ Get a list of possible actions for the active player """
         pass
 
@@ -41,6 +41,6 @@ class Game(metaclass=ABCMeta):
 class Player(metaclass=ABCMeta):
 
     @abstractmethod
-    def select_action(self, state: GameState, actions: List[GameAction]) -> GameAction:
+    def select_action(self, state: GameState, actions: Sequence[GameAction]) -> GameAction:
         """ Given masked game state and possible actions, select the next action """
         pass
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 import random
 from enum import Enum
 from server.py.game import Game, Player
@@ -117,7 +117,8 @@ class Hangman(Game):
 
 class RandomPlayer(Player):
 
-    def select_action(self, state: HangmanGameState, actions: List[GuessLetterAction]) -> Optional[GuessLetterAction]:
+    def select_action(self, state: HangmanGameState,
+                      actions: Sequence[GuessLetterAction]) -> Optional[GuessLetterAction]:
         """ Given masked game state and possible actions, select the next action """
         if len(actions) > 0:
             return random.choice(actions)
@@ -125,7 +126,8 @@ class RandomPlayer(Player):
 
 class ConsolePlayer(Player):
 
-    def select_action(self, state: HangmanGameState, actions: List[GuessLetterAction]) -> Optional[GuessLetterAction]:
+    def select_action(self, state: HangmanGameState,
+                      actions: Sequence[GuessLetterAction]) -> Optional[GuessLetterAction]:
         """ Given masked game state and possible actions, select the next action """
         if len(actions) > 0:
             guess = input("Guess a letter: ").upper()
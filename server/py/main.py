@@ -1,17 +1,30 @@
+import json
+import asyncio
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-import json
-import asyncio
+from server.py import hangman, battleship, uno, uno_ismcts
+from server.py.game import Player
 
-import server.py.hangman as hangman
-import server.py.battleship as battleship
 
-import random
+@asynccontextmanager
+async def lifespan(app_started: FastAPI) -> AsyncIterator[None]:
+    """ Start the pool of worker processes of the AI players (the processes start on the first move)
+    and stop it when the server shuts down """
+    app_started.state.uno_executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+    yield
+    app_started.state.uno_executor.shutdown(cancel_futures=True)
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/inc/static", StaticFiles(directory="server/inc/static"), name="static")
 
@@ -111,10 +124,10 @@ async def battleship_simulation_ws(websocket: WebSocket):
             if len(list_action) > 0:
                 action = player.select_action(state, list_action)
 
-            dict_state = state.model_dump()
+            dict_state = game.get_player_view(idx_player_you).model_dump()
             dict_state['idx_player_you'] = idx_player_you
             dict_state['list_action'] = []
-            dict_state['selected_action'] = None if action is None else action.model_dump()
+            dict_state['selected_action'] = None if action is None else action.to_dict()
             data = {'type': 'update', 'state': dict_state}
             await websocket.send_json(data)
 
@@ -124,7 +137,7 @@ async def battleship_simulation_ws(websocket: WebSocket):
             data = await websocket.receive_json()
 
             if data['type'] == 'action':
-                action = battleship.BattleshipAction.model_validate(data['action'])
+                action = battleship.BattleshipAction.from_dict(data['action'])
                 game.apply_action(action)
 
     except WebSocketDisconnect:
@@ -145,7 +158,7 @@ async def battleship_singleplayer_ws(websocket: WebSocket):
     try:
 
         game = battleship.Battleship()
-        player = battleship.RandomPlayer()
+        player = battleship.PlacementPlayer(battleship.PlacementStrategy.ANTI_DENSITY)
 
         while True:
 
@@ -157,11 +170,11 @@ async def battleship_singleplayer_ws(websocket: WebSocket):
 
             if state.idx_player_active == idx_player_you:
 
-                state = game.get_player_view(idx_player_you)
+                view = game.get_player_view(idx_player_you)
                 list_action = game.get_list_action()
-                dict_state = state.model_dump()
+                dict_state = view.model_dump()
                 dict_state['idx_player_you'] = idx_player_you
-                dict_state['list_action'] = [action.model_dump() for action in list_action]
+                dict_state['list_action'] = [action.to_dict() for action in list_action]
                 data = {'type': 'update', 'state': dict_state}
                 await websocket.send_json(data)
 
@@ -170,12 +183,12 @@ async def battleship_singleplayer_ws(websocket: WebSocket):
                 else:
                     data = await websocket.receive_json()
                     if data['type'] == 'action':
-                        action = battleship.BattleshipAction.model_validate(data['action'])
+                        action = battleship.BattleshipAction.from_dict(data['action'])
                         game.apply_action(action)
-                        print(action)
+                        print(action.to_dict())
 
-                state = game.get_player_view(idx_player_you)
-                dict_state = state.model_dump()
+                view = game.get_player_view(idx_player_you)
+                dict_state = view.model_dump()
                 dict_state['idx_player_you'] = idx_player_you
                 dict_state['list_action'] = []
 
@@ -184,14 +197,14 @@ async def battleship_singleplayer_ws(websocket: WebSocket):
 
             else:
 
-                state = game.get_player_view(state.idx_player_active)
+                view = game.get_player_view(state.idx_player_active)
                 list_action = game.get_list_action()
-                action = player.select_action(state, list_action)
+                action = player.select_action(view, list_action)
                 if action is not None:
                     await asyncio.sleep(1)
                 game.apply_action(action)
-                state = game.get_player_view(idx_player_you)
-                dict_state = state.model_dump()
+                view = game.get_player_view(idx_player_you)
+                dict_state = view.model_dump()
                 dict_state['idx_player_you'] = idx_player_you
                 dict_state['list_action'] = []
                 data = {'type': 'update', 'state': dict_state}
@@ -203,6 +216,112 @@ async def battleship_singleplayer_ws(websocket: WebSocket):
 
 # ----- UNO -----
 
+UNO_CNT_PLAYER = 4
+
+# AI players choose their actions in worker processes of app.state.uno_executor (see lifespan), so a
+# long search never blocks the event loop and the tables of all connections share the CPUs
+
+
+def uno_select_action_seeded(player: Player, seed: int, state: uno.GameState,
+                             list_action: List[uno.Action]) -> Optional[uno.Action]:
+    """ Select an action with a copy of the player in a worker process
+
+    The copy is thrown away afterwards, so its random numbers would repeat on every move
+    without the fresh seed from the parent.
+    """
+    random.seed(seed)
+    if isinstance(player, uno_ismcts.ISMCTSPlayer):
+        player.rng.seed(seed)
+    action: Optional[uno.Action] = player.select_action(state, list_action)
+    return action
+
+
+async def uno_select_action(player: Player, game: uno.Uno, list_action: List[uno.Action]) -> Optional[uno.Action]:
+    if not list_action:
+        return None
+    state = game.get_player_view(game.get_state().idx_player_active)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(app.state.uno_executor, uno_select_action_seeded, player,
+                                      random.randrange(2 ** 32), state, list_action)
+
+
+def uno_dump_state(state: uno.GameState, idx_player_you: int, list_action: List[uno.Action]) -> Dict[str, Any]:
+    dict_state = state.model_dump()
+    dict_state['idx_player_you'] = idx_player_you
+    dict_state['list_action'] = [action.model_dump() for action in list_action]
+    return dict_state
+
+
+def uno_copy_state(state: uno.GameState) -> uno.GameState:
+    """ Copy of the lists of a complete state (for spectators), the cards are shared """
+    return state.model_copy(update={
+        'list_card_draw': list(state.list_card_draw),
+        'list_card_discard': list(state.list_card_discard),
+        'list_player': [player.model_copy(update={'list_card': list(player.list_card)})
+                        for player in state.list_player]})
+
+
+async def uno_send_view(websocket: WebSocket, view: uno.GameState, view_sent: Optional[uno.GameState],
+                        idx_player_you: int, list_action: List[uno.Action],
+                        selected_action: Optional[uno.Action] = None) -> uno.GameState:
+    """ Send the view as a delta to the view sent before, or in full (on connect and resync) """
+    if view_sent is None:
+        dict_state = uno_dump_state(view, idx_player_you, list_action)
+        dict_state['selected_action'] = None if selected_action is None else selected_action.model_dump()
+        data = {'type': 'update', 'state': dict_state}
+    else:
+        delta = uno.get_view_delta(view_sent, view)
+        delta['list_action'] = [action.model_dump() for action in list_action]
+        delta['selected_action'] = None if selected_action is None else selected_action.model_dump()
+        data = {'type': 'delta', 'delta': delta}
+    await websocket.send_json(data)
+    return view
+
+
+async def uno_play_against(websocket: WebSocket, list_player: List[Player]) -> None:
+    """ Play a game of the client (player 0) against the other players of the list """
+    idx_player_you = 0
+
+    game = uno.Uno()
+    game.set_state(uno.GameState(cnt_player=UNO_CNT_PLAYER))
+    action: Optional[uno.Action] = None
+    view_sent: Optional[uno.GameState] = None
+
+    while True:
+
+        state = game.get_state()
+        if state.phase == uno.GamePhase.FINISHED:
+            await uno_send_view(websocket, game.get_player_view(idx_player_you), view_sent, idx_player_you, [])
+            break
+
+        list_action = game.get_list_action()
+
+        if state.idx_player_active == idx_player_you:
+
+            view_sent = await uno_send_view(websocket, game.get_player_view(idx_player_you), view_sent,
+                                            idx_player_you, list_action)
+
+            if len(list_action) == 0:
+                game.apply_action(None)
+            else:
+                data = await websocket.receive_json()
+                if data['type'] == 'action':
+                    action = uno.Action.model_validate(data['action'])
+                    if action in list_action:
+                        game.apply_action(action)
+                elif data['type'] == 'resync':
+                    view_sent = None
+
+        else:
+
+            action = await uno_select_action(list_player[state.idx_player_active or 0], game, list_action)
+            if action is not None:
+                await asyncio.sleep(0.5)
+            game.apply_action(action)
+            view_sent = await uno_send_view(websocket, game.get_player_view(idx_player_you), view_sent,
+                                            idx_player_you, [])
+
+
 @app.get("/uno/simulation/", response_class=HTMLResponse)
 async def uno_simulation(request: Request):
     return templates.TemplateResponse("game/uno/simulation.html", {"request": request})
@@ -212,9 +331,36 @@ async def uno_simulation(request: Request):
 async def uno_simulation_ws(websocket: WebSocket):
     await websocket.accept()
 
+    idx_player_you = 0
+
     try:
+        game = uno.Uno()
+        game.set_state(uno.GameState(cnt_player=UNO_CNT_PLAYER))
+        list_player = [uno_ismcts.ISMCTSPlayer(time_budget=0.2) for _ in range(UNO_CNT_PLAYER)]
+        view_sent = None
 
-        pass
+        while True:
+
+            state = game.get_state()
+            action = None
+            list_action = []
+            if state.phase != uno.GamePhase.FINISHED:
+                list_action = game.get_list_action()
+                action = await uno_select_action(list_player[state.idx_player_active or 0], game, list_action)
+
+            view_sent = await uno_send_view(websocket, uno_copy_state(state), view_sent, idx_player_you, [], action)
+
+            if state.phase == uno.GamePhase.FINISHED:
+                break
+
+            data = await websocket.receive_json()
+
+            if data['type'] == 'action':
+                action = None if data['action'] is None else uno.Action.model_validate(data['action'])
+                if action is None or action in list_action:
+                    game.apply_action(action)
+            elif data['type'] == 'resync':
+                view_sent = None
 
     except WebSocketDisconnect:
         print('DISCONNECTED')
@@ -230,8 +376,7 @@ async def uno_singleplayer_ws(websocket: WebSocket):
     await websocket.accept()
 
     try:
-
-        pass
+        await uno_play_against(websocket, [uno_ismcts.ISMCTSPlayer(time_budget=0.5) for _ in range(UNO_CNT_PLAYER)])
 
     except WebSocketDisconnect:
         print('DISCONNECTED')
@@ -242,8 +387,7 @@ async def uno_random_player_ws(websocket: WebSocket):
     await websocket.accept()
 
     try:
-
-        pass
+        await uno_play_against(websocket, [uno.RandomPlayer() for _ in range(UNO_CNT_PLAYER)])
 
     except WebSocketDisconnect:
         print('DISCONNECTED')
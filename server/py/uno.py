@@ -6,14 +6,18 @@ This module implements the classic UNO card game with support for:
 - Standard UNO rules including card stacking and UNO calls
 """
 
+import math
 import random
 from enum import Enum
-from typing import List, Optional
-from pydantic import BaseModel
+from functools import cached_property, lru_cache
+from typing import Any, ClassVar, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from pydantic import BaseModel, ConfigDict
 from server.py.game import Game, Player
 
 
 class Card(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     color: Optional[str] = None
     number: Optional[int] = None
     symbol: Optional[str] = None
@@ -29,16 +33,150 @@ class Card(BaseModel):
         return s
 
 
+# Colors a player can choose when playing a wild card
+LIST_PLAY_COLOR: Tuple[str, ...] = ("red", "green", "yellow", "blue")
+
+# Distinct cards of the deck, shared as immutable flyweights by all games. A kind is the index of a
+# card in this table: numbers 0-39 (number * 4 + color), skip 40-43, reverse 44-47, draw2 48-51,
+# wild 52 and wilddraw4 53.
+CARD_TABLE: Tuple[Card, ...] = tuple(
+    [Card(color=color, number=number) for number in range(10) for color in LIST_PLAY_COLOR]
+    + [Card(color=color, symbol=symbol) for symbol in ("skip", "reverse", "draw2") for color in LIST_PLAY_COLOR]
+    + [Card(color="any", symbol="wild"), Card(color="any", symbol="wilddraw4")])
+
+# Kind of each of the 108 physical cards (the card id is the index), in the order of GameState.LIST_CARD
+DECK: Tuple[int, ...] = (
+    tuple(range(40)) + tuple(range(4, 40))
+    + tuple(kind for base in (40, 44, 48) for _ in range(2) for kind in range(base, base + 4))
+    + (52,) * 4 + (53,) * 4)
+
+# Face down card shown instead of the cards hidden from a player
+MASKED_CARD: Card = Card(color=None, number=None, symbol=None)
+
+# Kinds of the cards of the deck by identity of the flyweights and by value
+_dict_kind: Dict[Card, int] = {card: kind for kind, card in enumerate(CARD_TABLE)}
+_dict_kind_by_id: Dict[int, int] = {id(card): kind for kind, card in enumerate(CARD_TABLE)}
+
+
+def get_card_kind(card: Card, default: Optional[int] = None) -> int:
+    """ Get the kind of a card of the deck (flyweights are found by identity, other cards by value),
+    the default for other cards or ValueError if there is none """
+    kind = _dict_kind_by_id.get(id(card))
+    if kind is None:
+        kind = _dict_kind.get(card, default)
+        if kind is None:
+            raise ValueError(f"Card {card} is not part of the deck")
+    return kind
+
+
+def get_card(kind: int) -> Card:
+    """ Get the shared card instance of a kind of the deck """
+    return CARD_TABLE[kind]
+
+
+class CardKinds:
+    """ Kinds of the cards seen by one game: the kinds of the deck, then cards which are not part of it
+    numbered from 54 in the order they are first seen; kept per game, so they go away with it """
+
+    def __init__(self) -> None:
+        self.list_card_foreign: List[Card] = []
+        self.dict_kind_foreign: Dict[Card, int] = {}
+
+    @property
+    def cnt_kind(self) -> int:
+        return len(CARD_TABLE) + len(self.list_card_foreign)
+
+    def get_kind(self, card: Card) -> int:
+        """ Get the kind of a card, a new kind for a card not seen before """
+        kind = get_card_kind(card, -1)
+        if kind < 0:
+            kind = self.dict_kind_foreign.get(card, -1)
+            if kind < 0:
+                kind = self.cnt_kind
+                self.list_card_foreign.append(card)
+                self.dict_kind_foreign[card] = kind
+        return kind
+
+    def get_card(self, kind: int) -> Card:
+        """ Get the card of a kind """
+        if kind < len(CARD_TABLE):
+            return CARD_TABLE[kind]
+        return self.list_card_foreign[kind - len(CARD_TABLE)]
+
+
+class _Hand:
+    """ Card kinds of a player's hand, kept aligned with PlayerState.list_card, with counts by kind,
+    color and symbol """
+
+    def __init__(self, player: 'PlayerState', card_kinds: CardKinds) -> None:
+        self.player = player
+        self.card_kinds = card_kinds
+        self.list_card = player.list_card
+        self.list_kind: List[int] = []
+        self.cnt_kind: Dict[int, int] = {}  # only kinds in the hand
+        self.cnt_color: Dict[Optional[str], int] = {}
+        self.cnt_symbol: Dict[str, int] = {}
+        for card in player.list_card:
+            kind = card_kinds.get_kind(card)
+            self.list_kind.append(kind)
+            self._count(kind, 1)
+
+    def is_stale(self, player: 'PlayerState') -> bool:
+        """ Check if the hand was replaced or changed without the game """
+        return (player is not self.player or player.list_card is not self.list_card
+                or len(self.list_card) != len(self.list_kind))
+
+    def _count(self, kind: int, delta: int) -> None:
+        card = self.card_kinds.get_card(kind)
+        cnt = self.cnt_kind.get(kind, 0) + delta
+        if cnt > 0:
+            self.cnt_kind[kind] = cnt
+        else:
+            del self.cnt_kind[kind]
+        self.cnt_color[card.color] = self.cnt_color.get(card.color, 0) + delta
+        if card.symbol is not None:
+            self.cnt_symbol[card.symbol] = self.cnt_symbol.get(card.symbol, 0) + delta
+
+    def add(self, card: Card) -> None:
+        kind = self.card_kinds.get_kind(card)
+        self.list_card.append(card)
+        self.list_kind.append(kind)
+        self._count(kind, 1)
+
+    def extend(self, list_card: List[Card]) -> None:
+        """ Add several cards at once """
+        list_kind = [self.card_kinds.get_kind(card) for card in list_card]
+        self.list_card.extend(list_card)
+        self.list_kind.extend(list_kind)
+        cnt_kind, cnt_color, cnt_symbol = self.cnt_kind, self.cnt_color, self.cnt_symbol
+        get_card_of_kind = self.card_kinds.get_card
+        for kind in list_kind:  # _count inlined, drawing several cards is the common case
+            card = get_card_of_kind(kind)
+            cnt_kind[kind] = cnt_kind.get(kind, 0) + 1
+            cnt_color[card.color] = cnt_color.get(card.color, 0) + 1
+            if card.symbol is not None:
+                cnt_symbol[card.symbol] = cnt_symbol.get(card.symbol, 0) + 1
+
+    def remove(self, kind: int) -> Card:
+        """ Remove the first card of a kind from the hand, ValueError if there is none """
+        idx_card = self.list_kind.index(kind)
+        del self.list_kind[idx_card]
+        self._count(kind, -1)
+        return self.list_card.pop(idx_card)
+
+
 class Action(BaseModel):
+    """ Immutable action; its string and canonical key are built on first use and kept, so sorting,
+    comparing and hashing lists of actions does not render them again """
+    model_config = ConfigDict(frozen=True)
+
     card: Optional[Card] = None
     color: Optional[str] = None
     draw: Optional[int] = None
     uno: bool = False
 
-    def __lt__(self, other: 'Action') -> bool:
-        return str(self) < str(other)
-
-    def __str__(self) -> str:
+    @cached_property
+    def text(self) -> str:
         s = ''
         if self.card is not None:
             s += f'{self.card}'
@@ -56,6 +194,52 @@ class Action(BaseModel):
             s += f'UNO'
         return s
 
+    @cached_property
+    def key(self) -> str:
+        """ Canonical key, sorted by the string first and equal only for equal actions """
+        card = self.card or MASKED_CARD
+        return (f'{self.text}\0{self.card is not None:d}{card.color!r}{card.number!r}{card.symbol!r}'
+                f'{self.color!r}{self.draw!r}{self.uno:d}')
+
+    def model_copy(self, *, update: Optional[Mapping[str, Any]] = None, deep: bool = False) -> 'Action':
+        action = super().model_copy(update=update, deep=deep)
+        if update:  # the cached string and key belong to the original
+            action.__dict__.pop('text', None)
+            action.__dict__.pop('key', None)
+        return action
+
+    def __lt__(self, other: 'Action') -> bool:
+        return self.key < other.key
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Action):
+            return self.key == other.key
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __str__(self) -> str:
+        return self.text
+
+
+# Actions listed by the game, shared by key (kind, color, draw, uno) with kind -1 for drawing
+_dict_action: Dict[Tuple[int, Optional[str], Optional[int], bool], Action] = {}
+
+
+def get_action(kind: int, color: Optional[str] = None, draw: Optional[int] = None, uno: bool = False) -> Action:
+    """ Get the shared action instance for playing a card kind (or drawing with kind -1)
+
+    The engine only passes values it created itself, so the action is built once without validation;
+    actions from outside (e.g. websocket messages) are still validated by Action(...).
+    """
+    key = (kind, color, draw, uno)
+    action = _dict_action.get(key)
+    if action is None:
+        action = Action.model_construct(card=get_card(kind) if kind >= 0 else None, color=color, draw=draw, uno=uno)
+        _dict_action[key] = action
+    return action
+
 
 class PlayerState(BaseModel):
     name: Optional[str] = None
@@ -70,123 +254,9 @@ class GamePhase(str, Enum):
 
 class GameState(BaseModel):
     CNT_HAND_CARDS: int = 7
-    LIST_COLOR: List[str] = ["red", "green", "yellow", "blue", "any"]
-    LIST_SYMBOL: List[str] = ["skip", "reverse", "draw2", "wild", "wilddraw4"]
-    LIST_CARD: List[Card] = [
-        Card(color="red", number=0),
-        Card(color="green", number=0),
-        Card(color="yellow", number=0),
-        Card(color="blue", number=0),
-        Card(color="red", number=1),
-        Card(color="green", number=1),
-        Card(color="yellow", number=1),
-        Card(color="blue", number=1),
-        Card(color="red", number=2),
-        Card(color="green", number=2),
-        Card(color="yellow", number=2),
-        Card(color="blue", number=2),
-        Card(color="red", number=3),
-        Card(color="green", number=3),
-        Card(color="yellow", number=3),
-        Card(color="blue", number=3),
-        Card(color="red", number=4),
-        Card(color="green", number=4),
-        Card(color="yellow", number=4),
-        Card(color="blue", number=4),
-        Card(color="red", number=5),
-        Card(color="green", number=5),
-        Card(color="yellow", number=5),
-        Card(color="blue", number=5),
-        Card(color="red", number=6),
-        Card(color="green", number=6),
-        Card(color="yellow", number=6),
-        Card(color="blue", number=6),
-        Card(color="red", number=7),
-        Card(color="green", number=7),
-        Card(color="yellow", number=7),
-        Card(color="blue", number=7),
-        Card(color="red", number=8),
-        Card(color="green", number=8),
-        Card(color="yellow", number=8),
-        Card(color="blue", number=8),
-        Card(color="red", number=9),
-        Card(color="green", number=9),
-        Card(color="yellow", number=9),
-        Card(color="blue", number=9),
-        Card(color="red", number=1),
-        Card(color="green", number=1),
-        Card(color="yellow", number=1),
-        Card(color="blue", number=1),
-        Card(color="red", number=2),
-        Card(color="green", number=2),
-        Card(color="yellow", number=2),
-        Card(color="blue", number=2),
-        Card(color="red", number=3),
-        Card(color="green", number=3),
-        Card(color="yellow", number=3),
-        Card(color="blue", number=3),
-        Card(color="red", number=4),
-        Card(color="green", number=4),
-        Card(color="yellow", number=4),
-        Card(color="blue", number=4),
-        Card(color="red", number=5),
-        Card(color="green", number=5),
-        Card(color="yellow", number=5),
-        Card(color="blue", number=5),
-        Card(color="red", number=6),
-        Card(color="green", number=6),
-        Card(color="yellow", number=6),
-        Card(color="blue", number=6),
-        Card(color="red", number=7),
-        Card(color="green", number=7),
-        Card(color="yellow", number=7),
-        Card(color="blue", number=7),
-        Card(color="red", number=8),
-        Card(color="green", number=8),
-        Card(color="yellow", number=8),
-        Card(color="blue", number=8),
-        Card(color="red", number=9),
-        Card(color="green", number=9),
-        Card(color="yellow", number=9),
-        Card(color="blue", number=9),
-        # skip
-        Card(color="red", symbol="skip"),
-        Card(color="green", symbol="skip"),
-        Card(color="yellow", symbol="skip"),
-        Card(color="blue", symbol="skip"),
-        Card(color="red", symbol="skip"),
-        Card(color="green", symbol="skip"),
-        Card(color="yellow", symbol="skip"),
-        Card(color="blue", symbol="skip"),
-        # reverse
-        Card(color="red", symbol="reverse"),
-        Card(color="green", symbol="reverse"),
-        Card(color="yellow", symbol="reverse"),
-        Card(color="blue", symbol="reverse"),
-        Card(color="red", symbol="reverse"),
-        Card(color="green", symbol="reverse"),
-        Card(color="yellow", symbol="reverse"),
-        Card(color="blue", symbol="reverse"),
-        # draw2
-        Card(color="red", symbol="draw2"),
-        Card(color="green", symbol="draw2"),
-        Card(color="yellow", symbol="draw2"),
-        Card(color="blue", symbol="draw2"),
-        Card(color="red", symbol="draw2"),
-        Card(color="green", symbol="draw2"),
-        Card(color="yellow", symbol="draw2"),
-        Card(color="blue", symbol="draw2"),
-        # wild
-        Card(color="any", symbol="wild"),
-        Card(color="any", symbol="wild"),
-        Card(color="any", symbol="wild"),
-        Card(color="any", symbol="wild"),
-        # wilddraw4
-        Card(color="any", symbol="wilddraw4"),
-        Card(color="any", symbol="wilddraw4"),
-        Card(color="any", symbol="wilddraw4"),
-        Card(color="any", symbol="wilddraw4"),
-    ]
+    LIST_COLOR: ClassVar[Tuple[str, ...]] = ("red", "green", "yellow", "blue", "any")
+    LIST_SYMBOL: ClassVar[Tuple[str, ...]] = ("skip", "reverse", "draw2", "wild", "wilddraw4")
+    LIST_CARD: ClassVar[Tuple[Card, ...]] = tuple(CARD_TABLE[kind] for kind in DECK)  # shared by all states
 
     list_card_draw: List[Card] = []
     list_card_discard: List[Card] = []
@@ -226,8 +296,74 @@ class GameState(BaseModel):
         return s[:-1]
 
 
+class UnoRules(BaseModel):
+    """ House rules of a game, the defaults are the standard rules """
+    model_config = ConfigDict(frozen=True)
+
+    stack_draw4_on_draw2: bool = False  # a wilddraw4 may be played on a pending draw2 (6 cards to draw)
+    jump_in: bool = False  # a player holding the same card as the top card may play it out of turn
+    seven_zero: bool = False  # a 7 swaps hands with the next player, a 0 passes all hands on
+    cnt_penalty_uno: int = 4  # cards drawn for a missed UNO call
+
+
+def _get_effect(card: Card, rules: UnoRules) -> Optional[str]:
+    if card.symbol in ("skip", "reverse", "draw2", "wilddraw4"):
+        return card.symbol
+    if rules.seven_zero and card.symbol is None:
+        if card.number == 7:
+            return "swap"
+        if card.number == 0:
+            return "rotate"
+    return None
+
+
+class _RuleTable:
+    """ A rule variant compiled into lookups by card kind, so the variant costs nothing per turn """
+
+    def __init__(self, rules: UnoRules) -> None:
+        self.rules = rules
+        self.cnt_penalty_uno = rules.cnt_penalty_uno
+        self.list_effect = tuple(_get_effect(card, rules) for card in CARD_TABLE)
+        # cards which may be put on a pending draw2: colors to choose from and cards to draw then
+        self.dict_stack: Dict[int, Tuple[Tuple[str, ...], int]] = {
+            kind: ((card.color,), 4) for kind, card in enumerate(CARD_TABLE)
+            if card.symbol == "draw2" and card.color is not None}
+        if rules.stack_draw4_on_draw2:
+            self.dict_stack[get_card_kind(Card(color="any", symbol="wilddraw4"))] = (LIST_PLAY_COLOR, 6)
+        self.list_jump_in = tuple(rules.jump_in and card.color in LIST_PLAY_COLOR for card in CARD_TABLE)
+
+    def get_effect(self, kind: int, card: Card) -> Optional[str]:
+        """ Effect of playing a card of a kind: its symbol (but wild), swap, rotate or None """
+        if kind < len(self.list_effect):
+            return self.list_effect[kind]
+        return _get_effect(card, self.rules)
+
+
+@lru_cache(maxsize=None)
+def get_rule_table(rules: UnoRules) -> _RuleTable:
+    return _RuleTable(rules)
+
+
 class Uno(Game):
 
+    def __init__(self, rules: Optional[UnoRules] = None) -> None:
+        self.state = GameState()
+        self.rules = rules or UnoRules()
+        self._rule_table = get_rule_table(self.rules)
+        self._card_kinds = CardKinds()
+        self._hands: List[_Hand] = []
+
+    def _get_hand(self, idx_player: int) -> _Hand:
+        """ Get the card index of a player's hand, rebuilt if the state was changed from outside """
+        if len(self._hands) != len(self.state.list_player):
+            self._hands = [_Hand(player, self._card_kinds) for player in self.state.list_player]
+        hand = self._hands[idx_player]
+        player = self.state.list_player[idx_player]
+        if hand.is_stale(player):
+            hand = _Hand(player, self._card_kinds)
+            self._hands[idx_player] = hand
+        return hand
+
     def _is_card_playable(self, card_to_play: Card, top_card: Card) -> bool:
         """
         Determines if a card can be played on the current top card of the discard pile.
@@ -260,9 +396,11 @@ class Uno(Game):
 
     def set_state(self, state: GameState) -> None:
         self.state = state
+        self._card_kinds = CardKinds()
+        self._hands = []
 
         if not self.state.list_card_draw:
-            self.state.list_card_draw = self.state.LIST_CARD.copy()
+            self.state.list_card_draw = list(self.state.LIST_CARD)
             random.shuffle(self.state.list_card_draw)
             print("[DEBUG] Initial draw pile shuffled with 108 cards.")
 
@@ -336,142 +474,66 @@ class Uno(Game):
             print(f"\nPlayer {idx}: {player.name}")
             print(f"Cards: {player.list_card}")
 
+    def _get_action(self, kind: int, color: Optional[str], draw: Optional[int], uno: bool) -> Action:
+        """ Shared action for a card kind of the deck, a new one for a card which is not part of it """
+        if kind < len(CARD_TABLE):
+            return get_action(kind, color, draw, uno)
+        return Action.model_construct(card=self._card_kinds.get_card(kind), color=color, draw=draw, uno=uno)
+
+    def _add_play(self, actions: List[Action], kind: int, color: Optional[str], draw: Optional[int], cnt: int,
+                  with_uno: bool) -> None:
+        """ Add the actions to play one of cnt equal cards (with and without UNO call for the second last card) """
+        if with_uno:
+            actions += [self._get_action(kind, color, draw, True), self._get_action(kind, color, draw, False)] * cnt
+        else:
+            actions += [self._get_action(kind, color, draw, False)] * cnt
+
     def get_list_action(self) -> List[Action]:
-        if self.state.phase != GamePhase.RUNNING:
+        state = self.state
+        if state.phase != GamePhase.RUNNING or not state.list_card_discard:
             return []
 
+        # The hand index lists every distinct card once with its count, so the hand is never rescanned
         actions: List[Action] = []
-        current_player = self.state.list_player[self.state.idx_player_active or 0]
-
-        # Add safety check for empty discard pile
-        if not self.state.list_card_discard:
-            return []
-
-        current_card = self.state.list_card_discard[-1]
-
-        # If we have any pending draws (cnt_to_draw > 0), handle those scenarios first
-        if self.state.cnt_to_draw > 0:
-            # If cnt_to_draw > 2, must only draw the accumulated cards (e.g. 4)
-            if self.state.cnt_to_draw > 2:
-                return [Action(draw=self.state.cnt_to_draw)]
-
-            # If cnt_to_draw == 2 and top card is draw2, we can stack another draw2 if available
-            if self.state.cnt_to_draw == 2 and current_card.symbol == "draw2":
-
-                draw2_cards = [
-                    c for c in current_player.list_card if c.symbol == "draw2"
-                ]
-                if draw2_cards:
-                    # If we can stack another draw2, show ONLY the stacking actions (no normal draw)
-                    stack_actions = []
-                    for card in draw2_cards:
-                        if len(current_player.list_card) == 2:
-                            stack_actions.append(
-                                Action(card=card, color=card.color, draw=4, uno=True)
-                            )
-                            stack_actions.append(
-                                Action(card=card, color=card.color, draw=4, uno=False)
-                            )
-                        else:
-                            stack_actions.append(
-                                Action(card=card, color=card.color, draw=4)
-                            )
-
-                    # No stacking wanted
-                    stack_actions.append(
-                        Action(draw=self.state.cnt_to_draw)
-                    )
-
-                    return stack_actions
-                else:
-                    # No stack possible, must just draw the 2 cards
-                    return [Action(draw=self.state.cnt_to_draw)]
-
-            # If cnt_to_draw > 0 but not equal to 2 scenario (like cnt_to_draw=1 or another unusual case)
-            # Just return the forced draw action
-            return [Action(draw=self.state.cnt_to_draw)]
-
-        # If we reach here, cnt_to_draw == 0, proceed with normal logic
-        # Special case: if first card is wild and only one card on discard
-        if current_card.symbol == "wild" and len(self.state.list_card_discard) == 1:
-            playable_found = False
-            for card in current_player.list_card:
-                if len(current_player.list_card) == 2:
-                    actions.append(Action(card=card, color=card.color, uno=True))
-                    actions.append(Action(card=card, color=card.color, uno=False))
-                else:
-                    actions.append(Action(card=card, color=card.color))
-                playable_found = True
-            if not self.state.has_drawn:
-                actions.append(Action(draw=1))
+        hand = self._get_hand(state.idx_player_active or 0)
+        with_uno = len(hand.list_kind) == 2
+        current_card = state.list_card_discard[-1]
+
+        # Pending draws: stack another draw2 (or a wilddraw4 if the rules allow) on a draw2 or take the cards
+        if state.cnt_to_draw > 0:
+            if state.cnt_to_draw == 2 and current_card.symbol == "draw2":
+                for kind, (list_color, draw) in self._rule_table.dict_stack.items():
+                    cnt = hand.cnt_kind.get(kind, 0)
+                    if cnt > 0:
+                        for color in list_color:
+                            self._add_play(actions, kind, color, draw, cnt, with_uno)
+            actions.append(get_action(-1, draw=state.cnt_to_draw))
             return actions
 
-        # Normal matching scenario
-        playable_found = False
-        for card in current_player.list_card:
-            if card.symbol == "wild":
-                for col in ["red", "green", "yellow", "blue"]:
-                    if len(current_player.list_card) == 2:
-                        actions.append(Action(card=card, color=col, uno=True))
-                        actions.append(Action(card=card, color=col, uno=False))
-                    else:
-                        actions.append(Action(card=card, color=col))
-                playable_found = True
-            elif card.symbol == "wilddraw4":
-                # Can only play if no matching color card in hand
-                if not any(
-                        c.color == self.state.color
-                        for c in current_player.list_card
-                        if c != card and c.color != "any"
-                ):
-                    for col in ["red", "green", "yellow", "blue"]:
-                        if len(current_player.list_card) == 2:
-                            actions.append(
-                                Action(card=card, color=col, draw=4, uno=True)
-                            )
-                            actions.append(
-                                Action(card=card, color=col, draw=4, uno=False)
-                            )
-                        else:
-                            actions.append(Action(card=card, color=col, draw=4))
-                    playable_found = True
-            else:
-                # Match by color, number, or symbol
-                if (
-                        card.color == self.state.color
-                        or (card.symbol and card.symbol == current_card.symbol)
-                        or (
-                        card.number is not None
-                        and current_card.number is not None
-                        and card.number == current_card.number
-                )
-                ):
-                    if card.symbol == "draw2":
-                        # normal draw2 when cnt_to_draw=0
-                        if len(current_player.list_card) == 2:
-                            actions.append(
-                                Action(card=card, color=card.color, draw=2, uno=True)
-                            )
-                            actions.append(
-                                Action(card=card, color=card.color, draw=2, uno=False)
-                            )
-                        else:
-                            actions.append(Action(card=card, color=card.color, draw=2))
-                    else:
-                        if len(current_player.list_card) == 2:
-                            actions.append(
-                                Action(card=card, color=card.color, uno=True)
-                            )
-                            actions.append(
-                                Action(card=card, color=card.color, uno=False)
-                            )
-                        else:
-                            actions.append(Action(card=card, color=card.color))
-                    playable_found = True
-
-        if not self.state.has_drawn:
-            actions.append(Action(draw=1))
-
+        # Special case: if first card is wild, every card can be played
+        if current_card.symbol == "wild" and len(state.list_card_discard) == 1:
+            for kind, cnt in hand.cnt_kind.items():
+                card = self._card_kinds.get_card(kind)
+                self._add_play(actions, kind, card.color, None, cnt, with_uno)
+        else:
+            # wilddraw4 is only allowed without another card of the current color
+            cnt_color = hand.cnt_color.get(state.color, 0) if state.color != "any" else 0
+            for kind, cnt in hand.cnt_kind.items():
+                card = self._card_kinds.get_card(kind)
+                if card.symbol == "wild":
+                    for color in LIST_PLAY_COLOR:
+                        self._add_play(actions, kind, color, None, cnt, with_uno)
+                elif card.symbol == "wilddraw4":
+                    if cnt_color <= (cnt if card.color == state.color else 0):
+                        for color in LIST_PLAY_COLOR:
+                            self._add_play(actions, kind, color, 4, cnt, with_uno)
+                elif (card.color == state.color
+                      or (card.symbol and card.symbol == current_card.symbol)
+                      or (card.number is not None and card.number == current_card.number)):
+                    self._add_play(actions, kind, card.color, 2 if card.symbol == "draw2" else None, cnt, with_uno)
+
+        if not state.has_drawn:
+            actions.append(get_action(-1, draw=1))
         return actions
 
     def apply_action(self, action: Optional[Action]) -> None:
@@ -479,6 +541,7 @@ class Uno(Game):
             return
 
         current_player = self.state.list_player[self.state.idx_player_active or 0]
+        hand = self._get_hand(self.state.idx_player_active or 0)
 
         def move_to_next_player() -> None:
             self.state.idx_player_active = ((self.state.idx_player_active or 0) + self.state.direction
@@ -486,21 +549,23 @@ class Uno(Game):
             self.state.has_drawn = False
 
         if action and action.card:
-            current_player.list_card.remove(action.card)
+            kind = self._card_kinds.get_kind(action.card)
+            hand.remove(kind)
             self.state.list_card_discard.append(action.card)
             self.state.color = action.color if action.color else action.card.color
 
-            if action.card.symbol == "reverse":
+            effect = self._rule_table.get_effect(kind, action.card)
+            if effect == "reverse":
                 self.state.direction *= -1
-            elif action.card.symbol == "skip":
+            elif effect == "skip":
                 self.state.idx_player_active = ((self.state.idx_player_active or 0) + 2 * self.state.direction
                                                 ) % self.state.cnt_player
                 if len(current_player.list_card) == 0:
                     self.state.phase = GamePhase.FINISHED
                 return
-            elif action.card.symbol == "draw2":
+            elif effect == "draw2":
                 self.state.cnt_to_draw += 2
-            elif action.card.symbol == "wilddraw4":
+            elif effect == "wilddraw4":
                 self.state.cnt_to_draw += 4
 
             if len(current_player.list_card) == 0:
@@ -508,55 +573,244 @@ class Uno(Game):
                 return
 
             if len(current_player.list_card) == 1 and not action.uno:
-                for _ in range(4):
-                    if self.state.list_card_draw:
-                        current_player.list_card.append(self.state.list_card_draw.pop())
+                self._draw(hand, self._rule_table.cnt_penalty_uno)
+
+            if effect == "swap":
+                idx_player = self.state.idx_player_active or 0
+                self._move_hands([idx_player, (idx_player + self.state.direction) % self.state.cnt_player])
+            elif effect == "rotate":
+                self._move_hands([(i * self.state.direction) % self.state.cnt_player
+                                  for i in range(self.state.cnt_player)])
         elif action and action.draw:
-            cards_to_draw = action.draw
-            while cards_to_draw > 0:
-                if not self.state.list_card_draw:
-                    if len(self.state.list_card_discard) > 1:
-                        top_card = self.state.list_card_discard.pop()
-                        self.state.list_card_draw = self.state.list_card_discard
-                        self.state.list_card_discard = [top_card]
-                        random.shuffle(self.state.list_card_draw)
-                    else:
-                        break
-                current_player.list_card.append(self.state.list_card_draw.pop())
-                cards_to_draw -= 1
+            cards_to_draw = action.draw - self._draw(hand, action.draw)
+            if cards_to_draw > 0 and len(self.state.list_card_discard) > 1:
+                self._reshuffle()
+                self._draw(hand, cards_to_draw)
             self.state.has_drawn = True
             self.state.cnt_to_draw = 0
             return
 
         move_to_next_player()
 
+    def _move_hands(self, list_idx_player: List[int]) -> None:
+        """ Pass the hands along the players of the list: each one gets the hand of the one before """
+        list_player = self.state.list_player
+        list_hand = [self._get_hand(idx_player) for idx_player in list_idx_player]
+        for idx_player, hand in zip(list_idx_player[1:] + list_idx_player[:1], list_hand):
+            list_player[idx_player].list_card = hand.list_card
+            hand.player = list_player[idx_player]
+            self._hands[idx_player] = hand
+
+    def get_list_jump_in(self, idx_player: int) -> List[Action]:
+        """ Actions a player who is not active can jump in with (the same card as the top card, no pending draws) """
+        state = self.state
+        if (not self.rules.jump_in or state.phase != GamePhase.RUNNING or idx_player == state.idx_player_active
+                or state.cnt_to_draw > 0 or not state.list_card_discard):
+            return []
+        kind = self._card_kinds.get_kind(state.list_card_discard[-1])
+        hand = self._get_hand(idx_player)
+        cnt = hand.cnt_kind.get(kind, 0)
+        if cnt == 0 or not (kind < len(self._rule_table.list_jump_in) and self._rule_table.list_jump_in[kind]):
+            return []
+        card = self._card_kinds.get_card(kind)
+        actions: List[Action] = []
+        self._add_play(actions, kind, card.color, 2 if card.symbol == "draw2" else None, cnt, len(hand.list_kind) == 2)
+        return actions
+
+    def apply_jump_in(self, idx_player: int, action: Action) -> None:
+        """ Let a player jump in, the game goes on from this player as if it had been its turn """
+        if action not in self.get_list_jump_in(idx_player):
+            raise ValueError(f"Player {idx_player} cannot jump in with {action}")
+        self.state.idx_player_active = idx_player
+        self.state.has_drawn = False
+        self.apply_action(action)
+
+    def _draw(self, hand: _Hand, cnt: int) -> int:
+        """ Move up to cnt cards from the top (end) of the draw pile to the hand in one slice,
+        returns the number moved """
+        list_card_draw = self.state.list_card_draw
+        cnt = min(cnt, len(list_card_draw))
+        if cnt > 0:
+            hand.extend(list_card_draw[:-cnt - 1:-1])
+            del list_card_draw[-cnt:]
+        return cnt
+
+    def _reshuffle(self) -> None:
+        """ Shuffle the discard pile without its top card into the empty draw pile, both lists are kept
+
+        The cards are ordered by random keys in one sort, which takes half the time of random.shuffle.
+        """
+        list_card_discard = self.state.list_card_discard
+        list_card = list_card_discard[:-1]
+        del list_card_discard[:-1]
+        list_key = [random.random() for _ in list_card]
+        self.state.list_card_draw.extend(list_card[idx] for idx in sorted(range(len(list_card)),
+                                                                          key=list_key.__getitem__))
+
     def get_player_view(self, idx_player: Optional[int]) -> GameState:
-        masked_state = self.state.model_copy(deep=True)
-        for i, player in enumerate(masked_state.list_player):
-            if i != idx_player:
-                player.list_card = [Card(color=None, number=None, symbol=None)] * len(
-                    player.list_card
-                )
-        if masked_state.list_card_draw:
-            masked_state.list_card_draw = [
-                                              Card(color=None, number=None, symbol=None)
-                                          ] * len(masked_state.list_card_draw)
-        return masked_state
+        """ Build the masked state directly, sharing the immutable cards and hiding other hands and the draw pile
+
+        Hidden hands and the draw pile stay lists of MASKED_CARD and the discard pile is copied in full, as
+        the players and get_view_delta read hand sizes and the discard pile from the view. That costs a few
+        list copies of the size of the game, without validation or copying a card.
+        """
+        state = self.state
+        list_player = [
+            PlayerState.model_construct(
+                name=player.name,
+                list_card=list(player.list_card) if i == idx_player else [MASKED_CARD] * len(player.list_card))
+            for i, player in enumerate(state.list_player)]
+        return GameState.model_construct(
+            CNT_HAND_CARDS=state.CNT_HAND_CARDS,
+            list_card_draw=[MASKED_CARD] * len(state.list_card_draw),
+            list_card_discard=list(state.list_card_discard),
+            list_player=list_player,
+            phase=state.phase,
+            cnt_player=state.cnt_player,
+            idx_player_active=state.idx_player_active,
+            direction=state.direction,
+            color=state.color,
+            cnt_to_draw=state.cnt_to_draw,
+            has_drawn=state.has_drawn)
+
+
+# Scalar fields of a view sent in a delta whenever they change
+LIST_DELTA_FIELD: Tuple[str, ...] = ("phase", "idx_player_active", "direction", "color", "cnt_to_draw", "has_drawn")
+
+
+def _is_prefix(list_before: List[Card], list_after: List[Card]) -> bool:
+    return len(list_before) <= len(list_after) and all(
+        card_before is card_after or card_before == card_after
+        for card_before, card_after in zip(list_before, list_after))
+
+
+def get_view_delta(view_before: GameState, view_after: GameState) -> Dict[str, Any]:
+    """ Changes from one view of a game to a later one as a small JSON ready dict
+
+    Changed scalar fields are sent as they are and the draw pile by its size (cnt_card_draw). Cards
+    put on the discard pile come as list_card_discard_add, or the whole list_card_discard after a
+    reshuffle. list_hand has an entry per player: None if the hand did not change, its number of
+    cards if it is masked and its cards otherwise.
+    """
+    delta: Dict[str, Any] = {}
+    for name in LIST_DELTA_FIELD:
+        value = getattr(view_after, name)
+        if value != getattr(view_before, name):
+            delta[name] = value
+    if len(view_after.list_card_draw) != len(view_before.list_card_draw):
+        delta['cnt_card_draw'] = len(view_after.list_card_draw)
+    list_before, list_after = view_before.list_card_discard, view_after.list_card_discard
+    if not _is_prefix(list_before, list_after):
+        delta['list_card_discard'] = [card.model_dump() for card in list_after]
+    elif len(list_after) > len(list_before):
+        delta['list_card_discard_add'] = [card.model_dump() for card in list_after[len(list_before):]]
+    list_hand: List[Any] = []
+    for player_before, player_after in zip(view_before.list_player, view_after.list_player):
+        list_card = player_after.list_card
+        if len(list_card) == len(player_before.list_card) and _is_prefix(player_before.list_card, list_card):
+            list_hand.append(None)
+        elif all(card is MASKED_CARD for card in list_card):
+            list_hand.append(len(list_card))
+        else:
+            list_hand.append([card.model_dump() for card in list_card])
+    if any(hand is not None for hand in list_hand):
+        delta['list_hand'] = list_hand
+    return delta
 
 
 class RandomPlayer(Player):
     def select_action(
-            self, state: GameState, actions: List[Action]
+            self, state: GameState, actions: Sequence[Action]
     ) -> Optional[Action]:
-        my_actions = actions
-        if my_actions:
-            if len(my_actions) > 1:
-                for my_action in my_actions:
-                    if my_action.draw == 1:
-                        my_actions.remove(my_action)
-                        break
-            return random.choice(my_actions)
-        return None
+        """ Random action, drawing only if there is something else to do (the list is not changed) """
+        if not actions:
+            return None
+        cnt_action = len(actions)
+        if cnt_action == 1:
+            return actions[0]
+        idx_draw = next((idx for idx, action in enumerate(actions) if action.draw == 1), cnt_action)
+        if idx_draw == cnt_action:
+            return random.choice(actions)
+        idx_action = random.randrange(cnt_action - 1)
+        return actions[idx_action + 1 if idx_action >= idx_draw else idx_action]
+
+
+def _get_score_kind(dict_symbol: Dict[Optional[str], float], score_number: float) -> Tuple[float, ...]:
+    return tuple(dict_symbol[card.symbol] + score_number * (card.number or 0) for card in CARD_TABLE)
+
+
+class HeuristicPlayer(Player):
+    """ Plays the action with the highest score, ties broken at random; the UNO call is always made
+    and a card is only drawn if none can be played
+
+    The score of playing a card kind in a color is SCORE_KIND[kind] plus WEIGHT_COLOR times the number
+    of cards of that color in the hand. Actions are scored in place, so neither the actions nor the
+    state are copied or changed and the same scoring serves as a rollout policy on card kinds.
+    """
+    SCORE_KIND: ClassVar[Tuple[float, ...]] = (0.0,) * len(CARD_TABLE)
+    WEIGHT_COLOR: ClassVar[float] = 0.0
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.rng = random.Random(seed)
+        self._cnt_color: Dict[Optional[str], int] = {}
+
+    def count_colors(self, list_color: Iterable[Optional[str]]) -> None:
+        """ Count the colors of the hand the next scores are for """
+        cnt_color = self._cnt_color
+        cnt_color.clear()
+        for color in list_color:
+            cnt_color[color] = cnt_color.get(color, 0) + 1
+
+    def get_score(self, kind: int, color: Optional[str], uno: bool) -> float:
+        """ Score of playing a card kind (-1 for drawing) in a color """
+        if kind < 0:
+            return -1e9
+        score = self.SCORE_KIND[kind] if kind < len(self.SCORE_KIND) else 0.0
+        return score + self.WEIGHT_COLOR * self._cnt_color.get(color, 0) + (1e6 if uno else 0.0)
+
+    def select_index(self, list_kind: Iterable[int], list_color: Iterable[Optional[str]], list_uno: Iterable[bool],
+                     rng: random.Random) -> int:
+        """ Index of the best of the moves given as parallel sequences (after count_colors) """
+        idx_best, score_best, cnt_best = -1, -math.inf, 0
+        for idx, (kind, color, uno) in enumerate(zip(list_kind, list_color, list_uno)):
+            score = self.get_score(kind, color, uno)
+            if score > score_best:
+                idx_best, score_best, cnt_best = idx, score, 1
+            elif score == score_best:
+                cnt_best += 1
+                if rng.random() * cnt_best < 1.0:
+                    idx_best = idx
+        return idx_best
+
+    def select_action(self, state: GameState, actions: Sequence[Action]) -> Optional[Action]:
+        if not actions:
+            return None
+        self.count_colors(card.color for card in state.list_player[state.idx_player_active or 0].list_card)
+        idx_action = self.select_index(
+            (-1 if action.card is None else get_card_kind(action.card, len(CARD_TABLE)) for action in actions),
+            (action.color for action in actions), (action.uno for action in actions), self.rng)
+        return actions[idx_action]
+
+
+class PenaltyPlayer(HeuristicPlayer):
+    """ Plays the card that hurts the next player most: wilddraw4, draw2, skip and reverse, then high numbers """
+    SCORE_KIND = _get_score_kind(
+        {None: 0.0, "reverse": 10.0, "skip": 10.0, "draw2": 20.0, "wild": 5.0, "wilddraw4": 40.0}, 0.5)
+    WEIGHT_COLOR = 0.01
+
+
+class HoldWildsPlayer(HeuristicPlayer):
+    """ Keeps wild cards until nothing else can be played and gets rid of high numbers first """
+    SCORE_KIND = _get_score_kind(
+        {None: 10.0, "reverse": 10.0, "skip": 10.0, "draw2": 10.0, "wild": 0.0, "wilddraw4": 0.0}, 0.5)
+    WEIGHT_COLOR = 0.01
+
+
+class ColorMajorityPlayer(HeuristicPlayer):
+    """ Plays (and picks for wild cards) the color it holds most of, so it keeps cards to follow with """
+    SCORE_KIND = _get_score_kind(
+        {None: 0.0, "reverse": 0.0, "skip": 0.0, "draw2": 0.0, "wild": -5.0, "wilddraw4": -5.0}, 0.0)
+    WEIGHT_COLOR = 1.0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,364 @@
+"""Vectorized UNO engine for self-play in bulk
+
+UnoBatch keeps many games of the same number of players in NumPy arrays and advances all of them
+by one turn per call of step(). Hands are count vectors over the 54 card kinds of uno.CARD_TABLE,
+draw and discard piles are arrays of kinds with a fill count, and the rules are those of uno.Uno
+(the UNO call is made by the caller for all games of a step). An action is a code:
+
+    kind * 5 + color   play a card of this kind and choose a color (index in GameState.LIST_COLOR)
+    ACTION_DRAW        draw the pending cards (or one card)
+    ACTION_PASS        nothing left to do after drawing
+
+    python server/py/uno_batch.py --games 100000 --players 4
+"""
+
+import argparse
+import time
+from typing import Callable, Iterator, Optional, Tuple
+import numpy as np
+from server.py.uno import (Action, Card, GameState, GamePhase, PlayerState, CARD_TABLE, DECK,
+                           get_card_kind)
+
+LIST_COLOR = GameState.LIST_COLOR
+LIST_SYMBOL = GameState.LIST_SYMBOL
+CNT_KIND = len(CARD_TABLE)
+CNT_CARD = len(DECK)
+CNT_COLOR = len(LIST_COLOR)
+ACTION_DRAW = CNT_KIND * CNT_COLOR
+ACTION_PASS = -1
+CNT_ACTION = ACTION_DRAW + 1
+
+IDX_ANY = LIST_COLOR.index("any")
+SKIP, REVERSE, DRAW2, WILD, WILDDRAW4 = range(len(LIST_SYMBOL))
+
+KIND_COLOR = np.array([LIST_COLOR.index(card.color or "any") for card in CARD_TABLE], dtype=np.int64)
+KIND_NUMBER = np.array([-1 if card.number is None else card.number for card in CARD_TABLE], dtype=np.int64)
+KIND_SYMBOL = np.array([-1 if card.symbol is None else LIST_SYMBOL.index(card.symbol) for card in CARD_TABLE],
+                       dtype=np.int64)
+KIND_WILD = CARD_TABLE.index(Card(color="any", symbol="wild"))
+KIND_WILDDRAW4 = CARD_TABLE.index(Card(color="any", symbol="wilddraw4"))
+
+Policy = Callable[[np.ndarray, np.random.Generator], np.ndarray]
+# batch, rows of the games to move and their masks -> action codes of these rows
+Selector = Callable[['UnoBatch', np.ndarray, np.ndarray], np.ndarray]
+# batch, rows of the games to move, their game numbers, masks and action codes (called before the step)
+StepCallback = Callable[['UnoBatch', np.ndarray, np.ndarray, np.ndarray, np.ndarray], None]
+
+
+def get_action_code(action: Optional[Action]) -> int:
+    """ Code of an action of uno.Uno (the UNO call is not part of the code) """
+    if action is None:
+        return ACTION_PASS
+    if action.card is None:
+        return ACTION_DRAW
+    return get_card_kind(action.card) * CNT_COLOR + LIST_COLOR.index(action.color or action.card.color or "any")
+
+
+def get_action(code: int, cnt_card: int, cnt_to_draw: int, uno: bool = True) -> Optional[Action]:
+    """ Action of uno.Uno for a code, given the hand size and pending draws of the active player """
+    if code == ACTION_PASS:
+        return None
+    if code == ACTION_DRAW:
+        return Action(draw=cnt_to_draw if cnt_to_draw > 0 else 1)
+    card = CARD_TABLE[code // CNT_COLOR]
+    draw = None
+    if card.symbol == "draw2":
+        draw = 4 if cnt_to_draw > 0 else 2
+    elif card.symbol == "wilddraw4":
+        draw = 4
+    return Action(card=card, color=LIST_COLOR[code % CNT_COLOR], draw=draw, uno=uno and cnt_card == 2)
+
+
+def _count_kinds(kinds: np.ndarray) -> np.ndarray:
+    """ Count vectors (games x kinds) of a (games x cards) array of kinds """
+    cnt_game = kinds.shape[0]
+    offset = np.arange(cnt_game)[:, None] * CNT_KIND
+    return np.bincount((kinds + offset).ravel(), minlength=cnt_game * CNT_KIND).reshape(cnt_game, CNT_KIND)
+
+
+class UnoBatch:
+    """ cnt_game games of UNO with cnt_player players each, advanced together """
+
+    def __init__(self, cnt_game: int, cnt_player: int = 2, seed: Optional[int] = None,
+                 cnt_hand_cards: int = GameState().CNT_HAND_CARDS) -> None:
+        if cnt_game < 1 or cnt_player < 2 or cnt_player * cnt_hand_cards >= CNT_CARD:
+            raise ValueError("Invalid number of games, players or hand cards")
+        self.cnt_game = cnt_game
+        self.cnt_player = cnt_player
+        self.cnt_hand_cards = cnt_hand_cards
+        self.rng = np.random.default_rng(seed)
+        self.pile_draw = np.zeros((cnt_game, CNT_CARD), dtype=np.int64)
+        self.cnt_draw = np.zeros(cnt_game, dtype=np.int64)
+        self.pile_discard = np.zeros((cnt_game, CNT_CARD), dtype=np.int64)
+        self.cnt_discard = np.zeros(cnt_game, dtype=np.int64)
+        self.hand = np.zeros((cnt_game, cnt_player, CNT_KIND), dtype=np.int64)
+        self.color = np.zeros(cnt_game, dtype=np.int64)
+        self.direction = np.ones(cnt_game, dtype=np.int64)
+        self.idx_player_active = np.zeros(cnt_game, dtype=np.int64)
+        self.cnt_to_draw = np.zeros(cnt_game, dtype=np.int64)
+        self.has_drawn = np.zeros(cnt_game, dtype=bool)
+        self.winner = np.full(cnt_game, -1)
+        self.cnt_turn = np.zeros(cnt_game, dtype=np.int64)
+        self._rows = np.arange(cnt_game)
+        self.reset()
+
+    def reset(self, rows: Optional[np.ndarray] = None) -> None:
+        """ Start new games (all or the given ones): shuffle, deal and turn the first card like Uno.set_state """
+        rows = self._rows if rows is None else np.asarray(rows, dtype=np.int64)
+        cnt_rows = len(rows)
+        if cnt_rows == 0:
+            return
+        pile = np.asarray(DECK)[np.argsort(self.rng.random((cnt_rows, CNT_CARD)), axis=1)]
+        for idx_player in range(self.cnt_player):
+            end = CNT_CARD - idx_player * self.cnt_hand_cards
+            self.hand[rows, idx_player] = _count_kinds(pile[:, end - self.cnt_hand_cards:end])
+        cnt = CNT_CARD - self.cnt_player * self.cnt_hand_cards
+
+        # a wilddraw4 is put back and the draw pile reshuffled
+        redo = pile[:, cnt - 1] == KIND_WILDDRAW4
+        while redo.any():
+            pile[redo, :cnt] = np.take_along_axis(
+                pile[redo, :cnt], np.argsort(self.rng.random((int(redo.sum()), cnt)), axis=1), axis=1)
+            redo = pile[:, cnt - 1] == KIND_WILDDRAW4
+        top = pile[:, cnt - 1]
+        self.pile_draw[rows] = pile
+        self.cnt_draw[rows] = cnt - 1
+        self.pile_discard[rows, 0] = top
+        self.cnt_discard[rows] = 1
+
+        symbol = KIND_SYMBOL[top]
+        self.color[rows] = KIND_COLOR[top]
+        self.direction[rows] = np.where(symbol == REVERSE, -1, 1)
+        self.idx_player_active[rows] = np.where(symbol == SKIP, 1 % self.cnt_player, 0)
+        self.cnt_to_draw[rows] = np.where(symbol == DRAW2, 2, 0)
+        self.has_drawn[rows] = False
+        self.winner[rows] = -1
+        self.cnt_turn[rows] = 0
+
+    @property
+    def is_finished(self) -> np.ndarray:
+        return self.winner >= 0
+
+    def get_active_hand(self) -> np.ndarray:
+        """ Count vectors of the active players' hands (games x kinds) """
+        return self.hand[self._rows, self.idx_player_active]
+
+    def get_mask(self) -> np.ndarray:
+        """ Legal action codes of the active players (games x CNT_ACTION); pass if none is legal """
+        hand = self.get_active_hand()
+        has = hand > 0
+        top = self.pile_discard[self._rows, self.cnt_discard - 1]
+        symbol_top = KIND_SYMBOL[top]
+        mask = np.zeros((self.cnt_game, CNT_ACTION), dtype=bool)
+        plays = mask[:, :ACTION_DRAW].reshape(self.cnt_game, CNT_KIND, CNT_COLOR)
+
+        is_pending = self.cnt_to_draw > 0
+        is_stack = (self.cnt_to_draw == 2) & (symbol_top == DRAW2)
+        is_first_wild = ~is_pending & (symbol_top == WILD) & (self.cnt_discard == 1)
+        is_normal = ~is_pending & ~is_first_wild
+
+        # colored cards matching color, number or symbol (and draw2 stacking) are played in their own color
+        color = self.color[:, None]
+        match = ((KIND_COLOR == color)
+                 | ((KIND_SYMBOL == symbol_top[:, None]) & (KIND_SYMBOL >= 0))
+                 | ((KIND_NUMBER == KIND_NUMBER[top][:, None]) & (KIND_NUMBER >= 0)))
+        match &= (KIND_SYMBOL != WILD) & (KIND_SYMBOL != WILDDRAW4)
+        own = (match & is_normal[:, None]) | ((KIND_SYMBOL == DRAW2) & is_stack[:, None]) | is_first_wild[:, None]
+        plays[:, np.arange(CNT_KIND), KIND_COLOR] = has & own
+
+        # wild cards choose one of the four colors, wilddraw4 only without a card of the current color
+        cnt_color = (hand * (KIND_COLOR == color)).sum(axis=1) * (self.color != IDX_ANY)
+        plays[:, KIND_WILD, :IDX_ANY] = (has[:, KIND_WILD] & is_normal)[:, None]
+        plays[:, KIND_WILDDRAW4, :IDX_ANY] = (has[:, KIND_WILDDRAW4] & is_normal & (cnt_color == 0))[:, None]
+
+        mask[:, ACTION_DRAW] = is_pending | ~self.has_drawn
+        mask[self.is_finished] = False
+        return mask
+
+    def _next_player(self, rows: np.ndarray) -> None:
+        self.idx_player_active[rows] = (self.idx_player_active[rows] + self.direction[rows]) % self.cnt_player
+        self.has_drawn[rows] = False
+
+    def _reshuffle(self, idx_game: int) -> None:
+        """ Turn the discard pile without its top card into the new draw pile """
+        cnt = int(self.cnt_discard[idx_game]) - 1
+        top = self.pile_discard[idx_game, cnt]
+        self.pile_draw[idx_game, :cnt] = self.rng.permutation(self.pile_discard[idx_game, :cnt])
+        self.cnt_draw[idx_game] = cnt
+        self.pile_discard[idx_game, 0] = top
+        self.cnt_discard[idx_game] = 1
+
+    def _draw(self, rows: np.ndarray, cnt: np.ndarray, is_reshuffle: bool) -> None:
+        """ Move up to cnt cards from the draw pile to the active hand of each game in rows """
+        for i in range(int(cnt.max(initial=0))):
+            rows_i = rows[cnt > i]
+            if is_reshuffle:
+                for idx_game in rows_i[(self.cnt_draw[rows_i] == 0) & (self.cnt_discard[rows_i] > 1)]:
+                    self._reshuffle(int(idx_game))
+            rows_i = rows_i[self.cnt_draw[rows_i] > 0]
+            self.cnt_draw[rows_i] -= 1
+            kind = self.pile_draw[rows_i, self.cnt_draw[rows_i]]
+            self.hand[rows_i, self.idx_player_active[rows_i], kind] += 1
+
+    def step(self, actions: np.ndarray, uno: Optional[np.ndarray] = None) -> None:
+        """ Apply one action code per game (ignored for finished games); uno defaults to always calling UNO """
+        actions = np.asarray(actions)
+        uno = np.ones(self.cnt_game, dtype=bool) if uno is None else np.asarray(uno, dtype=bool)
+        live = ~self.is_finished
+        self.cnt_turn[live] += 1
+
+        rows = np.flatnonzero(live & (actions >= 0) & (actions < ACTION_DRAW))
+        if len(rows) > 0:
+            kind = actions[rows] // CNT_COLOR
+            idx_player = self.idx_player_active[rows]
+            self.hand[rows, idx_player, kind] -= 1
+            self.pile_discard[rows, self.cnt_discard[rows]] = kind
+            self.cnt_discard[rows] += 1
+            self.color[rows] = actions[rows] % CNT_COLOR
+            symbol = KIND_SYMBOL[kind]
+            self.direction[rows[symbol == REVERSE]] *= -1
+            self.cnt_to_draw[rows[symbol == DRAW2]] += 2
+            self.cnt_to_draw[rows[symbol == WILDDRAW4]] += 4
+            cnt_card = self.hand[rows, idx_player].sum(axis=1)
+            self.winner[rows[cnt_card == 0]] = idx_player[cnt_card == 0]
+            # skip moves on by two players right away (without the UNO check)
+            is_skip = symbol == SKIP
+            skip = rows[is_skip]
+            self.idx_player_active[skip] = (self.idx_player_active[skip] + 2 * self.direction[skip]) % self.cnt_player
+            is_on = ~is_skip & (cnt_card > 0)
+            penalty = rows[is_on & (cnt_card == 1) & ~uno[rows]]
+            self._draw(penalty, np.full(len(penalty), 4), is_reshuffle=False)
+            self._next_player(rows[is_on])
+
+        rows = np.flatnonzero(live & (actions == ACTION_DRAW))
+        if len(rows) > 0:
+            self._draw(rows, np.where(self.cnt_to_draw[rows] > 0, self.cnt_to_draw[rows], 1), is_reshuffle=True)
+            self.has_drawn[rows] = True
+            self.cnt_to_draw[rows] = 0
+
+        self._next_player(np.flatnonzero(live & (actions == ACTION_PASS)))
+
+    def get_state(self, idx_game: int) -> GameState:
+        """ One game as state of uno.Uno (hands sorted by kind) """
+        list_player = [PlayerState(name=f"Player{idx_player}",
+                                   list_card=[CARD_TABLE[kind] for kind in
+                                              np.repeat(np.arange(CNT_KIND), self.hand[idx_game, idx_player])])
+                       for idx_player in range(self.cnt_player)]
+        winner = int(self.winner[idx_game])
+        return GameState(
+            list_card_draw=[CARD_TABLE[kind] for kind in self.pile_draw[idx_game, :self.cnt_draw[idx_game]]],
+            list_card_discard=[CARD_TABLE[kind] for kind in self.pile_discard[idx_game, :self.cnt_discard[idx_game]]],
+            list_player=list_player,
+            phase=GamePhase.FINISHED if winner >= 0 else GamePhase.RUNNING,
+            cnt_player=self.cnt_player,
+            idx_player_active=int(self.idx_player_active[idx_game]),
+            direction=int(self.direction[idx_game]),
+            color=LIST_COLOR[self.color[idx_game]],
+            cnt_to_draw=int(self.cnt_to_draw[idx_game]),
+            has_drawn=bool(self.has_drawn[idx_game]))
+
+
+def _sample(mask: np.ndarray, weights: Optional[np.ndarray], rng: np.random.Generator) -> np.ndarray:
+    """ One legal action per row, with probabilities proportional to the weights of the action codes
+
+    Only the few legal entries of each row are looked at: their weights are summed up in one running
+    sum over all rows and a random point in each row's range is searched in it. Rows without a legal
+    action (or with zero total weight) get ACTION_PASS.
+    """
+    actions = np.full(len(mask), ACTION_PASS)
+    rows, codes = np.nonzero(mask)
+    if len(codes) == 0:
+        return actions
+    cum_weights = np.cumsum(np.ones(len(codes)) if weights is None else weights[codes])
+    end = np.cumsum(np.bincount(rows, minlength=len(mask)))
+    has = end > np.concatenate((np.zeros(1, dtype=end.dtype), end[:-1]))
+    end = end[has] - 1
+    start = np.concatenate((np.zeros(1, dtype=end.dtype), end[:-1] + 1))
+    base = np.where(start > 0, cum_weights[start - 1], 0.0)
+    total = cum_weights[end] - base
+    pick = np.searchsorted(cum_weights, base + rng.random(len(end)) * total, side='right')
+    actions[has] = np.where(total > 0, codes[np.minimum(pick, end)], ACTION_PASS)
+    return actions
+
+
+def random_policy(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """ Uniformly random legal action per game, ACTION_PASS where none is legal """
+    return _sample(mask, None, rng)
+
+
+def play_first_policy(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """ Random card if one can be played and drawing otherwise (like uno.RandomPlayer) """
+    mask = mask.copy()
+    mask[mask[:, :ACTION_DRAW].any(axis=1), ACTION_DRAW] = False
+    return _sample(mask, None, rng)
+
+
+def weighted_policy(weights: np.ndarray) -> Policy:
+    """ Policy choosing legal actions with probabilities proportional to weights (one per action code) """
+    weights = np.asarray(weights, dtype=float)
+
+    def policy(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return _sample(mask, weights, rng)
+    return policy
+
+
+def play_games(cnt_game: int, cnt_player: int, select: Selector, seed: Optional[int] = None, max_turns: int = 2000,
+               cnt_parallel: int = 10000,
+               on_step: Optional[StepCallback] = None) -> Iterator[Tuple[UnoBatch, np.ndarray, np.ndarray]]:
+    """ Play cnt_game games numbered 0 to cnt_game - 1, yield the batch, rows and numbers of the games that
+    ended (finished or after max_turns) after each step
+
+    At most cnt_parallel games run at the same time; the rows of the games that ended are reset for new
+    games after the yield, so the batch stays full until the last games. on_step is called before each
+    step, e.g. to log the turns.
+    """
+    batch = UnoBatch(min(cnt_game, cnt_parallel), cnt_player, seed)
+    is_counted = np.ones(batch.cnt_game, dtype=bool)
+    game = np.arange(batch.cnt_game, dtype=np.int64)
+    cnt_started = batch.cnt_game
+    while is_counted.any():
+        rows = np.flatnonzero(is_counted & ~batch.is_finished)
+        mask = batch.get_mask()[rows]
+        actions = np.full(batch.cnt_game, ACTION_PASS)
+        actions[rows] = select(batch, rows, mask)
+        if on_step is not None:
+            on_step(batch, rows, game[rows], mask, actions[rows])
+        batch.step(actions)
+
+        rows = np.flatnonzero(is_counted & (batch.is_finished | (batch.cnt_turn >= max_turns)))
+        yield batch, rows, game[rows]
+        cnt_new = min(len(rows), cnt_game - cnt_started)
+        batch.reset(rows[:cnt_new])
+        game[rows[:cnt_new]] = np.arange(cnt_started, cnt_started + cnt_new)
+        is_counted[rows[cnt_new:]] = False
+        cnt_started += cnt_new
+
+
+def simulate(cnt_game: int, cnt_player: int = 2, policy: Policy = play_first_policy, seed: Optional[int] = None,
+             max_turns: int = 2000, cnt_parallel: int = 10000) -> Tuple[np.ndarray, np.ndarray]:
+    """ Play cnt_game games with the same policy for all players, returns winners (-1 if unfinished) and turns
+
+    At most cnt_parallel games run at the same time (see play_games).
+    """
+    list_winner, list_turn = [], []
+    for batch, rows, _ in play_games(cnt_game, cnt_player, lambda batch, rows, mask: policy(mask, batch.rng), seed,
+                                     max_turns, cnt_parallel):
+        list_winner.append(batch.winner[rows])
+        list_turn.append(batch.cnt_turn[rows])
+    return np.concatenate(list_winner), np.concatenate(list_turn)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized UNO self-play")
+    parser.add_argument('--games', type=int, default=10000, help="number of games to play")
+    parser.add_argument('--players', type=int, default=2, help="number of players per game")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    time_start = time.perf_counter()
+    winners, turns = simulate(args.games, args.players, seed=args.seed)
+    time_wall = time.perf_counter() - time_start
+    print(f'Games:     {args.games} ({(winners >= 0).sum()} finished)')
+    print(f'Wins:      {" / ".join(str((winners == i).sum()) for i in range(args.players))}')
+    print(f'Avg turns: {turns.mean():.1f}')
+    print(f'Games/sec: {args.games / time_wall:.0f}')
@@ -0,0 +1,383 @@
+"""Information set Monte Carlo tree search (ISMCTS) player for UNO
+
+The player samples the cards it cannot see (opponents' hands and the draw pile) from its masked view,
+searches a tree shared by all these determinizations and plays random games to the end with a small
+integer engine that follows the rules of uno.Uno. Several worker processes can search in parallel
+from the same root and their visit counts are added up, e.g.:
+
+    python server/py/uno_ismcts.py --games 20 --time 0.2 --workers 4
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from server.py.game import Player
+from server.py.uno import (Uno, Action, GameState, GamePhase, RandomPlayer, HeuristicPlayer, PenaltyPlayer,
+                           HoldWildsPlayer, ColorMajorityPlayer, DECK, LIST_PLAY_COLOR, CardKinds, get_card_kind)
+
+# A move is (kind, color, uno) for playing a card and DRAW for drawing the pending cards (or one card)
+Move = Tuple[int, Optional[str], bool]
+DRAW: Move = (-1, None, False)
+
+
+class CardTable:
+    """ Color, number and symbol of each card kind, as plain lists indexed by kind """
+
+    def __init__(self, card_kinds: CardKinds) -> None:
+        cards = [card_kinds.get_card(kind) for kind in range(card_kinds.cnt_kind)]
+        self.list_color: List[Optional[str]] = [card.color for card in cards]
+        self.list_number: List[Optional[int]] = [card.number for card in cards]
+        self.list_symbol: List[Optional[str]] = [card.symbol for card in cards]
+
+
+class RolloutGame:
+    """ UNO on card kinds with the rules of uno.Uno, fast enough for thousands of playouts per move """
+
+    __slots__ = ('table', 'list_hand', 'list_draw', 'list_discard', 'color', 'direction', 'idx_player_active',
+                 'cnt_to_draw', 'has_drawn', 'winner', 'rng')
+
+    def __init__(self, table: CardTable, list_hand: List[List[int]], list_draw: List[int], list_discard: List[int],
+                 color: Optional[str], direction: int, idx_player_active: int, cnt_to_draw: int, has_drawn: bool,
+                 rng: random.Random) -> None:
+        self.table = table
+        self.list_hand = list_hand
+        self.list_draw = list_draw
+        self.list_discard = list_discard
+        self.color = color
+        self.direction = direction
+        self.idx_player_active = idx_player_active
+        self.cnt_to_draw = cnt_to_draw
+        self.has_drawn = has_drawn
+        self.winner: Optional[int] = None
+        self.rng = rng
+
+    @classmethod
+    def from_state(cls, state: GameState, rng: Optional[random.Random] = None) -> 'RolloutGame':
+        """ Copy a complete (unmasked) game state """
+        card_kinds = CardKinds()
+        list_hand = [[card_kinds.get_kind(card) for card in player.list_card] for player in state.list_player]
+        list_draw = [card_kinds.get_kind(card) for card in state.list_card_draw]
+        list_discard = [card_kinds.get_kind(card) for card in state.list_card_discard]
+        table = CardTable(card_kinds)
+        game = cls(table, list_hand, list_draw, list_discard, state.color, state.direction,
+                   state.idx_player_active or 0, state.cnt_to_draw, state.has_drawn, rng or random.Random())
+        if state.phase == GamePhase.FINISHED:
+            game.winner = next((i for i, hand in enumerate(list_hand) if not hand), state.idx_player_active)
+        return game
+
+    def get_list_move(self, with_optional_draw: bool = True) -> List[Move]:
+        """ Distinct legal moves of the active player; the UNO call is made whenever it is due
+
+        Without optional draw, drawing a card is only offered if no card can be played.
+        """
+        table = self.table
+        hand = self.list_hand[self.idx_player_active]
+        uno = len(hand) == 2
+        top = self.list_discard[-1]
+        moves: List[Move] = []
+        if self.cnt_to_draw > 0:
+            if self.cnt_to_draw == 2 and table.list_symbol[top] == "draw2":
+                for kind in set(hand):
+                    if table.list_symbol[kind] == "draw2":
+                        moves.append((kind, table.list_color[kind], uno))
+            moves.append(DRAW)
+            return moves
+
+        if table.list_symbol[top] == "wild" and len(self.list_discard) == 1:
+            moves = [(kind, table.list_color[kind], uno) for kind in set(hand)]
+        else:
+            color = self.color
+            cnt_color = 0 if color == "any" else sum(1 for kind in hand if table.list_color[kind] == color)
+            number_top = table.list_number[top]
+            symbol_top = table.list_symbol[top]
+            for kind in set(hand):
+                symbol = table.list_symbol[kind]
+                if symbol == "wild":
+                    moves += [(kind, play_color, uno) for play_color in LIST_PLAY_COLOR]
+                elif symbol == "wilddraw4":
+                    if cnt_color <= (hand.count(kind) if table.list_color[kind] == color else 0):
+                        moves += [(kind, play_color, uno) for play_color in LIST_PLAY_COLOR]
+                elif (table.list_color[kind] == color or (symbol and symbol == symbol_top)
+                      or (table.list_number[kind] is not None and table.list_number[kind] == number_top)):
+                    moves.append((kind, table.list_color[kind], uno))
+        if not self.has_drawn and (with_optional_draw or not moves):
+            moves.append(DRAW)
+        return moves
+
+    def _next_player(self) -> None:
+        self.idx_player_active = (self.idx_player_active + self.direction) % len(self.list_hand)
+        self.has_drawn = False
+
+    def apply_move(self, move: Optional[Move]) -> None:
+        """ Apply a move, None passes (nothing left to play after drawing) """
+        hand = self.list_hand[self.idx_player_active]
+        if move is None:
+            self._next_player()
+        elif move[0] >= 0:
+            kind, color, uno = move
+            hand.remove(kind)
+            self.list_discard.append(kind)
+            self.color = color if color else self.table.list_color[kind]
+            symbol = self.table.list_symbol[kind]
+            if symbol == "reverse":
+                self.direction = -self.direction
+            elif symbol == "skip":
+                if not hand:
+                    self.winner = self.idx_player_active
+                self.idx_player_active = (self.idx_player_active + 2 * self.direction) % len(self.list_hand)
+                return
+            elif symbol == "draw2":
+                self.cnt_to_draw += 2
+            elif symbol == "wilddraw4":
+                self.cnt_to_draw += 4
+            if not hand:
+                self.winner = self.idx_player_active
+                return
+            if len(hand) == 1 and not uno:
+                cnt = min(4, len(self.list_draw))
+                if cnt > 0:
+                    hand += reversed(self.list_draw[-cnt:])
+                    del self.list_draw[-cnt:]
+            self._next_player()
+        else:
+            cnt = self.cnt_to_draw if self.cnt_to_draw > 0 else 1
+            while cnt > 0:
+                if not self.list_draw:
+                    if len(self.list_discard) <= 1:
+                        break
+                    top = self.list_discard.pop()
+                    self.list_draw, self.list_discard = self.list_discard, [top]
+                    self.rng.shuffle(self.list_draw)
+                take = min(cnt, len(self.list_draw))
+                hand += reversed(self.list_draw[-take:])
+                del self.list_draw[-take:]
+                cnt -= take
+            self.has_drawn = True
+            self.cnt_to_draw = 0
+
+    def playout(self, max_turns: int, policy: Optional[HeuristicPlayer] = None) -> int:
+        """ Play random moves, or the moves of a heuristic policy, (drawing only if no card can be played)
+        to the end and return the winner
+
+        After max_turns the player with the fewest cards is taken as the winner.
+        """
+        rng = self.rng
+        list_color = self.table.list_color
+        turns = 0
+        while self.winner is None and turns < max_turns:
+            moves = self.get_list_move(with_optional_draw=False)
+            if not moves:
+                self.apply_move(None)
+            elif policy is None or len(moves) == 1:
+                self.apply_move(rng.choice(moves))
+            else:
+                policy.count_colors(list_color[kind] for kind in self.list_hand[self.idx_player_active])
+                self.apply_move(moves[policy.select_index((move[0] for move in moves), (move[1] for move in moves),
+                                                          (move[2] for move in moves), rng)])
+            turns += 1
+        if self.winner is not None:
+            return self.winner
+        return min(range(len(self.list_hand)), key=lambda i: len(self.list_hand[i]))
+
+
+class InfoSet:
+    """ What a player knows: its own hand, the discard pile and the number of hidden cards """
+
+    def __init__(self, state: GameState, idx_player: int) -> None:
+        self.idx_player = idx_player
+        self.card_kinds = CardKinds()
+        self.hand = [self.card_kinds.get_kind(card) for card in state.list_player[idx_player].list_card]
+        self.list_discard = [self.card_kinds.get_kind(card) for card in state.list_card_discard]
+        self.list_cnt_card = [len(player.list_card) for player in state.list_player]
+        self.cnt_draw = len(state.list_card_draw)
+        self.color = state.color
+        self.direction = state.direction
+        self.idx_player_active = state.idx_player_active or 0
+        self.cnt_to_draw = state.cnt_to_draw
+        self.has_drawn = state.has_drawn
+        self.table = CardTable(self.card_kinds)
+        unseen = Counter(DECK)
+        unseen.subtract(self.hand + self.list_discard)
+        self.list_unseen = sorted(unseen.elements())
+
+    def determinize(self, rng: random.Random) -> RolloutGame:
+        """ Deal the unseen cards randomly to the opponents and the draw pile """
+        pool = self.list_unseen.copy()
+        cnt_hidden = sum(self.list_cnt_card) - self.list_cnt_card[self.idx_player] + self.cnt_draw
+        if len(pool) < cnt_hidden:  # the state was not dealt from the standard deck
+            pool += rng.choices(DECK, k=cnt_hidden - len(pool))
+        rng.shuffle(pool)
+        list_hand = []
+        for i, cnt in enumerate(self.list_cnt_card):
+            if i == self.idx_player:
+                list_hand.append(self.hand.copy())
+            else:
+                list_hand.append(pool[-cnt:] if cnt > 0 else [])
+                del pool[len(pool) - cnt:]
+        return RolloutGame(self.table, list_hand, pool[:self.cnt_draw], self.list_discard.copy(), self.color,
+                           self.direction, self.idx_player_active, self.cnt_to_draw, self.has_drawn, rng)
+
+
+class _Node:
+    """ Search tree node reached by a move of idx_player """
+
+    __slots__ = ('parent', 'move', 'idx_player', 'children', 'cnt_visit', 'cnt_avail', 'reward')
+
+    def __init__(self, parent: Optional['_Node'], move: Optional[Move], idx_player: int) -> None:
+        self.parent = parent
+        self.move = move
+        self.idx_player = idx_player
+        self.children: Dict[Optional[Move], _Node] = {}
+        self.cnt_visit = 0
+        self.cnt_avail = 1
+        self.reward = 0.0
+
+
+def search(info: InfoSet, time_budget: float, max_iterations: Optional[int] = None, exploration: float = 0.7,
+           max_turns: int = 1000, seed: Optional[int] = None,
+           policy: Optional[HeuristicPlayer] = None) -> Dict[Optional[Move], int]:
+    """ Run ISMCTS from the information set and return the visit count of every root move
+
+    The playouts choose their moves at random or, if given, with the heuristic policy.
+    """
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_budget
+    root = _Node(None, None, -1)
+    iteration = 0
+    while (max_iterations is None or iteration < max_iterations) and time.perf_counter() < deadline:
+        iteration += 1
+        game = info.determinize(rng)
+        node = root
+        # selection and expansion: descend while all moves available in this determinization were tried
+        while game.winner is None:
+            moves: List[Optional[Move]] = list(game.get_list_move(with_optional_draw=False)) or [None]
+            untried = [move for move in moves if move not in node.children]
+            idx_player = game.idx_player_active
+            if untried:
+                move = rng.choice(untried)
+                node.children[move] = _Node(node, move, idx_player)
+                node = node.children[move]
+                game.apply_move(move)
+                break
+            children = [node.children[move] for move in moves]
+            for child in children:
+                child.cnt_avail += 1
+            node = max(children, key=lambda child: child.reward / child.cnt_visit
+                       + exploration * math.sqrt(math.log(child.cnt_avail) / child.cnt_visit))
+            game.apply_move(node.move)
+        winner = game.winner if game.winner is not None else game.playout(max_turns, policy)
+        while node is not root:
+            node.cnt_visit += 1
+            if node.idx_player == winner:
+                node.reward += 1.0
+            node = node.parent  # type: ignore[assignment]
+    return {move: child.cnt_visit for move, child in root.children.items()}
+
+
+def get_move(action: Action, cnt_card: int, card_kinds: Optional[CardKinds] = None) -> Move:
+    """ Search move of an action of the engine, with the kinds of the information set for cards which are
+    not part of the deck """
+    if action.card is None:
+        return DRAW
+    kind = get_card_kind(action.card) if card_kinds is None else card_kinds.get_kind(action.card)
+    return kind, action.color or action.card.color, action.uno and cnt_card == 2
+
+
+class ISMCTSPlayer(Player):
+    """ Plays the action with the most visits after searching for time_budget seconds
+
+    Like the random player it only draws a card if it cannot play one. A heuristic player given as
+    rollout_policy plays the simulated games instead of random moves.
+    With cnt_workers > 1 the search runs in that many processes, which are started on the first move
+    and kept until close() is called.
+    """
+
+    def __init__(self, time_budget: float = 1.0, cnt_workers: int = 1, max_iterations: Optional[int] = None,
+                 exploration: float = 0.7, seed: Optional[int] = None,
+                 rollout_policy: Optional[HeuristicPlayer] = None) -> None:
+        self.time_budget = time_budget
+        self.cnt_workers = max(1, cnt_workers)
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy
+        self.rng = random.Random(seed)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_executor'] = None  # worker processes are not copied along with the player
+        return state
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def select_action(self, state: GameState, actions: Sequence[Action]) -> Optional[Action]:
+        if len(actions) <= 1:
+            return actions[0] if actions else None
+        idx_player = state.idx_player_active or 0
+        info = InfoSet(state, idx_player)
+        list_seed = [self.rng.randrange(2 ** 32) for _ in range(self.cnt_workers)]
+        visits: Dict[Optional[Move], int] = Counter()
+        if self.cnt_workers == 1:
+            visits = search(info, self.time_budget, self.max_iterations, self.exploration, seed=list_seed[0],
+                            policy=self.rollout_policy)
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.cnt_workers)
+            futures = [self._executor.submit(search, info, self.time_budget, self.max_iterations, self.exploration,
+                                             seed=seed, policy=self.rollout_policy) for seed in list_seed]
+            for future in futures:
+                for move, cnt_visit in future.result().items():
+                    visits[move] += cnt_visit
+        cnt_card = len(info.hand)
+        dict_action: Dict[Move, Action] = {}
+        for action in actions:
+            dict_action.setdefault(get_move(action, cnt_card, info.card_kinds), action)
+        best = [move for move in sorted(visits, key=lambda move: -visits[move]) if move in dict_action]
+        return dict_action[best[0]] if best else self.rng.choice(list(actions))
+
+
+def play_match(players: List[Player], cnt_games: int, cnt_player: int = 2) -> List[int]:
+    """ Play cnt_games games between the players and count the wins of each seat """
+    list_win = [0] * cnt_player
+    for _ in range(cnt_games):
+        game = Uno()
+        game.set_state(GameState(cnt_player=cnt_player))
+        state = game.get_state()
+        while state.phase == GamePhase.RUNNING:
+            idx_player = state.idx_player_active or 0
+            action = players[idx_player].select_action(game.get_player_view(idx_player), game.get_list_action())
+            idx_before = state.idx_player_active
+            game.apply_action(action)
+            if state.phase == GamePhase.FINISHED:
+                list_win[idx_before or 0] += 1
+    return list_win
+
+
+# Opponents and rollout policies selectable on the command line
+DICT_PLAYER = {'random': RandomPlayer, 'penalty': PenaltyPlayer, 'holdwilds': HoldWildsPlayer,
+               'colormajority': ColorMajorityPlayer}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ISMCTS player against a random or heuristic player")
+    parser.add_argument('--games', type=int, default=10, help="number of games to play")
+    parser.add_argument('--time', type=float, default=0.2, help="time budget per move in seconds")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="number of search processes")
+    parser.add_argument('--opponent', choices=sorted(DICT_PLAYER), default='random', help="opponent player")
+    parser.add_argument('--rollout', choices=sorted(DICT_PLAYER), default='random', help="playout policy")
+    args = parser.parse_args()
+
+    policy = DICT_PLAYER[args.rollout]()
+    bot = ISMCTSPlayer(time_budget=args.time, cnt_workers=args.workers,
+                       rollout_policy=policy if isinstance(policy, HeuristicPlayer) else None)
+    wins = play_match([bot, DICT_PLAYER[args.opponent]()], args.games)
+    bot.close()
+    print(f'ISMCTS won {wins[0]} of {args.games} games against a {args.opponent} player')
@@ -0,0 +1,266 @@
+"""Learned UNO policy from batch self-play
+
+Each legal action of a state is described by a fixed-size feature vector: the hand after the action
+(size, cards of the chosen color, wild cards, cards of the best other color), the kind of action and
+the threat of the next player (hand size, attacked by skip, draw2 or wilddraw4). get_features computes
+the vectors of many (state, action) pairs of uno_batch games at once; get_view_features computes the
+same vectors for the few actions of one player view.
+
+A logistic regression of scikit-learn, fitted on self-play of uno_batch, learns whether the acting
+player goes on to win the game after the action. Its weights are kept in a LinearPolicy, so scoring
+all legal actions of a move is one matrix product:
+
+    python server/py/uno_learn.py --games 20000 --players 2 --out uno_policy.npz
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from sklearn.linear_model import LogisticRegression  # type: ignore[import-untyped]
+from server.py.game import Player
+from server.py.uno import Uno, Action, GameState, GamePhase
+from server.py.uno_batch import (UnoBatch, Policy, ACTION_DRAW, ACTION_PASS, CNT_COLOR, IDX_ANY, KIND_COLOR,
+                                 KIND_SYMBOL, LIST_COLOR, SKIP, REVERSE, DRAW2, WILDDRAW4, get_action_code,
+                                 play_games, random_policy, play_first_policy)
+
+CNT_ACTION_TYPE = 7  # number, the five symbols and drawing
+ACTION_TYPE_DRAW = CNT_ACTION_TYPE - 1
+CNT_FEATURE = 9 + CNT_ACTION_TYPE
+KIND_COLOR_ONEHOT = np.eye(CNT_COLOR, dtype=np.int64)[KIND_COLOR]
+# the four colors to play in, "any" counts as none of them
+COLOR_ONEHOT = np.eye(CNT_COLOR, dtype=np.int64) * (np.arange(CNT_COLOR) != IDX_ANY)
+
+# per action code: color of the card played (none for drawing), color chosen (-1 for drawing) and action type
+CODE_KIND = np.append(np.arange(ACTION_DRAW) // CNT_COLOR, 0)
+CODE_IS_DRAW = np.arange(ACTION_DRAW + 1) == ACTION_DRAW
+CODE_COLOR_PLAYED = KIND_COLOR_ONEHOT[CODE_KIND] * ~CODE_IS_DRAW[:, None]
+CODE_COLOR = np.append(np.arange(ACTION_DRAW) % CNT_COLOR, -1)
+CODE_TYPE_ONEHOT = np.eye(CNT_ACTION_TYPE)[np.where(CODE_IS_DRAW, ACTION_TYPE_DRAW, KIND_SYMBOL[CODE_KIND] + 1)]
+# playing a card hitting the next player, with two players a reverse acts as a skip
+CODE_IS_ATTACK = np.isin(KIND_SYMBOL[CODE_KIND], (SKIP, DRAW2, WILDDRAW4)) & ~CODE_IS_DRAW
+CODE_IS_ATTACK_2 = CODE_IS_ATTACK | ((KIND_SYMBOL[CODE_KIND] == REVERSE) & ~CODE_IS_DRAW)
+
+# the same tables as Python lists for single moves
+_DICT_COLOR_INDEX = {color: idx for idx, color in enumerate(LIST_COLOR)} | {None: IDX_ANY}
+_LIST_CODE_COLOR = CODE_COLOR.tolist()
+_LIST_CODE_KIND_COLOR = KIND_COLOR[CODE_KIND].tolist()
+_LIST_CODE_TYPE_ONEHOT = [tuple(row) for row in CODE_TYPE_ONEHOT.tolist()]
+_LIST_CODE_IS_ATTACK = CODE_IS_ATTACK.astype(float).tolist()
+_LIST_CODE_IS_ATTACK_2 = CODE_IS_ATTACK_2.astype(float).tolist()
+
+
+def get_features(cnt_color: np.ndarray, cnt_next: np.ndarray, cnt_to_draw: np.ndarray, color: np.ndarray,
+                 codes: np.ndarray, cnt_player: int) -> np.ndarray:
+    """ Feature vectors (rows x CNT_FEATURE) of action codes (not ACTION_PASS) given the number of cards
+    of each color in the active hands (rows x colors), the hand sizes of the next players, pending draws
+    and current colors """
+    is_draw = CODE_IS_DRAW[codes]
+    color_new = np.where(is_draw, color, CODE_COLOR[codes])
+    cnt_color = cnt_color - CODE_COLOR_PLAYED[codes]
+    cnt_hand = cnt_color.sum(axis=1) + is_draw * np.maximum(cnt_to_draw, 1)
+    cnt_in_color = (cnt_color * COLOR_ONEHOT[color_new]).sum(axis=1)
+    is_attack = (CODE_IS_ATTACK_2 if cnt_player == 2 else CODE_IS_ATTACK)[codes]
+    is_next_uno = cnt_next <= 2
+    cnt_best_color = cnt_color[:, :IDX_ANY].max(axis=1)
+    return np.column_stack((cnt_hand / 10, cnt_in_color / 10, (cnt_best_color - cnt_in_color) / 10,
+                            cnt_color[:, IDX_ANY] / 4, cnt_next / 10 * is_attack, is_next_uno * is_attack, is_next_uno,
+                            cnt_to_draw / 4, (color_new != color) & ~is_draw, CODE_TYPE_ONEHOT[codes]))
+
+
+def get_batch_features(batch: UnoBatch, rows: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """ Feature vectors of one action code per given game of the batch """
+    idx_next = (batch.idx_player_active[rows] + batch.direction[rows]) % batch.cnt_player
+    return get_features(batch.hand[rows, batch.idx_player_active[rows]] @ KIND_COLOR_ONEHOT,
+                        batch.hand[rows, idx_next].sum(axis=1), batch.cnt_to_draw[rows], batch.color[rows], codes,
+                        batch.cnt_player)
+
+
+def get_view_features(state: GameState, codes: List[int]) -> np.ndarray:
+    """ Feature vectors of action codes in the view of the active player, the same as get_features
+
+    A move has only a handful of actions, too few for NumPy to pay off, so the rows are built in plain
+    Python from the per-code tables and converted to an array once. """
+    idx_player = state.idx_player_active or 0
+    cnt_color = [0] * CNT_COLOR
+    for card in state.list_player[idx_player].list_card:
+        cnt_color[_DICT_COLOR_INDEX[card.color]] += 1
+    cnt_card = sum(cnt_color)
+    cnt_best_color = max(cnt_color[:IDX_ANY])
+    is_best_unique = cnt_color[:IDX_ANY].count(cnt_best_color) == 1
+    cnt_next = len(state.list_player[(idx_player + state.direction) % state.cnt_player].list_card)
+    is_next_uno = float(cnt_next <= 2)
+    to_draw = state.cnt_to_draw / 4
+    color = _DICT_COLOR_INDEX[state.color]
+    list_is_attack = _LIST_CODE_IS_ATTACK_2 if state.cnt_player == 2 else _LIST_CODE_IS_ATTACK
+    list_row = []
+    for code in codes:
+        if code == ACTION_DRAW:
+            color_new, idx_played, cnt_hand = color, -1, cnt_card + max(state.cnt_to_draw, 1)
+        else:
+            color_new, idx_played, cnt_hand = _LIST_CODE_COLOR[code], _LIST_CODE_KIND_COLOR[code], cnt_card - 1
+        cnt_in_color = cnt_color[color_new] - (idx_played == color_new) if color_new != IDX_ANY else 0
+        is_attack = list_is_attack[code]
+        cnt_best_after = cnt_best_color - (is_best_unique and 0 <= idx_played < IDX_ANY
+                                           and cnt_color[idx_played] == cnt_best_color)
+        list_row.append((cnt_hand / 10, cnt_in_color / 10, (cnt_best_after - cnt_in_color) / 10,
+                         (cnt_color[IDX_ANY] - (idx_played == IDX_ANY)) / 4, cnt_next / 10 * is_attack,
+                         is_next_uno * is_attack, is_next_uno, to_draw,
+                         float(color_new != color and code != ACTION_DRAW)) + _LIST_CODE_TYPE_ONEHOT[code])
+    return np.array(list_row)
+
+
+class LinearPolicy:
+    """ Weights of a linear model scoring feature vectors of actions """
+
+    def __init__(self, coef: np.ndarray, intercept: float = 0.0) -> None:
+        if coef.shape != (CNT_FEATURE,):
+            raise ValueError(f"Expected {CNT_FEATURE} weights")
+        self.coef = coef
+        self.intercept = intercept
+
+    @classmethod
+    def from_model(cls, model: LogisticRegression) -> 'LinearPolicy':
+        return cls(np.asarray(model.coef_[0], dtype=np.float64), float(model.intercept_[0]))
+
+    @classmethod
+    def load(cls, path: str) -> 'LinearPolicy':
+        with np.load(path) as data:
+            return cls(data['coef'], float(data['intercept']))
+
+    def save(self, path: str) -> None:
+        np.savez(path, coef=self.coef, intercept=self.intercept)
+
+    def score(self, features: np.ndarray) -> np.ndarray:
+        """ Log-odds of winning for each feature vector """
+        return np.asarray(features @ self.coef + self.intercept)
+
+    def select_codes(self, batch: UnoBatch, games: np.ndarray, mask: np.ndarray,
+                     rng: np.random.Generator) -> np.ndarray:
+        """ Best legal action code of each of the given games of the batch (mask rows in the same order),
+        ties broken at random """
+        actions = np.full(len(games), ACTION_PASS)
+        rows, codes = np.nonzero(mask)
+        if len(codes) == 0:
+            return actions
+        score = self.score(get_batch_features(batch, games[rows], codes)) + 1e-9 * rng.random(len(codes))
+        order = np.lexsort((score, rows))
+        is_last = np.append(rows[order][1:] != rows[order][:-1], True)
+        actions[rows[order][is_last]] = codes[order][is_last]
+        return actions
+
+
+BatchPolicy = Union[Policy, LinearPolicy]
+
+
+def _select(policy: BatchPolicy, batch: UnoBatch, games: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    if isinstance(policy, LinearPolicy):
+        return policy.select_codes(batch, games, mask, batch.rng)
+    return policy(mask, batch.rng)
+
+
+class LearnedPlayer(Player):
+    """ Plays the legal action with the highest score of a LinearPolicy, always calling UNO; the
+    actions are scored once per code, not per copy of a card """
+
+    def __init__(self, policy: LinearPolicy) -> None:
+        self.policy = policy
+
+    def select_action(self, state: GameState, actions: Sequence[Action]) -> Optional[Action]:
+        if len(actions) <= 1:
+            return actions[0] if actions else None
+        dict_action: Dict[int, Action] = {}
+        for action in actions:
+            code = get_action_code(action)
+            if action.uno or code not in dict_action:
+                dict_action[code] = action
+        list_code = list(dict_action)
+        list_score = self.policy.score(get_view_features(state, list_code)).tolist()
+        return dict_action[list_code[list_score.index(max(list_score))]]
+
+
+def generate_samples(cnt_game: int, cnt_player: int = 2, policy: BatchPolicy = play_first_policy,
+                     seed: Optional[int] = None, max_turns: int = 2000,
+                     cnt_parallel: int = 10000) -> Tuple[np.ndarray, np.ndarray]:
+    """ Features of the actions chosen in self-play with more than one legal action, and whether the
+    acting player won the game (unfinished games are left out) """
+    winner = np.full(cnt_game, -1)
+    list_features, list_game, list_player = [], [], []
+
+    def log_choices(batch: UnoBatch, rows: np.ndarray, game: np.ndarray, mask: np.ndarray,
+                    actions: np.ndarray) -> None:
+        is_choice = mask.sum(axis=1) > 1
+        list_features.append(get_batch_features(batch, rows[is_choice], actions[is_choice]))
+        list_game.append(game[is_choice])
+        list_player.append(batch.idx_player_active[rows[is_choice]])
+
+    for batch, rows, game in play_games(cnt_game, cnt_player, partial(_select, policy), seed, max_turns, cnt_parallel,
+                                        log_choices):
+        winner[game] = batch.winner[rows]
+    winner_sample = winner[np.concatenate(list_game)]
+    is_finished = winner_sample >= 0
+    features = np.concatenate(list_features)[is_finished]
+    return features, (winner_sample[is_finished] == np.concatenate(list_player)[is_finished])
+
+
+def train(features: np.ndarray, won: np.ndarray) -> LinearPolicy:
+    """ Fit a logistic regression of winning on the action features """
+    model = LogisticRegression(max_iter=1000)
+    model.fit(features, won)
+    return LinearPolicy.from_model(model)
+
+
+def play_batch_match(list_policy: List[BatchPolicy], cnt_game: int, seed: Optional[int] = None,
+                     max_turns: int = 2000) -> np.ndarray:
+    """ Play cnt_game games in one batch with a policy per seat, return the wins of each seat """
+    batch = UnoBatch(cnt_game, len(list_policy), seed)
+    while not (batch.is_finished | (batch.cnt_turn >= max_turns)).all():
+        mask = batch.get_mask()
+        actions = np.full(cnt_game, ACTION_PASS)
+        for idx_player, policy in enumerate(list_policy):
+            rows = np.flatnonzero((batch.idx_player_active == idx_player) & ~batch.is_finished)
+            actions[rows] = _select(policy, batch, rows, mask[rows])
+        batch.step(actions)
+    return np.bincount(batch.winner[batch.is_finished], minlength=batch.cnt_player)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train a linear UNO policy on batch self-play")
+    parser.add_argument('--games', type=int, default=20000, help="number of self-play games to learn from")
+    parser.add_argument('--players', type=int, default=2, help="number of players per game")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--out', default=None, help="file to save the weights to (.npz)")
+    args = parser.parse_args()
+
+    time_start = time.perf_counter()
+    features, won = generate_samples(args.games, args.players, seed=args.seed)
+    time_samples = time.perf_counter()
+    policy = train(features, won)
+    print(f'Samples:   {len(won)} in {time_samples - time_start:.1f}s, trained in '
+          f'{time.perf_counter() - time_samples:.1f}s')
+    for name, opponent in (('random', random_policy), ('play first', play_first_policy)):
+        wins = play_batch_match([policy] + [opponent] * (args.players - 1), 10000, args.seed)
+        print(f'Win rate against {name}: {wins[0] / wins.sum():.3f} (fair share {1 / args.players:.3f})')
+
+    player, cnt_move, time_move = LearnedPlayer(policy), 0, 0.0
+    for _ in range(20):
+        game = Uno()
+        with contextlib.redirect_stdout(io.StringIO()):
+            game.set_state(GameState(cnt_player=args.players))
+        while game.state.phase == GamePhase.RUNNING and cnt_move < 100000:
+            view, actions = game.get_player_view(game.state.idx_player_active), game.get_list_action()
+            time_move -= time.perf_counter()
+            action = player.select_action(view, actions)
+            time_move += time.perf_counter()
+            game.apply_action(action)
+            cnt_move += 1
+    print(f'Move time: {1e6 * time_move / cnt_move:.1f}us')
+    if args.out:
+        policy.save(args.out)
+
+
+if __name__ == "__main__":
+    main()
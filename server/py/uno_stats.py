@@ -0,0 +1,210 @@
+"""Game statistics of UNO self-play as columnar tables
+
+Self-play with uno_batch.UnoBatch is logged into two tables with compact column types:
+
+    games   one row per game: game, players, winner (-1 if unfinished), turns, first_kind
+    turns   one row per turn: game, turn, player, action (code of uno_batch), hand, to_draw
+
+The tables are produced in chunks of about cnt_turn_chunk turns, each chunk holding the games that
+finished in it, and can be written as numbered Parquet (with pyarrow or fastparquet installed) or CSV
+files. UnoReport aggregates chunks one after another, so logs of tens of millions of turns are never
+loaded at once:
+
+    python server/py/uno_stats.py --games 100000 --players 4 --out stats
+    python server/py/uno_stats.py --report stats --players 4
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd  # type: ignore[import-untyped]
+from server.py.uno_batch import (UnoBatch, Policy, ACTION_DRAW, KIND_SYMBOL, LIST_SYMBOL, play_first_policy,
+                                 play_games)
+
+Chunk = Tuple[pd.DataFrame, pd.DataFrame]
+
+DICT_GAME_DTYPE: Dict[str, type] = {'game': np.int64, 'players': np.int8, 'winner': np.int8, 'turns': np.int32,
+                                    'first_kind': np.int8}
+DICT_TURN_DTYPE: Dict[str, type] = {'game': np.int64, 'turn': np.int32, 'player': np.int8, 'action': np.int16,
+                                    'hand': np.int16, 'to_draw': np.int16}
+LIST_FORMAT = ['parquet', 'csv']
+LIST_EFFECT = ['number'] + list(LIST_SYMBOL)
+
+
+def get_default_format() -> str:
+    """ Parquet if an engine for it is installed, CSV otherwise """
+    if any(importlib.util.find_spec(name) for name in ('pyarrow', 'fastparquet')):
+        return 'parquet'
+    return 'csv'
+
+
+def _get_table(dict_column: Dict[str, List[np.ndarray]], dict_dtype: Dict[str, type]) -> pd.DataFrame:
+    return pd.DataFrame({name: np.concatenate(dict_column[name]).astype(dtype) if dict_column[name]
+                         else np.zeros(0, dtype=dtype) for name, dtype in dict_dtype.items()})
+
+
+def generate_chunks(cnt_game: int, cnt_player: int = 2, policy: Policy = play_first_policy,
+                    seed: Optional[int] = None, max_turns: int = 2000, cnt_parallel: int = 10000,
+                    cnt_turn_chunk: int = 1000000) -> Iterator[Chunk]:
+    """ Play cnt_game games like uno_batch.simulate and yield (games, turns) tables of about
+    cnt_turn_chunk turns each """
+    first_kind = np.zeros(cnt_game, dtype=np.int64)
+    dict_game: Dict[str, List[np.ndarray]] = {name: [] for name in DICT_GAME_DTYPE}
+    dict_turn: Dict[str, List[np.ndarray]] = {name: [] for name in DICT_TURN_DTYPE}
+    cnt_turn = 0
+
+    def log_turns(batch: UnoBatch, rows: np.ndarray, game: np.ndarray, _mask: np.ndarray,
+                  actions: np.ndarray) -> None:
+        nonlocal cnt_turn
+        is_new = batch.cnt_turn[rows] == 0
+        first_kind[game[is_new]] = batch.pile_discard[rows[is_new], 0]
+        idx_player = batch.idx_player_active[rows]
+        for name, column in (('game', game), ('turn', batch.cnt_turn[rows]), ('player', idx_player),
+                             ('action', actions), ('hand', batch.hand[rows, idx_player].sum(axis=1)),
+                             ('to_draw', batch.cnt_to_draw[rows])):
+            dict_turn[name].append(column)
+        cnt_turn += len(rows)
+
+    for batch, rows, game in play_games(cnt_game, cnt_player, lambda batch, rows, mask: policy(mask, batch.rng),
+                                        seed, max_turns, cnt_parallel, log_turns):
+        for name, column in (('game', game), ('players', np.full(len(rows), cnt_player)),
+                             ('winner', batch.winner[rows]), ('turns', batch.cnt_turn[rows]),
+                             ('first_kind', first_kind[game])):
+            dict_game[name].append(column)
+        if cnt_turn >= cnt_turn_chunk:
+            yield _get_table(dict_game, DICT_GAME_DTYPE), _get_table(dict_turn, DICT_TURN_DTYPE)
+            for dict_column in (dict_game, dict_turn):
+                for list_column in dict_column.values():
+                    list_column.clear()
+            cnt_turn = 0
+    if cnt_turn > 0:
+        yield _get_table(dict_game, DICT_GAME_DTYPE), _get_table(dict_turn, DICT_TURN_DTYPE)
+
+
+def write_chunk(games: pd.DataFrame, turns: pd.DataFrame, directory: str, idx_chunk: int,
+                fmt: Optional[str] = None) -> None:
+    """ Write one chunk as games-NNNNN and turns-NNNNN files """
+    fmt = fmt or get_default_format()
+    if fmt not in LIST_FORMAT:
+        raise ValueError(f"Unknown format {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    for name, table in (('games', games), ('turns', turns)):
+        path = os.path.join(directory, f'{name}-{idx_chunk:05d}.{fmt}')
+        if fmt == 'parquet':
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+
+
+def read_chunks(directory: str) -> Iterator[Chunk]:
+    """ Read the chunks written by write_chunk one at a time """
+    list_name = sorted(name for name in os.listdir(directory) if name.startswith('games-'))
+    for name in list_name:
+        fmt = name.rsplit('.', 1)[1]
+        if fmt not in LIST_FORMAT:
+            continue
+        list_table = []
+        for path, dict_dtype in ((os.path.join(directory, name), DICT_GAME_DTYPE),
+                                 (os.path.join(directory, 'turns-' + name[len('games-'):]), DICT_TURN_DTYPE)):
+            table = pd.read_parquet(path) if fmt == 'parquet' else pd.read_csv(path)
+            list_table.append(table.astype(dict_dtype))
+        yield list_table[0], list_table[1]
+
+
+class UnoReport:
+    """ Aggregates of games and turns tables, updated chunk by chunk for one number of players """
+
+    def __init__(self, cnt_player: int, max_turns: int = 2000) -> None:
+        self.cnt_player = cnt_player
+        self.cnt_game = 0
+        self.cnt_win = np.zeros(cnt_player, dtype=np.int64)
+        self.cnt_turn_game = np.zeros(max_turns + 1, dtype=np.int64)
+        self.cnt_effect = np.zeros(len(LIST_EFFECT), dtype=np.int64)
+        self.cnt_win_effect = np.zeros((len(LIST_EFFECT), cnt_player), dtype=np.int64)
+        self.sum_turn_effect = np.zeros(len(LIST_EFFECT), dtype=np.int64)
+        self.cnt_turn = np.zeros(cnt_player, dtype=np.int64)
+        self.cnt_draw = np.zeros(cnt_player, dtype=np.int64)
+        self.sum_hand = np.zeros(cnt_player, dtype=np.int64)
+
+    def update(self, games: pd.DataFrame, turns: pd.DataFrame) -> None:
+        """ Add the games and turns of one chunk """
+        if (games['players'] != self.cnt_player).any():
+            raise ValueError("Games with another number of players")
+        winner = games['winner'].to_numpy(np.int64)
+        cnt_turn_game = games['turns'].to_numpy(np.int64)
+        effect = KIND_SYMBOL[games['first_kind'].to_numpy(np.int64)] + 1
+        is_finished = winner >= 0
+        self.cnt_game += len(games)
+        self.cnt_win += np.bincount(winner[is_finished], minlength=self.cnt_player)
+        self.cnt_turn_game += np.bincount(np.minimum(cnt_turn_game, len(self.cnt_turn_game) - 1),
+                                          minlength=len(self.cnt_turn_game))
+        self.cnt_effect += np.bincount(effect, minlength=len(LIST_EFFECT))
+        self.sum_turn_effect += np.bincount(effect, weights=cnt_turn_game, minlength=len(LIST_EFFECT)).astype(np.int64)
+        np.add.at(self.cnt_win_effect, (effect[is_finished], winner[is_finished]), 1)
+
+        player = turns['player'].to_numpy(np.int64)
+        self.cnt_turn += np.bincount(player, minlength=self.cnt_player)
+        self.cnt_draw += np.bincount(player[turns['action'].to_numpy() == ACTION_DRAW], minlength=self.cnt_player)
+        self.sum_hand += np.bincount(player, weights=turns['hand'].to_numpy(), minlength=self.cnt_player).astype(
+            np.int64)
+
+    def get_seats(self) -> pd.DataFrame:
+        """ Win rate, share of draw actions and mean hand size per seat (seat 0 starts unless skipped) """
+        cnt_turn = np.maximum(self.cnt_turn, 1)
+        return pd.DataFrame({'win_rate': self.cnt_win / max(self.cnt_game, 1),
+                             'draw_rate': self.cnt_draw / cnt_turn,
+                             'hand': self.sum_hand / cnt_turn},
+                            index=pd.RangeIndex(self.cnt_player, name='seat'))
+
+    def get_first_card(self) -> pd.DataFrame:
+        """ Share of games, mean length and win rate of each seat by the effect of the first discard """
+        cnt_effect = np.maximum(self.cnt_effect, 1)
+        table = pd.DataFrame({'games': self.cnt_effect / max(self.cnt_game, 1),
+                              'turns': self.sum_turn_effect / cnt_effect},
+                             index=pd.Index(LIST_EFFECT, name='first_card'))
+        for idx_player in range(self.cnt_player):
+            table[f'win_rate_{idx_player}'] = self.cnt_win_effect[:, idx_player] / cnt_effect
+        return table[self.cnt_effect > 0]
+
+    def get_length(self) -> pd.Series:
+        """ Number of games, share finished and mean and percentiles of the game length in turns """
+        cnt_game = max(self.cnt_game, 1)
+        cum = np.cumsum(self.cnt_turn_game)
+        dict_length = {'games': float(self.cnt_game), 'finished': self.cnt_win.sum() / cnt_game,
+                       'mean': float(np.arange(len(cum)) @ self.cnt_turn_game) / cnt_game}
+        for percentile in (50, 90, 99):
+            dict_length[f'p{percentile}'] = float(np.searchsorted(cum, percentile / 100 * self.cnt_game))
+        return pd.Series(dict_length, name='turns')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="UNO self-play statistics")
+    parser.add_argument('--games', type=int, default=10000, help="number of games to play")
+    parser.add_argument('--players', type=int, default=2, help="number of players per game")
+    parser.add_argument('--seed', type=int, default=None, help="random seed")
+    parser.add_argument('--out', default=None, help="directory to write the tables to")
+    parser.add_argument('--format', choices=LIST_FORMAT, default=None, help="file format of the tables")
+    parser.add_argument('--report', default=None, help="directory of tables to report on instead of playing")
+    args = parser.parse_args()
+
+    time_start = time.perf_counter()
+    if args.report:
+        chunks = read_chunks(args.report)
+    else:
+        chunks = generate_chunks(args.games, args.players, seed=args.seed)
+    report = UnoReport(args.players)
+    for idx_chunk, (games, turns) in enumerate(chunks):
+        report.update(games, turns)
+        if args.out:
+            write_chunk(games, turns, args.out, idx_chunk, args.format)
+    print(report.get_seats().round(3), end='\n\n')
+    print(report.get_first_card().round(3), end='\n\n')
+    print(report.get_length().round(1))
+    print(f'Seconds: {time.perf_counter() - time_start:.1f}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import random
+import pytest
+from server.py.battleship import (Battleship, BattleshipGameState, BattleshipAction, ActionType, GamePhase,
+                                  PlayerState, Ship, RandomPlayer, ShotActionList, PlacementActionList,
+                                  PlacementPlayer, PlacementStrategy, get_column_name, get_board_geometry)
+
+
+def play_setup(game: Battleship) -> None:
+    player = RandomPlayer()
+    while game.get_state().phase == GamePhase.SETUP:
+        actions = game.get_list_action()
+        game.apply_action(player.select_action(game.get_state(), actions))
+
+
+def test_column_names():
+    """Test 001: Column names continue after Z like a spreadsheet"""
+    assert get_column_name(0) == 'A'
+    assert get_column_name(25) == 'Z'
+    assert get_column_name(26) == 'AA'
+    assert get_column_name(27) == 'AB'
+    assert get_column_name(26 + 26 * 26) == 'AAA'
+
+
+def test_default_board():
+    """Test 002: Default game uses a 10x10 board with the standard fleet"""
+    game = Battleship()
+    state = game.get_state()
+    assert (state.cnt_cols, state.cnt_rows) == (10, 10)
+    assert sorted(ship.length for ship in state.players[0].ships) == [2, 3, 3, 4, 5]
+    play_setup(game)
+    cells = {action.location[0] for action in game.get_list_action()}
+    assert cells == set(get_board_geometry(10, 10).list_cell)
+    assert 'J10' in cells and 'K1' not in cells
+
+
+def test_configurable_board_and_fleet():
+    """Test 003: Board size and fleet are configurable and placements stay on the board"""
+    fleet = [(f'ship{i}', 2 + i % 4) for i in range(12)]
+    game = Battleship(cnt_cols=30, cnt_rows=20, fleet=fleet)
+    play_setup(game)
+    state = game.get_state()
+    assert state.phase == GamePhase.RUNNING
+    valid_cells = set(get_board_geometry(30, 20).list_cell)
+    for player in state.players:
+        assert len(player.ships) == 12
+        locations = [cell for ship in player.ships for cell in ship.location]
+        assert len(locations) == len(set(locations))
+        assert set(locations) <= valid_cells
+    assert len(game.get_list_action()) == 30 * 20
+
+
+def test_setup_actions_avoid_occupied_cells():
+    """Test 004: Set ship actions never overlap ships already placed"""
+    game = Battleship(cnt_cols=5, cnt_rows=5, fleet=[('a', 5), ('b', 2)])
+    game.apply_action(BattleshipAction(ActionType.SET_SHIP, 'a', ['A3', 'B3', 'C3', 'D3', 'E3']))
+    actions = game.get_list_action()
+    assert all(action.ship_name == 'b' for action in actions)
+    row3 = {'A3', 'B3', 'C3', 'D3', 'E3'}
+    assert all(not set(action.location) & row3 for action in actions)
+    # 4 columns x 2 vertical slots + 2 blocks of 2 rows x 4 horizontal slots
+    assert len(actions) == 5 * 2 + 4 * 4
+
+
+def test_invalid_configuration():
+    """Test 005: Invalid configurations are rejected"""
+    with pytest.raises(ValueError):
+        Battleship(cnt_cols=0, cnt_rows=10)
+    with pytest.raises(ValueError):
+        Battleship(fleet=[('a', 2), ('a', 3)])
+    with pytest.raises(ValueError):
+        Battleship(cnt_cols=3, cnt_rows=3, fleet=[('a', 4)])
+    with pytest.raises(ValueError):
+        Battleship(cnt_cols=2, cnt_rows=2, fleet=[('a', 2), ('b', 2), ('c', 1)])
+
+
+def test_shoot_and_win():
+    """Test 006: Shots are remembered and sinking all ships finishes the game"""
+    ships0 = [Ship('destroyer', 2, ['A1', 'A2'])]
+    ships1 = [Ship('destroyer', 2, ['AA1', 'AB1'])]
+    player0 = PlayerState('Player 1', ships0, [], [])
+    player1 = PlayerState('Player 2', ships1, [], [])
+    game = Battleship(cnt_cols=30, cnt_rows=1, fleet=[('destroyer', 2)])
+    game.set_state(BattleshipGameState(0, GamePhase.RUNNING, None, [player0, player1], cnt_cols=30, cnt_rows=1))
+    for cell_you, cell_opponent in (('AA1', 'J1'), ('J1', 'K1')):
+        game.apply_action(BattleshipAction(ActionType.SHOOT, None, [cell_you]))
+        game.apply_action(BattleshipAction(ActionType.SHOOT, None, [cell_opponent]))
+    game.apply_action(BattleshipAction(ActionType.SHOOT, None, ['J1']))  # already shot, ignored
+    state = game.get_state()
+    assert state.idx_player_active == 0
+    assert player0.shots == ['AA1', 'J1']
+    assert player0.successful_shots == ['AA1']
+    game.apply_action(BattleshipAction(ActionType.SHOOT, None, ['AB1']))
+    assert state.phase == GamePhase.FINISHED
+    assert state.winner == 0
+
+
+def test_state_changed_outside_game():
+    """Test 007: Shot options follow changes made directly to the state"""
+    game = Battleship()
+    play_setup(game)
+    game.get_state().players[0].shots.append('C3')
+    cells = {action.location[0] for action in game.get_list_action()}
+    assert len(cells) == 99
+    assert 'C3' not in cells
+
+
+def test_player_view_masks_opponent():
+    """Test 008: Player view hides the opponent's ships without copying the state"""
+    game = Battleship()
+    play_setup(game)
+    state = game.get_state()
+    view = game.get_player_view(0)
+    assert view.players[0].ships[0].location == tuple(state.players[0].ships[0].location)
+    assert [ship.name for ship in view.players[1].ships] == [ship.name for ship in state.players[1].ships]
+    assert [ship.length for ship in view.players[1].ships] == [ship.length for ship in state.players[1].ships]
+    assert all(ship.location is None for ship in view.players[1].ships)
+    assert all(ship.location is not None for ship in state.players[1].ships)
+    assert view.players[1].shots == tuple(state.players[1].shots)
+    assert (view.cnt_cols, view.cnt_rows) == (10, 10)
+    dict_view = view.model_dump()
+    assert dict_view['phase'] == 'running' and dict_view['cnt_cols'] == 10
+    assert all(ship['location'] is None for ship in dict_view['players'][1]['ships'])
+    assert dict_view['players'][0]['ships'][0]['location'] == state.players[0].ships[0].location
+
+
+def test_player_view_is_live_and_read_only():
+    """Test 009: The same view object follows the game state and cannot change it"""
+    game = Battleship()
+    view = game.get_player_view(1)
+    assert game.get_player_view(1) is view
+    play_setup(game)
+    assert view.phase == GamePhase.RUNNING
+    game.apply_action(game.get_list_action()[0])
+    assert view.idx_player_active == 1
+    assert view.players[0].shots == ('A1',)
+    with pytest.raises(AttributeError):
+        view.phase = GamePhase.FINISHED
+    with pytest.raises(AttributeError):
+        view.players[0].ships[0].location = ['A1']
+    for player in view.players:  # the own player too
+        with pytest.raises(AttributeError):
+            player.shots.append('B1')
+        with pytest.raises(AttributeError):
+            player.successful_shots.append('B1')
+        with pytest.raises(AttributeError):
+            player.ships[0].location = ['A1']
+    assert game.get_state().players[1].ships[0].location is not None
+    assert game.get_state().players[0].shots == ['A1']
+    game.reset()
+    assert view.phase == GamePhase.SETUP
+    assert view.players[0].shots == ()
+
+
+def test_lazy_shot_actions():
+    """Test 010: Shoot actions support len, indexing and sampling and track the shots"""
+    game = Battleship(cnt_cols=40, cnt_rows=40)
+    play_setup(game)
+    actions = game.get_list_action()
+    assert isinstance(actions, ShotActionList)
+    assert len(actions) == 1600
+    assert actions[0].location == ['A1']
+    assert actions[-1].action_type == ActionType.SHOOT
+    assert len(actions[10:20]) == 10
+    sample = random.sample(actions, 5)
+    assert len({action.location[0] for action in sample}) == 5
+    game.apply_action(actions[0])
+    with pytest.raises(RuntimeError):
+        len(actions)
+    game.apply_action(game.get_list_action()[0])
+    actions = game.get_list_action()
+    assert len(actions) == 1599
+    assert 'A1' not in {action.location[0] for action in actions}
+
+
+def test_action_has_slots():
+    """Test 011: Actions are compact objects without a per-instance dict"""
+    action = BattleshipAction(ActionType.SHOOT, None, ['A1'])
+    assert not hasattr(action, '__dict__')
+
+
+@pytest.mark.parametrize('strategy', list(PlacementStrategy))
+def test_placement_player(strategy):
+    """Test 012: Placement players set a valid fleet without generating the placement actions"""
+    fleet = [(f'ship{i}', 2 + i % 4) for i in range(20)]
+    game = Battleship(cnt_cols=40, cnt_rows=30, fleet=fleet)
+    player = PlacementPlayer(strategy)
+    for _ in range(40):
+        actions = game.get_list_action()
+        assert isinstance(actions, PlacementActionList)
+        game.apply_action(player.select_action(game.get_player_view(game.get_state().idx_player_active), actions))
+    state = game.get_state()
+    assert state.phase == GamePhase.RUNNING
+    for player_state in state.players:
+        locations = [cell for ship in player_state.ships for cell in ship.location]
+        assert len(locations) == len(set(locations)) == sum(length for _, length in fleet)
+    assert player.select_action(state, game.get_list_action()).action_type == ActionType.SHOOT
+
+
+def test_placement_player_crowded_board():
+    """Test 013: Placement players fill a board that has exactly enough space"""
+    game = Battleship(cnt_cols=4, cnt_rows=2, fleet=[('a', 4), ('b', 4)])
+    player = PlacementPlayer(PlacementStrategy.UNIFORM)
+    while game.get_state().phase == GamePhase.SETUP:
+        game.apply_action(player.select_action(game.get_state(), game.get_list_action()))
+    assert sorted(len(ship.location) for ship in game.get_state().players[1].ships) == [4, 4]
+
+
+def test_edge_avoiding_weights():
+    """Test 014: Edge avoiding placements are less likely at the border than uniform ones"""
+    geometry = get_board_geometry(10, 10)
+    for strategy in PlacementStrategy:
+        weights = geometry.get_cum_weights(3, strategy, (2, 3, 3, 4, 5))
+        assert len(weights) == len(geometry.get_placements(3))
+    edge = geometry.get_cum_weights(3, PlacementStrategy.EDGE_AVOIDING, ())
+    uniform = geometry.get_cum_weights(3, PlacementStrategy.UNIFORM, ())
+    # first placement (A1-C1 horizontally) touches the border with all cells
+    assert edge[0] / edge[-1] < uniform[0] / uniform[-1]
+
+
+def test_action_dict_round_trip():
+    """Test 015: Actions are sent to and read from the client as dicts"""
+    action = BattleshipAction(ActionType.SET_SHIP, 'destroyer', ['A1', 'A2'])
+    data = action.to_dict()
+    assert data == {'action_type': 'set_ship', 'ship_name': 'destroyer', 'location': ['A1', 'A2']}
+    action = BattleshipAction.from_dict(data)
+    assert (action.action_type, action.ship_name, action.location) == (ActionType.SET_SHIP, 'destroyer', ['A1', 'A2'])
+    assert BattleshipAction.from_dict({'action_type': 'shoot', 'location': ['B3']}).ship_name is None
+    with pytest.raises(ValueError):
+        BattleshipAction.from_dict({'action_type': 'jump', 'ship_name': None, 'location': []})
+
+
+def test_singleplayer_websocket(monkeypatch):
+    """Test 016: The singleplayer route plays the setup and a shot of the client against the placement player"""
+    from fastapi.testclient import TestClient  # pylint: disable=import-outside-toplevel
+    import server.py.main as main  # pylint: disable=import-outside-toplevel
+
+    sleep = main.asyncio.sleep
+
+    async def no_delay(_seconds):
+        await sleep(0)
+
+    monkeypatch.setattr(main.asyncio, 'sleep', no_delay)
+    with TestClient(main.app).websocket_connect('/battleship/singleplayer/ws') as websocket:
+        data = websocket.receive_json()
+        while data['state']['phase'] != 'running' or not data['state']['list_action']:
+            if data['state']['list_action']:
+                websocket.send_json({'type': 'action', 'action': data['state']['list_action'][0]})
+            data = websocket.receive_json()
+        assert all(ship['location'] for ship in data['state']['players'][0]['ships'])
+        assert all(ship['location'] is None for ship in data['state']['players'][1]['ships'])
+        action = data['state']['list_action'][0]
+        assert action['action_type'] == 'shoot'
+        websocket.send_json({'type': 'action', 'action': action})
+        data = websocket.receive_json()
+        assert data['state']['players'][0]['shots'] == action['location']
+        data = websocket.receive_json()
+        assert len(data['state']['players'][1]['shots']) == 1
@@ -0,0 +1,30 @@
+from server.py.battleship import Battleship, RandomPlayer
+from server.py.battleship_simulation import play_game, simulate
+
+
+def test_play_game():
+    """Test 001: A single game is played to the end and timed"""
+    stats = play_game(Battleship(), (RandomPlayer(), RandomPlayer()))
+    assert stats.cnt_games == 1
+    assert stats.cnt_finished == 1
+    assert sum(stats.list_win) == 1
+    assert stats.cnt_turns >= 10 + 2 * 17 - 1
+    assert stats.time_setup > 0 and stats.time_shooting > 0
+
+
+def test_simulate_inline():
+    """Test 002: Batch simulation in the current process reports throughput"""
+    report = simulate(5, (RandomPlayer(), RandomPlayer()), cnt_workers=1, cnt_cols=12, cnt_rows=8, seed=3)
+    assert report.stats.cnt_games == 5
+    assert report.stats.cnt_finished == 5
+    assert report.games_per_sec > 0
+    assert report.avg_turns > 0
+    assert 'Games/sec' in str(report)
+
+
+def test_simulate_workers():
+    """Test 003: Games are split across worker processes"""
+    report = simulate(5, (RandomPlayer(), RandomPlayer()), cnt_workers=2, seed=1)
+    assert report.cnt_workers == 2
+    assert report.stats.cnt_games == 5
+    assert sum(report.stats.list_win) == report.stats.cnt_finished == 5
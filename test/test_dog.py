@@ -0,0 +1,295 @@
+import random
+import pytest
+from server.py.dog import (Dog, Card, Marble, Action, GamePhase, RandomPlayer, MASKED_CARD,
+                           LIST_POS_START, LIST_POS_KENNEL, LIST_POS_FINISH, TABLE_DIST_FINISH, TABLE_PATH,
+                           TABLE_PATH_TO, is_kennel)
+
+
+@pytest.fixture(autouse=True)
+def keep_random_state():
+    """ Seeded random games must not change the random numbers of the tests after them """
+    state_random = random.getstate()
+    yield
+    random.setstate(state_random)
+
+
+def get_game(idx_player: int = 0, list_card=None) -> Dog:
+    """ Game after the card exchange with the given cards for the active player """
+    game = Dog()
+    state = game.get_state()
+    state.idx_player_started = state.idx_player_active = idx_player
+    state.bool_card_exchanged = True
+    if list_card is not None:
+        state.list_player[idx_player].list_card = list_card
+    game.set_state(state)
+    return game
+
+
+def set_marble(game: Dog, idx_player: int, idx_marble: int, pos: int, is_save: bool = False) -> None:
+    marble = game.get_state().list_player[idx_player].list_marble[idx_marble]
+    marble.pos, marble.is_save = pos, is_save
+
+
+def test_geometry_tables():
+    """Test 001: Paths are looked up by player, position and steps, into the finish through the own start"""
+    assert LIST_POS_START == [0, 16, 32, 48]
+    assert LIST_POS_KENNEL == [64, 72, 80, 88] and LIST_POS_FINISH == [68, 76, 84, 92]
+    assert is_kennel(72) and not is_kennel(76) and not is_kennel(10)
+    assert TABLE_DIST_FINISH[1][13] == 4 and TABLE_DIST_FINISH[0][0] == 1 and TABLE_DIST_FINISH[0][1] == 64
+    assert TABLE_PATH[0][62][4] == [(63, 0, 1, 2), (63, 0, 68, 69)]
+    assert TABLE_PATH[0][2][-4] == [(1, 0, 63, 62)]
+    assert TABLE_PATH[1][13][13] == [tuple(range(14, 27))]  # beyond the finish
+    assert TABLE_PATH[0][69][2] == [(70, 71)] and TABLE_PATH[0][69][3] == []
+    assert TABLE_PATH[0][64][1] == [] and TABLE_PATH[0][69][-4] == []
+    assert TABLE_PATH_TO[1][13][77] == (14, 15, 16, 76, 77)
+
+
+def test_initial_state():
+    """Test 002: A new game deals 6 cards to each player with all marbles in the kennels"""
+    state = Dog().get_state()
+    assert state.phase == GamePhase.RUNNING and state.cnt_round == 1 and not state.bool_card_exchanged
+    assert len(state.list_card_draw) == 86 and not state.list_card_discard and state.card_active is None
+    for idx_player, player in enumerate(state.list_player):
+        assert len(player.list_card) == 6
+        assert [marble.pos for marble in player.list_marble] == list(range(64 + 8 * idx_player, 68 + 8 * idx_player))
+
+
+def test_card_exchange():
+    """Test 003: Each player gives a card to the partner, the cards change hands after the last one"""
+    game = Dog()
+    state = game.get_state()
+    list_card = []
+    for idx_player in range(4):
+        assert state.idx_player_active == idx_player
+        actions = game.get_list_action()
+        assert all(action.pos_from is None for action in actions)
+        assert len(actions) == len({(card.suit, card.rank) for card in state.list_player[idx_player].list_card})
+        list_card.append(actions[0].card)
+        game.apply_action(actions[0])
+    assert state.bool_card_exchanged and state.idx_player_active == 0
+    for idx_player in range(4):
+        assert state.list_player[(idx_player + 2) % 4].list_card[-1] == list_card[idx_player]
+        assert len(state.list_player[idx_player].list_card) == 6
+
+
+def test_move_out_of_kennel_and_send_home():
+    """Test 004: Start cards move a marble to the start, sending home an opponent and blocked by a save marble"""
+    game = get_game(0, [Card(suit='♠', rank='A'), Card(suit='♠', rank='2')])
+    set_marble(game, 1, 0, 0)
+    actions = game.get_list_action()
+    assert Action(card=Card(suit='♠', rank='A'), pos_from=64, pos_to=0) in actions
+    game.apply_action(Action(card=Card(suit='♠', rank='A'), pos_from=64, pos_to=0))
+    state = game.get_state()
+    assert state.list_player[0].list_marble[0] == Marble(pos=0, is_save=True)
+    assert state.list_player[1].list_marble[0].pos == 72 and state.idx_player_active == 1
+
+    game = get_game(1, [Card(suit='♠', rank='K'), Card(suit='♠', rank='5')])
+    set_marble(game, 1, 0, 16, is_save=True)
+    assert sorted(action.pos_to for action in game.get_list_action()) == [21, 29]
+
+
+def test_move_into_finish():
+    """Test 005: A marble passing its start can go on along the track or into the finish, but not overtake there"""
+    card = Card(suit='♦', rank='5')
+    game = get_game(0, [card])
+    set_marble(game, 0, 0, 62)
+    set_marble(game, 0, 1, 70)
+    assert sorted(action.pos_to for action in game.get_list_action()) == [3]
+    set_marble(game, 0, 1, 71)
+    assert sorted(action.pos_to for action in game.get_list_action()) == [3, 70]
+    game.apply_action(Action(card=card, pos_from=62, pos_to=70))
+    assert game.get_state().list_player[0].list_marble[0].pos == 70
+
+    game = get_game(0, [Card(suit='♦', rank='4')])
+    set_marble(game, 0, 0, 2)
+    set_marble(game, 1, 0, 0, is_save=True)
+    assert sorted(action.pos_to for action in game.get_list_action()) == [6]
+    with pytest.raises(ValueError):
+        game.apply_action(Action(card=Card(suit='♦', rank='4'), pos_from=2, pos_to=20))
+
+
+def test_seven_split_and_undo():
+    """Test 006: A SEVEN is split over marbles and sends home all marbles passed, or is undone and lost"""
+    card = Card(suit='♥', rank='7')
+    game = get_game(0, [card, Card(suit='♥', rank='K')])
+    set_marble(game, 0, 0, 0, is_save=True)
+    set_marble(game, 0, 1, 10)
+    set_marble(game, 1, 0, 2)
+    game.apply_action(Action(card=card, pos_from=0, pos_to=3))
+    state = game.get_state()
+    assert state.card_active == card and state.list_player[1].list_marble[0].pos == 72
+    assert all(action.card == card and action.pos_from in (3, 10) for action in game.get_list_action())
+    assert Action(card=card, pos_from=10, pos_to=14) in game.get_list_action()
+    game.apply_action(Action(card=card, pos_from=10, pos_to=14))
+    assert state.card_active is None and state.idx_player_active == 1
+    assert state.list_card_discard[-1] == card and len(state.list_player[0].list_card) == 1
+
+    game = get_game(0, [card])
+    set_marble(game, 0, 0, 12)
+    set_marble(game, 1, 0, 16, is_save=True)
+    game.apply_action(Action(card=card, pos_from=12, pos_to=15))
+    assert not game.get_list_action()
+    game.apply_action(None)
+    state = game.get_state()
+    assert state.list_player[0].list_marble[0].pos == 12 and state.card_active is None
+    assert state.idx_player_active == 1 and state.list_player[0].list_card == []
+
+
+def test_jake_and_joker():
+    """Test 007: A JAKE swaps with marbles which are not save, a JOKER stands in for cards with actions"""
+    jake, joker = Card(suit='♣', rank='J'), Card(suit='', rank='JKR')
+    game = get_game(0, [jake])
+    set_marble(game, 0, 0, 5)
+    set_marble(game, 1, 0, 16, is_save=True)
+    set_marble(game, 2, 0, 40)
+    assert game.get_list_action() == [Action(card=jake, pos_from=5, pos_to=40),
+                                      Action(card=jake, pos_from=40, pos_to=5)]
+    game.apply_action(Action(card=jake, pos_from=40, pos_to=5))
+    state = game.get_state()
+    assert state.list_player[0].list_marble[0].pos == 40 and state.list_player[2].list_marble[0].pos == 5
+
+    game = get_game(0, [joker, joker])
+    actions = game.get_list_action()
+    assert Action(card=joker, pos_from=64, pos_to=0) in actions
+    assert {action.card_swap.rank for action in actions if action.card_swap is not None} == {'A', 'K'}
+    game.apply_action(Action(card=joker, pos_from=None, pos_to=None, card_swap=Card(suit='♥', rank='K')))
+    state = game.get_state()
+    assert state.card_active == Card(suit='♥', rank='K') and state.idx_player_active == 0
+    assert state.list_player[0].list_card == [Card(suit='♥', rank='K'), joker]
+    assert game.get_list_action() == [Action(card=Card(suit='♥', rank='K'), pos_from=64, pos_to=0)]
+
+
+def test_rounds_and_reshuffle():
+    """Test 008: Rounds deal 6, 5, 4, 3, 2 cards with a new deck once the stock is out of cards"""
+    game = get_game(0, [Card(suit='♥', rank='2')])
+    state = game.get_state()
+    for player in state.list_player[1:]:
+        player.list_card = []
+    state.list_card_discard = list(state.list_card_draw)
+    state.list_card_draw = []
+    for _ in range(4):
+        game.apply_action(None)
+    assert state.cnt_round == 2 and state.idx_player_started == 1 and not state.bool_card_exchanged
+    assert all(len(player.list_card) == 5 for player in state.list_player)
+    assert len(state.list_card_draw) == 90 and not state.list_card_discard
+    list_cnt = []
+    for cnt_round in range(3, 8):
+        while state.cnt_round < cnt_round:
+            game.apply_action(None)
+        list_cnt.append(len(state.list_player[0].list_card))
+    assert list_cnt == [4, 3, 2, 6, 5]
+
+
+def test_partner_and_finish():
+    """Test 009: A player with all marbles in the finish moves the partner's marbles, a team finishes together"""
+    card = Card(suit='♥', rank='A')
+    game = get_game(0, [card])
+    for idx_marble in range(4):
+        set_marble(game, 0, idx_marble, 68 + idx_marble)
+        set_marble(game, 2, idx_marble, 84 + idx_marble)
+    set_marble(game, 2, 3, 32)
+    assert sorted(action.pos_to for action in game.get_list_action()) == [33, 43, 87]
+    set_marble(game, 2, 0, 87)
+    assert sorted(action.pos_to for action in game.get_list_action()) == [33, 43, 84]
+    game.apply_action(Action(card=card, pos_from=32, pos_to=84))
+    assert game.get_state().phase == GamePhase.FINISHED and not game.get_list_action()
+
+
+def test_player_view_and_random_game(capsys):
+    """Test 010: The view hides the other hands and random players finish a game"""
+    random.seed(1)
+    game = Dog()
+    view = game.get_player_view(1)
+    assert view.list_player[1].list_card == game.get_state().list_player[1].list_card
+    assert all(card == MASKED_CARD for card in view.list_player[0].list_card + view.list_card_draw)
+    player = RandomPlayer()
+    for _ in range(20000):
+        state = game.get_state()
+        if state.phase == GamePhase.FINISHED:
+            break
+        actions = game.get_list_action()
+        assert len(actions) == len({str(action) for action in actions})
+        game.apply_action(player.select_action(game.get_player_view(state.idx_player_active), actions))
+    assert game.get_state().phase == GamePhase.FINISHED
+    game.print_state()
+    assert 'Phase' in capsys.readouterr().out
+
+
+def test_occupancy_follows_actions():
+    """Test 011: The occupancy kept up to date by the actions equals the occupancy built from the state"""
+    random.seed(1)
+    game, fresh = Dog(), Dog()
+    player = RandomPlayer()
+    for _ in range(3000):
+        state = game.get_state()
+        if state.phase == GamePhase.FINISHED:
+            break
+        game.apply_action(player.select_action(state, game.get_list_action()))
+        fresh.set_state(game.get_state())
+        assert game.list_owner == fresh.list_owner and game.list_board == fresh.list_board
+        assert game.list_bits_player == fresh.list_bits_player and game.bits_save == fresh.bits_save
+
+
+def test_seven_lists_only_completable_steps():
+    """Test 012: A SEVEN lists only the steps after which all 7 steps can be played, none if there is no split"""
+    card = Card(suit='♠', rank='7')
+    game = get_game(0, [card])
+    set_marble(game, 0, 0, 10)
+    set_marble(game, 1, 0, 16, is_save=True)
+    assert not game.get_list_action()
+    set_marble(game, 0, 1, 12)
+    assert sorted((action.pos_from, action.pos_to) for action in game.get_list_action()) == [
+        (10, 11), (12, 13), (12, 14), (12, 15)]
+    game.apply_action(Action(card=card, pos_from=12, pos_to=13))
+    assert sorted((action.pos_from, action.pos_to) for action in game.get_list_action()) == [
+        (10, 11), (10, 12), (13, 14), (13, 15)]
+    game.apply_action(Action(card=card, pos_from=10, pos_to=12))
+    game.apply_action(Action(card=card, pos_from=13, pos_to=15))
+    assert sorted(action.pos_to for action in game.get_list_action()) == [13, 14]
+
+    game = get_game(0, [card])
+    set_marble(game, 0, 0, 63)
+    for idx_marble in range(1, 4):
+        set_marble(game, 0, idx_marble, 68 + idx_marble)
+    set_marble(game, 2, 0, 40)
+    assert Action(card=card, pos_from=63, pos_to=68) in game.get_list_action()
+    game.apply_action(Action(card=card, pos_from=63, pos_to=68))
+    assert {action.pos_from for action in game.get_list_action()} == {40}
+
+
+def test_joker_actions_are_unique():
+    """Test 013: Several JOKERs and pairs of cards list each action once, a JOKER stands in for ranks with actions"""
+    joker = Card(suit='', rank='JKR')
+    game = get_game(0, [joker, Card(suit='♥', rank='5'), joker, Card(suit='♥', rank='5'), joker])
+    set_marble(game, 0, 0, 10)
+    set_marble(game, 1, 0, 16, is_save=True)
+    actions = game.get_list_action()
+    assert len(actions) == len({str(action) for action in actions})
+    assert actions.count(Action(card=joker, pos_from=65, pos_to=0)) == 1
+    assert Action(card=Card(suit='♥', rank='5'), pos_from=10, pos_to=15) in actions
+    list_rank = [rank for rank in ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+                 if Action(card=joker, pos_from=None, pos_to=None, card_swap=Card(suit='♦', rank=rank)) in actions]
+    assert list_rank == ['2', '3', '4', '5', 'K', 'A']  # a SIX lands on the save marble, no SEVEN or JAKE
+    assert len([action for action in actions if action.card_swap is not None]) == 4 * len(list_rank)
+
+
+def test_marbles_changed_through_get_state():
+    """Test 014: Marbles changed in the state returned by get_state are seen by get_list_action and apply_action"""
+    random.seed(2)
+    game, fresh = Dog(), Dog()
+    player = RandomPlayer()
+    for _ in range(300):
+        state = game.get_state()
+        if state.phase == GamePhase.FINISHED:
+            break
+        if state.bool_card_exchanged and state.card_active is None:
+            marble = random.choice(state.list_player[random.randrange(4)].list_marble)
+            list_pos_free = [pos for pos in range(64) if all(marble_other.pos != pos for player_other in
+                             state.list_player for marble_other in player_other.list_marble)]
+            marble.pos, marble.is_save = random.choice(list_pos_free), random.random() < 0.5
+            fresh.set_state(state.model_copy(deep=True))
+            assert game.get_list_action() == fresh.get_list_action()
+        game.apply_action(player.select_action(state, game.get_list_action()))
+        fresh.set_state(game.get_state())
+        assert game.list_owner == fresh.list_owner and game.list_board == fresh.list_board
+        assert game.list_bits_player == fresh.list_bits_player and game.bits_save == fresh.bits_save
@@ -1,5 +1,9 @@
+import random
 import pytest
-from server.py.uno import Uno, GameState, Card, Action, GamePhase, RandomPlayer, PlayerState
+from pydantic import ValidationError
+from server.py.uno import (Uno, GameState, Card, Action, GamePhase, RandomPlayer, PenaltyPlayer, HoldWildsPlayer,
+                           ColorMajorityPlayer, PlayerState, CARD_TABLE, DECK,
+                           get_card_kind, get_card, get_view_delta, MASKED_CARD, UnoRules, CardKinds)
 
 
 def test_initial_game_state():
@@ -565,4 +569,319 @@ def test_uno_call():
     uno_actions = [a for a in actions if a.uno]
     non_uno_actions = [a for a in actions if a.card and not a.uno]
     assert len(uno_actions) > 0
-    assert len(non_uno_actions) > 0
\ No newline at end of file
+    assert len(non_uno_actions) > 0
+
+
+def test_card_flyweights():
+    """Test 017: The deck consists of 108 card ids referring to 54 shared immutable cards"""
+    assert len(CARD_TABLE) == 54
+    assert len(DECK) == 108
+    assert GameState().LIST_CARD == tuple(CARD_TABLE[kind] for kind in DECK)
+    assert 'LIST_CARD' not in GameState().model_dump()
+    game = Uno()
+    game.set_state(GameState(cnt_player=3))
+    state = game.get_state()
+    list_card = state.list_card_draw + state.list_card_discard
+    for player in state.list_player:
+        list_card += player.list_card
+    assert len(list_card) == 108
+    assert len({id(card) for card in list_card}) == 54
+    assert all(card is CARD_TABLE[get_card_kind(card)] for card in list_card)
+    assert get_card_kind(Card(color='red', number=5)) == 20
+    assert get_card_kind(Card(color='any', symbol='wilddraw4')) == 53
+    foreign = Card(color='green', number=None, symbol='2')
+    with pytest.raises(ValueError):
+        get_card_kind(foreign)
+    assert get_card_kind(foreign, -1) == -1 and get_card(20) is CARD_TABLE[20]
+    card_kinds = CardKinds()
+    kind = card_kinds.get_kind(foreign)
+    assert kind == 54 and card_kinds.cnt_kind == 55
+    assert card_kinds.get_kind(Card(color='green', symbol='2')) == kind and card_kinds.get_kind(CARD_TABLE[3]) == 3
+    assert card_kinds.get_card(kind) == foreign
+    assert CardKinds().get_kind(Card(color='red', symbol='2')) == 54  # other games number their own cards
+    with pytest.raises(ValidationError):
+        CARD_TABLE[0].color = 'blue'
+
+
+def test_hand_follows_state_changes():
+    """Test 018: Playing and drawing cards works on hands replaced directly in the state"""
+    game = Uno()
+    state = GameState(cnt_player=2, phase=GamePhase.SETUP, direction=1, idx_player_active=0)
+    game.set_state(state)
+    state.idx_player_active = 0
+    state.list_player[0].list_card = [Card(color='red', number=5), Card(color='green', number=5),
+                                      Card(color='green', number=None, symbol='2')]
+    state.list_card_discard = [Card(color='red', number=7)]
+    state.list_card_draw = [Card(color='blue', number=1), Card(color='blue', number=2)]
+    state.color = 'red'
+    state.cnt_to_draw = 0
+    state.has_drawn = False
+    game.apply_action(Action(card=Card(color='green', number=5), color='green'))
+    assert state.list_player[0].list_card == [Card(color='red', number=5), Card(color='green', symbol='2')]
+    assert state.list_card_discard[-1] == Card(color='green', number=5)
+    state.list_player[1].list_card.append(Card(color='green', number=9))
+    game.apply_action(Action(draw=1))
+    assert state.list_player[1].list_card[-1] == Card(color='blue', number=2)
+    game.apply_action(Action(card=Card(color='green', number=9), color='green'))
+    assert len(state.list_player[1].list_card) == len(state.list_player[0].list_card) + 6
+
+
+def test_player_view_shares_cards():
+    """Test 019: Player view shares the visible cards and cannot change the game state"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=3))
+    state = game.get_state()
+    view = game.get_player_view(1)
+    assert view.list_player[1].list_card == state.list_player[1].list_card
+    assert all(a is b for a, b in zip(view.list_player[1].list_card, state.list_player[1].list_card))
+    assert view.list_player[0].list_card == [MASKED_CARD] * len(state.list_player[0].list_card)
+    assert len(view.list_card_draw) == len(state.list_card_draw)
+    assert view.list_card_discard[-1] is state.list_card_discard[-1]
+    assert (view.color, view.idx_player_active, view.cnt_to_draw) == (state.color, state.idx_player_active,
+                                                                     state.cnt_to_draw)
+    view.list_player[1].list_card.clear()
+    view.list_card_discard.clear()
+    assert len(state.list_player[1].list_card) == state.CNT_HAND_CARDS
+    assert len(state.list_card_discard) == 1
+    assert GameState.model_validate(view.model_dump()) == view
+
+
+def test_long_hand_actions():
+    """Test 020: Legal actions of a long hand follow the card counts, also after drawing and playing"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=2))
+    state = game.get_state()
+    state.idx_player_active = 0
+    state.list_player[0].list_card = ([Card(color='blue', number=number) for number in range(10)] * 3
+                                      + [Card(color='green', number=3), Card(color='any', symbol='wilddraw4')])
+    state.list_card_discard = [Card(color='green', number=5)]
+    state.list_card_draw = [Card(color='green', number=7)]
+    state.color = 'green'
+    state.cnt_to_draw = 0
+    state.has_drawn = False
+    actions = game.get_list_action()
+    assert Action(card=Card(color='blue', number=5), color='blue') in actions
+    assert actions.count(Action(card=Card(color='blue', number=5), color='blue')) == 3
+    assert Action(card=Card(color='green', number=3), color='green') in actions
+    assert not any(action.card and action.card.symbol == 'wilddraw4' for action in actions)
+    assert len(actions) == 3 + 1 + 1
+    game.apply_action(Action(card=Card(color='green', number=3), color='green'))
+    game.apply_action(Action(draw=1))
+    state.idx_player_active = 0
+    state.has_drawn = False
+    actions = game.get_list_action()
+    assert len([action for action in actions if action.card and action.card.symbol == 'wilddraw4']) == 4
+    assert Action(card=Card(color='blue', number=3), color='blue') in actions
+
+
+def test_action_key():
+    """Test 021: Actions are immutable, hashable and equal exactly when their fields are equal"""
+    card = Card(color='red', symbol='skip')
+    action = Action(card=card, color='red')
+    assert str(action) == 'RSKIP  R'
+    assert action == Action(card=Card(color='red', symbol='skip'), color='red')
+    assert hash(action) == hash(Action.model_validate(action.model_dump()))
+    assert action != Action(card=card, color='blue')
+    assert action != Action(card=card, color='red', uno=True)
+    assert Action(card=Card(color='red', number=3)) != Action(card=Card(color='red', number=3), color='red')
+    assert len({action, Action(card=card, color='red'), Action(draw=1), Action(draw=1)}) == 2
+    assert sorted([Action(draw=2), action, Action(draw=1)]) == [Action(draw=1), Action(draw=2), action]
+    with pytest.raises(ValidationError):
+        action.uno = True
+    action_uno = action.model_copy(update={'uno': True})
+    assert str(action_uno) == 'RSKIP  R UNO'
+    assert action_uno == Action(card=card, color='red', uno=True)
+
+
+def test_heuristic_players():
+    """Test 022: Players leave the action list as it is and follow their heuristic"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=2))
+    state = game.get_state()
+    state.idx_player_active = 0
+    state.list_player[0].list_card = [Card(color='red', number=9), Card(color='red', symbol='draw2'),
+                                      Card(color='blue', number=1), Card(color='blue', number=2),
+                                      Card(color='blue', number=3), Card(color='any', symbol='wild')]
+    state.list_card_discard = [Card(color='red', number=1)]
+    state.color = 'red'
+    state.cnt_to_draw = 0
+    state.has_drawn = False
+    actions = game.get_list_action()
+    copy_actions = list(actions)
+    for player in (RandomPlayer(), PenaltyPlayer(), HoldWildsPlayer(), ColorMajorityPlayer()):
+        for _ in range(20):
+            assert player.select_action(game.get_player_view(0), actions) in actions
+        assert actions == copy_actions
+    view = game.get_player_view(0)
+    assert PenaltyPlayer().select_action(view, actions) == Action(card=Card(color='red', symbol='draw2'), color='red',
+                                                                 draw=2)
+    assert HoldWildsPlayer().select_action(view, actions) == Action(card=Card(color='red', number=9), color='red')
+    action = ColorMajorityPlayer().select_action(view, actions)
+    assert action in (Action(card=Card(color='blue', number=1), color='blue'),
+                      Action(card=Card(color='any', symbol='wild'), color='blue'))
+    assert PenaltyPlayer().select_action(view, [Action(draw=1)]) == Action(draw=1)
+    assert HoldWildsPlayer().select_action(view, []) is None
+
+
+def test_draw_with_reshuffle():
+    """Test 023: Drawing past the end of the draw pile reshuffles the discard pile into the same list"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=2))
+    state = game.get_state()
+    state.idx_player_active = 0
+    state.cnt_to_draw = 4
+    state.has_drawn = False
+    state.list_card_discard = [Card(color='red', number=number) for number in range(6)] + [
+        Card(color='any', symbol='wilddraw4')]
+    state.list_card_draw = [Card(color='blue', number=1), Card(color='blue', number=2)]
+    list_card_draw, list_card_discard = state.list_card_draw, state.list_card_discard
+    cnt_hand = len(state.list_player[0].list_card)
+    game.apply_action(Action(draw=4))
+    assert state.list_player[0].list_card[cnt_hand:cnt_hand + 2] == [Card(color='blue', number=2),
+                                                                     Card(color='blue', number=1)]
+    assert len(state.list_player[0].list_card) == cnt_hand + 4
+    assert state.list_card_draw is list_card_draw and state.list_card_discard is list_card_discard
+    assert state.list_card_discard == [Card(color='any', symbol='wilddraw4')]
+    assert len(state.list_card_draw) == 4
+    assert sorted(card.number for card in state.list_card_draw + state.list_player[0].list_card[cnt_hand + 2:]) == (
+        list(range(6)))
+    state.has_drawn = False
+    game.apply_action(Action(draw=8))
+    assert len(state.list_player[0].list_card) == cnt_hand + 8
+    assert not state.list_card_draw
+
+
+def test_listed_actions_are_shared():
+    """Test 024: Listed actions are shared instances equal to validated ones, input is still validated"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=2))
+    state = game.get_state()
+    state.idx_player_active = 0
+    state.list_player[0].list_card = [Card(color='red', number=3), Card(color='any', symbol='wild')]
+    state.list_card_discard = [Card(color='red', number=5)]
+    state.color = 'red'
+    state.cnt_to_draw = 0
+    state.has_drawn = False
+    actions = game.get_list_action()
+    assert all(action is other for action, other in zip(actions, game.get_list_action()))
+    assert Action(card=Card(color='red', number=3), color='red', uno=True) in actions
+    assert Action(card=Card(color='any', symbol='wild'), color='blue', uno=False) in actions
+    assert actions[-1] == Action(draw=1)
+    assert all(Action.model_validate(action.model_dump()) == action for action in actions)
+    with pytest.raises(ValidationError):
+        Action.model_validate({'card': {'color': 'red', 'number': 'three'}, 'color': 'red'})
+
+
+def apply_view_delta(dict_view, delta):
+    for name, value in delta.items():
+        if name == 'cnt_card_draw':
+            dict_view['list_card_draw'] = [MASKED_CARD.model_dump()] * value
+        elif name == 'list_card_discard_add':
+            dict_view['list_card_discard'] = dict_view['list_card_discard'] + value
+        elif name == 'list_hand':
+            for player, hand in zip(dict_view['list_player'], value):
+                if isinstance(hand, int):
+                    player['list_card'] = [MASKED_CARD.model_dump()] * hand
+                elif hand is not None:
+                    player['list_card'] = hand
+        else:
+            dict_view[name] = value
+
+
+def test_view_delta():
+    """Test 025: Applying the deltas of a whole game to the first view gives every later view"""
+    random.seed(4)
+    game = Uno()
+    game.set_state(GameState(cnt_player=3))
+    state = game.get_state()
+    view_before = game.get_player_view(1)
+    dict_view = view_before.model_dump()
+    player = RandomPlayer()
+    while state.phase == GamePhase.RUNNING:
+        game.apply_action(player.select_action(state, game.get_list_action()))
+        view = game.get_player_view(1)
+        delta = get_view_delta(view_before, view)
+        assert 'list_card_draw' not in delta and 'list_player' not in delta
+        apply_view_delta(dict_view, delta)
+        assert dict_view == view.model_dump()
+        view_before = view
+    assert get_view_delta(view, game.get_player_view(1)) == {}
+
+
+def set_hands(game, list_hand, top, color=None, cnt_to_draw=0):
+    state = game.get_state()
+    for player, list_card in zip(state.list_player, list_hand):
+        player.list_card = list_card
+    state.list_card_discard = [Card(color='blue', number=1), top]
+    state.color = color or top.color
+    state.idx_player_active = 0
+    state.direction = 1
+    state.cnt_to_draw = cnt_to_draw
+    state.has_drawn = False
+    return state
+
+
+def test_rules_stack_and_penalty():
+    """Test 026: Rule variants stack a wilddraw4 on a draw2 and change the UNO penalty"""
+    draw2 = Card(color='red', symbol='draw2')
+    wilddraw4 = Card(color='any', symbol='wilddraw4')
+    hand = [Card(color='green', symbol='draw2'), wilddraw4, Card(color='green', number=3)]
+    game = Uno()
+    game.set_state(GameState(cnt_player=2))
+    set_hands(game, [list(hand)], draw2, cnt_to_draw=2)
+    assert {(str(action.card), action.draw) for action in game.get_list_action()} == {('GDRAW2', 4), ('None', 2)}
+
+    game = Uno(UnoRules(stack_draw4_on_draw2=True, cnt_penalty_uno=2))
+    game.set_state(GameState(cnt_player=2))
+    state = set_hands(game, [list(hand)], draw2, cnt_to_draw=2)
+    actions = game.get_list_action()
+    assert Action(card=wilddraw4, color='blue', draw=6) in actions
+    assert len(actions) == 1 + 4 + 1
+    game.apply_action(Action(card=wilddraw4, color='blue', draw=6))
+    assert state.cnt_to_draw == 6 and state.color == 'blue'
+    assert game.get_list_action() == [Action(draw=6)]
+
+    state = set_hands(game, [[Card(color='green', number=3), Card(color='green', number=4)]],
+                      Card(color='green', number=5))
+    cnt_draw = len(state.list_card_draw)
+    game.apply_action(Action(card=Card(color='green', number=3), color='green'))
+    assert len(state.list_player[0].list_card) == 1 + 2
+    assert len(state.list_card_draw) == cnt_draw - 2
+
+
+def test_rules_jump_in():
+    """Test 027: With jump-in a player holding the top card plays it out of turn"""
+    top = Card(color='red', number=5)
+    game = Uno(UnoRules(jump_in=True))
+    game.set_state(GameState(cnt_player=3))
+    state = set_hands(game, [[Card(color='green', number=3)] * 3, [Card(color='blue', number=2)] * 3,
+                             [top, Card(color='red', number=5), Card(color='blue', number=7)]], top)
+    assert game.get_list_jump_in(0) == []
+    assert game.get_list_jump_in(1) == []
+    assert game.get_list_jump_in(2) == [Action(card=top, color='red')] * 2
+    game.apply_jump_in(2, Action(card=top, color='red'))
+    assert state.idx_player_active == 0
+    assert len(state.list_player[2].list_card) == 2
+    with pytest.raises(ValueError):
+        game.apply_jump_in(1, Action(card=top, color='red'))
+    assert Uno().get_list_jump_in(1) == []
+
+
+def test_rules_seven_zero():
+    """Test 028: With seven-zero a 7 swaps hands with the next player and a 0 passes all hands on"""
+    game = Uno(UnoRules(seven_zero=True))
+    game.set_state(GameState(cnt_player=3))
+    hand_1 = [Card(color='blue', number=2)] * 3
+    hand_2 = [Card(color='yellow', number=4)] * 4
+    state = set_hands(game, [[Card(color='red', number=7), Card(color='red', number=0), Card(color='red', number=1)],
+                             list(hand_1), list(hand_2)], Card(color='red', number=5))
+    game.apply_action(Action(card=Card(color='red', number=7), color='red'))
+    assert state.list_player[0].list_card == hand_1
+    assert state.list_player[1].list_card == [Card(color='red', number=0), Card(color='red', number=1)]
+    assert state.idx_player_active == 1
+    assert Action(card=Card(color='red', number=0), color='red', uno=True) in game.get_list_action()
+    game.apply_action(Action(card=Card(color='red', number=0), color='red', uno=True))
+    assert [len(player.list_card) for player in state.list_player] == [4, 3, 1]
+    assert state.list_player[2].list_card == [Card(color='red', number=1)]
+    state.idx_player_active = 2
+    assert Action(card=Card(color='red', number=1), color='red') in game.get_list_action()
@@ -0,0 +1,90 @@
+from collections import Counter
+import numpy as np
+import pytest
+from server.py.uno import Uno, GamePhase, get_card_kind
+from server.py.uno_batch import (UnoBatch, ACTION_DRAW, ACTION_PASS, CNT_KIND, KIND_WILDDRAW4, get_action,
+                                 get_action_code, random_policy, play_first_policy, simulate)
+
+
+def get_kinds(list_card):
+    return Counter(get_card_kind(card) for card in list_card)
+
+
+def test_reset_deals_cards():
+    """Test 001: Every game starts with dealt hands, one discard and the rest of the deck"""
+    batch = UnoBatch(500, 3, seed=1)
+    assert (batch.hand.sum(axis=2) == 7).all()
+    assert (batch.cnt_draw == 108 - 3 * 7 - 1).all()
+    assert (batch.pile_discard[:, 0] != KIND_WILDDRAW4).all()
+    for idx_game in range(5):
+        state = batch.get_state(idx_game)
+        cnt_card = len(state.list_card_draw) + len(state.list_card_discard)
+        cnt_card += sum(len(player.list_card) for player in state.list_player)
+        assert cnt_card == 108
+    assert set(batch.idx_player_active) <= {0, 1}
+
+
+@pytest.mark.parametrize('cnt_player', [2, 3, 5])
+def test_batch_matches_engine(cnt_player):
+    """Test 002: Legal actions and the effect of every step match the UNO engine"""
+    batch = UnoBatch(12, cnt_player, seed=cnt_player)
+    rng = np.random.default_rng(0)
+    for _ in range(400):
+        if batch.is_finished.all():
+            break
+        mask = batch.get_mask()
+        actions = random_policy(mask, rng)
+        uno = rng.random(batch.cnt_game) < 0.7
+        list_game = []
+        for idx_game in np.flatnonzero(~batch.is_finished):
+            state = batch.get_state(idx_game)
+            game = Uno()
+            game.set_state(state)
+            if batch.cnt_draw[idx_game] == 0:
+                state.list_card_draw.clear()  # set_state refills an empty draw pile with a new deck
+            cnt_card = len(state.list_player[state.idx_player_active].list_card)
+            codes = {get_action_code(action) for action in game.get_list_action()}
+            assert codes == set(np.flatnonzero(mask[idx_game])) or (not codes and actions[idx_game] == ACTION_PASS)
+            is_reshuffle_possible = len(state.list_card_draw) < 4
+            game.apply_action(get_action(int(actions[idx_game]), cnt_card, state.cnt_to_draw, bool(uno[idx_game])))
+            list_game.append((idx_game, game, is_reshuffle_possible))
+        batch.step(actions, uno)
+        for idx_game, game, is_reshuffle_possible in list_game:
+            expected, found = game.get_state(), batch.get_state(idx_game)
+            assert expected.phase == found.phase
+            if expected.phase == GamePhase.FINISHED:
+                assert batch.winner[idx_game] >= 0
+                continue
+            assert (expected.idx_player_active, expected.direction, expected.color) == (
+                found.idx_player_active, found.direction, found.color)
+            assert (expected.cnt_to_draw, expected.has_drawn) == (found.cnt_to_draw, found.has_drawn)
+            assert expected.list_card_discard[-1] == found.list_card_discard[-1]
+            for player_expected, player_found in zip(expected.list_player, found.list_player):
+                if is_reshuffle_possible:
+                    assert len(player_expected.list_card) == len(player_found.list_card)
+                else:
+                    assert get_kinds(player_expected.list_card) == get_kinds(player_found.list_card)
+            if not is_reshuffle_possible:
+                assert expected.list_card_draw == found.list_card_draw
+
+
+def test_simulate_finishes_games():
+    """Test 003: Self-play with the play first policy finishes all games"""
+    winners, turns = simulate(300, 4, play_first_policy, seed=3)
+    assert (winners >= 0).all()
+    assert (turns > 0).all()
+    assert np.bincount(winners, minlength=4).min() > 30
+
+
+def test_policies_choose_legal_actions():
+    """Test 004: Policies only pick legal actions and prefer playing over drawing"""
+    batch = UnoBatch(1000, 2, seed=4)
+    rng = np.random.default_rng(4)
+    mask = batch.get_mask()
+    for policy in (random_policy, play_first_policy):
+        actions = policy(mask, rng)
+        assert mask[np.arange(1000), actions].all()
+    actions = play_first_policy(mask, rng)
+    has_play = mask[:, :ACTION_DRAW].any(axis=1)
+    assert (actions[has_play] < ACTION_DRAW).all()
+    assert mask.shape == (1000, CNT_KIND * 5 + 1)
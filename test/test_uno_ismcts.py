@@ -0,0 +1,106 @@
+import random
+from server.py.uno import (Uno, GameState, GamePhase, Action, Card, RandomPlayer, PenaltyPlayer, HoldWildsPlayer,
+                           get_card_kind)
+from server.py.uno_ismcts import RolloutGame, InfoSet, ISMCTSPlayer, DRAW, get_move, search, play_match
+
+
+def get_list_move_expected(state: GameState, actions):
+    cnt_card = len(state.list_player[state.idx_player_active].list_card)
+    return {get_move(action, cnt_card) for action in actions if action.uno or cnt_card != 2 or action.card is None}
+
+
+def test_rollout_rules_match_engine():
+    """Test 001: The rollout engine offers and applies the same moves as the UNO engine"""
+    random.seed(1)
+    for _ in range(30):
+        game = Uno()
+        game.set_state(GameState(cnt_player=random.randint(2, 4)))
+        state = game.get_state()
+        while state.phase == GamePhase.RUNNING:
+            rollout = RolloutGame.from_state(state)
+            actions = game.get_list_action()
+            assert set(rollout.get_list_move()) == get_list_move_expected(state, actions)
+            action = random.choice(actions) if actions else None
+            is_reshuffle_possible = len(state.list_card_draw) < 4
+            rollout.apply_move(get_move(action, len(rollout.list_hand[rollout.idx_player_active]))
+                               if action else None)
+            game.apply_action(action)
+            assert rollout.idx_player_active == state.idx_player_active
+            assert (rollout.color, rollout.direction, rollout.cnt_to_draw, rollout.has_drawn) == (
+                state.color, state.direction, state.cnt_to_draw, state.has_drawn)
+            assert rollout.list_discard[-1] == get_card_kind(state.list_card_discard[-1])
+            assert (rollout.winner is not None) == (state.phase == GamePhase.FINISHED)
+            for hand, player in zip(rollout.list_hand, state.list_player):
+                if is_reshuffle_possible:
+                    assert len(hand) == len(player.list_card)
+                else:
+                    assert sorted(hand) == sorted(get_card_kind(card) for card in player.list_card)
+
+
+def test_determinize_keeps_known_cards():
+    """Test 002: Determinizations keep the own hand, the discard pile and all card counts"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=3))
+    state = game.get_state()
+    idx_player = state.idx_player_active
+    info = InfoSet(game.get_player_view(idx_player), idx_player)
+    rng = random.Random(0)
+    for _ in range(10):
+        rollout = info.determinize(rng)
+        assert sorted(rollout.list_hand[idx_player]) == sorted(get_card_kind(card) for card in
+                                                               state.list_player[idx_player].list_card)
+        assert [len(hand) for hand in rollout.list_hand] == [len(player.list_card) for player in state.list_player]
+        assert len(rollout.list_draw) == len(state.list_card_draw)
+        cnt_card = sum(len(hand) for hand in rollout.list_hand) + len(rollout.list_draw) + len(rollout.list_discard)
+        assert cnt_card == 108
+
+
+def test_search_finds_winning_move():
+    """Test 003: The search plays the last card instead of drawing"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=2))
+    state = game.get_state()
+    state.idx_player_active = 0
+    state.list_player[0].list_card = [Card(color='red', number=3)]
+    state.list_card_discard = [Card(color='red', number=5)]
+    state.color = 'red'
+    state.cnt_to_draw = 0
+    state.has_drawn = False
+    visits = search(InfoSet(game.get_player_view(0), 0), time_budget=5.0, max_iterations=200, seed=1)
+    assert max(visits, key=lambda move: visits[move]) != DRAW
+    action = ISMCTSPlayer(max_iterations=200, seed=1).select_action(game.get_player_view(0), game.get_list_action())
+    assert action == Action(card=Card(color='red', number=3), color='red')
+
+
+def test_player_selects_listed_action():
+    """Test 004: The player returns one of the listed actions, also with a process pool"""
+    game = Uno()
+    game.set_state(GameState(cnt_player=3))
+    state = game.get_state()
+    player = ISMCTSPlayer(time_budget=0.2, cnt_workers=2, seed=1)
+    for _ in range(3):
+        actions = game.get_list_action()
+        action = player.select_action(game.get_player_view(state.idx_player_active), actions)
+        assert action in actions or (action is None and not actions)
+        game.apply_action(action)
+    player.close()
+    assert ISMCTSPlayer().select_action(state, []) is None
+
+
+def test_player_beats_random_player():
+    """Test 005: The ISMCTS player wins most games against a random player"""
+    random.seed(2)
+    wins = play_match([ISMCTSPlayer(max_iterations=30, seed=2), RandomPlayer()], 10)
+    assert wins[0] > wins[1]
+
+
+def test_heuristic_rollout_policy():
+    """Test 006: Playouts with a heuristic policy finish and the player can search with it"""
+    random.seed(3)
+    game = Uno()
+    game.set_state(GameState(cnt_player=3))
+    rollout = RolloutGame.from_state(game.get_state(), random.Random(3))
+    assert rollout.playout(1000, PenaltyPlayer()) in range(3)
+    player = ISMCTSPlayer(max_iterations=30, seed=3, rollout_policy=HoldWildsPlayer())
+    wins = play_match([player, RandomPlayer()], 4)
+    assert sum(wins) == 4
@@ -0,0 +1,73 @@
+import contextlib
+import io
+import numpy as np
+import pytest
+from server.py.uno import Uno, GameState, GamePhase, Action, Card, RandomPlayer
+from server.py.uno_batch import UnoBatch, ACTION_DRAW, get_action_code, random_policy, play_first_policy
+from server.py.uno_learn import (LinearPolicy, LearnedPlayer, CNT_FEATURE, generate_samples, get_batch_features,
+                                 get_view_features, play_batch_match, train)
+from server.py.uno_ismcts import play_match
+
+
+@pytest.mark.parametrize('cnt_player', [2, 4])
+def test_view_features_match_batch_features(cnt_player):
+    """Test 001: Features of a player view equal the features of the same game in the batch"""
+    batch = UnoBatch(20, cnt_player, seed=cnt_player)
+    rng = np.random.default_rng(cnt_player)
+    for _ in range(60):
+        mask = batch.get_mask()
+        for idx_game in np.flatnonzero(~batch.is_finished)[:5]:
+            codes = np.flatnonzero(mask[idx_game])
+            if len(codes) == 0:
+                continue
+            game = Uno()
+            with contextlib.redirect_stdout(io.StringIO()):
+                game.set_state(batch.get_state(idx_game))
+            view = game.get_player_view(int(batch.idx_player_active[idx_game]))
+            expected = get_batch_features(batch, np.full(len(codes), idx_game), codes)
+            assert expected.shape == (len(codes), CNT_FEATURE)
+            assert np.allclose(get_view_features(view, codes.tolist()), expected)
+        batch.step(random_policy(mask, rng))
+
+
+def test_trained_policy_beats_random():
+    """Test 002: A policy trained on random self-play wins most games against random players"""
+    features, won = generate_samples(1000, 2, seed=1)
+    assert features.shape == (len(won), CNT_FEATURE) and 0.3 < won.mean() < 0.7
+    policy = train(features, won)
+    wins = play_batch_match([policy, random_policy], 2000, seed=2)
+    assert wins[0] > 0.7 * wins.sum()
+    wins = play_batch_match([play_first_policy, policy], 2000, seed=3)
+    assert wins[1] > 0.5 * wins.sum()
+    wins = play_match([LearnedPlayer(policy), RandomPlayer()], 20)
+    assert wins[0] > wins[1]
+
+
+def test_learned_player_selects_listed_action(tmp_path):
+    """Test 003: The player returns a listed action, calls UNO and plays with saved and loaded weights"""
+    coef = np.zeros(CNT_FEATURE)
+    coef[0] = -1.0  # fewer cards is better
+    path = str(tmp_path / 'policy.npz')
+    LinearPolicy(coef).save(path)
+    player = LearnedPlayer(LinearPolicy.load(path))
+    game = Uno()
+    with contextlib.redirect_stdout(io.StringIO()):
+        game.set_state(GameState(cnt_player=2))
+    state = game.get_state()
+    state.idx_player_active = 0
+    state.list_player[0].list_card = [Card(color='red', number=3), Card(color='blue', number=7)]
+    state.list_card_discard = [Card(color='red', number=5)]
+    state.color, state.cnt_to_draw, state.has_drawn = 'red', 0, False
+    action = player.select_action(game.get_player_view(0), game.get_list_action())
+    assert action == Action(card=Card(color='red', number=3), color='red', uno=True)
+    for _ in range(50):
+        if state.phase != GamePhase.RUNNING:
+            break
+        actions = game.get_list_action()
+        action = player.select_action(game.get_player_view(state.idx_player_active), actions)
+        assert action in actions or (action is None and not actions)
+        game.apply_action(action)
+    assert player.select_action(state, [Action(draw=1)]) == Action(draw=1)
+    assert get_action_code(Action(draw=1)) == ACTION_DRAW
+    with pytest.raises(ValueError):
+        LinearPolicy(np.zeros(3))
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from server.py.uno_batch import ACTION_PASS, KIND_SYMBOL
+from server.py.uno_stats import (UnoReport, DICT_GAME_DTYPE, DICT_TURN_DTYPE, LIST_EFFECT, generate_chunks,
+                                 read_chunks, write_chunk)
+
+
+def test_chunks_log_all_games_and_turns():
+    """Test 001: Every game is logged once with all its turns, in chunks of about the given size"""
+    chunks = list(generate_chunks(500, 3, seed=1, cnt_parallel=100, cnt_turn_chunk=5000))
+    assert len(chunks) > 2
+    games = pd.concat([games for games, _ in chunks])
+    turns = pd.concat([turns for _, turns in chunks])
+    assert dict(games.dtypes) == {name: np.dtype(dtype) for name, dtype in DICT_GAME_DTYPE.items()}
+    assert dict(turns.dtypes) == {name: np.dtype(dtype) for name, dtype in DICT_TURN_DTYPE.items()}
+    assert sorted(games['game']) == list(range(500))
+    assert (games['winner'] >= 0).all() and (games['players'] == 3).all()
+    games = games.set_index('game').sort_index()
+    assert (turns.groupby('game').size() == games['turns']).all()
+    assert (turns.groupby('game')['turn'].max() + 1 == games['turns']).all()
+    last = turns.sort_values(['game', 'turn']).groupby('game').last()
+    assert (last['player'] == games['winner']).all()
+    assert (last['action'] != ACTION_PASS).all()
+    assert all(len(turns) < 5000 + 100 for _, turns in chunks)
+
+
+def test_report_matches_tables():
+    """Test 002: The report of chunks equals the statistics of the whole tables"""
+    chunks = list(generate_chunks(400, 2, seed=2, cnt_parallel=50, cnt_turn_chunk=2000))
+    report = UnoReport(2)
+    for games, turns in chunks:
+        report.update(games, turns)
+    games = pd.concat([games for games, _ in chunks])
+    turns = pd.concat([turns for _, turns in chunks])
+    seats = report.get_seats()
+    assert list(seats['win_rate']) == list(games['winner'].value_counts().sort_index() / 400)
+    assert np.allclose(seats['hand'], turns.groupby('player')['hand'].mean())
+    first_card = report.get_first_card()
+    effect = pd.Series(LIST_EFFECT)[KIND_SYMBOL[games['first_kind']] + 1].to_numpy()
+    assert np.allclose(first_card['turns'], games.groupby(effect)['turns'].mean()[first_card.index])
+    assert np.isclose(first_card['games'].sum(), 1.0)
+    length = report.get_length()
+    assert length['games'] == 400 and length['finished'] == 1.0
+    assert np.isclose(length['mean'], games['turns'].mean())
+    assert length['p50'] == np.percentile(games['turns'], 50, method='inverted_cdf')
+    with pytest.raises(ValueError):
+        UnoReport(3).update(*chunks[0])
+
+
+def test_write_and_read_chunks(tmp_path):
+    """Test 003: Written chunks are read back in order with the same columns"""
+    chunks = list(generate_chunks(100, 2, seed=3, cnt_parallel=20, cnt_turn_chunk=1000))
+    for idx_chunk, (games, turns) in enumerate(chunks):
+        write_chunk(games, turns, str(tmp_path), idx_chunk, 'csv')
+    chunks_read = list(read_chunks(str(tmp_path)))
+    assert len(chunks_read) == len(chunks)
+    for (games, turns), (games_read, turns_read) in zip(chunks, chunks_read):
+        pd.testing.assert_frame_equal(games, games_read)
+        pd.testing.assert_frame_equal(turns, turns_read)
+    with pytest.raises(ValueError):
+        write_chunk(*chunks[0], str(tmp_path), 0, 'xlsx')